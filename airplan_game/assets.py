@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源管理器
+图片、音效、GIF 背景在线程池中并行解码，需要显示设备的转换（convert_alpha 等）
+回到主线程完成；加载期间可显示进度界面，结束后输出每个资源的耗时明细
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import pygame
+
+
+class AssetJob:
+    """一个待加载的资源：loader 在线程池中执行，finalize 在主线程中处理 loader 的结果"""
+
+    def __init__(self, name, loader, finalize=None):
+        self.name = name
+        self.loader = loader
+        self.finalize = finalize
+        self.load_ms = 0.0
+        self.finalize_ms = 0.0
+        self.result = None
+
+
+def _timed(job):
+    start = time.perf_counter()
+    result = job.loader()
+    job.load_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+def decode_image(path, scale=None, rotation=None):
+    """线程中执行：解码图片并缩放/旋转（尚未转换为显示格式）"""
+    img = pygame.image.load(path)
+    if scale:
+        img = pygame.transform.scale(img, scale)
+    if rotation:
+        img = pygame.transform.rotate(img, rotation)
+    return img
+
+
+def image_job(name, path, scale=None, rotation=None):
+    """图片资源：线程中解码与变换，主线程 convert_alpha"""
+    return AssetJob(name, lambda: decode_image(path, scale, rotation), lambda img: img.convert_alpha())
+
+
+def sound_job(name, path):
+    """音效资源：线程中解码为 Sound（需要先初始化 mixer）"""
+    return AssetJob(name, lambda: pygame.mixer.Sound(path))
+
+
+class AssetManager:
+    """并行加载一组资源"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or min(8, max(2, os.cpu_count() or 1))
+        self.jobs = []
+        self.assets = {}
+        self.total_ms = 0.0
+
+    def add(self, job):
+        self.jobs.append(job)
+        return job
+
+    def load_all(self, on_progress=None, poll_ms=30):
+        """
+        加载全部资源
+        :param on_progress: 主线程回调 on_progress(已完成数, 总数, 最近完成的资源名)，用于绘制加载界面
+        :return: {资源名: 资源}
+        """
+        start = time.perf_counter()
+        total = len(self.jobs)
+        done_count = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asset') as pool:
+            futures = {pool.submit(_timed, job): job for job in self.jobs}
+            pending = set(futures)
+            last_name = ''
+            while pending:
+                if on_progress:
+                    on_progress(done_count, total, last_name)
+                done, pending = wait(pending, timeout=poll_ms / 1000, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures[future]
+                    result = future.result()
+                    t = time.perf_counter()
+                    job.result = job.finalize(result) if job.finalize else result
+                    job.finalize_ms = (time.perf_counter() - t) * 1000
+                    self.assets[job.name] = job.result
+                    done_count += 1
+                    last_name = job.name
+        if on_progress:
+            on_progress(done_count, total, last_name)
+        self.total_ms = (time.perf_counter() - start) * 1000
+        return self.assets
+
+    def report(self):
+        """每个资源的耗时明细（按线程耗时降序）"""
+        lines = [f"{'资源':<16}{'线程解码(ms)':>14}{'主线程(ms)':>12}"]
+        for job in sorted(self.jobs, key=lambda j: j.load_ms, reverse=True):
+            lines.append(f"{job.name:<16}{job.load_ms:>14.1f}{job.finalize_ms:>12.1f}")
+        serial = sum(j.load_ms + j.finalize_ms for j in self.jobs)
+        lines.append(f"并行加载总耗时 {self.total_ms:.1f}ms（串行合计 {serial:.1f}ms，{self.workers} 个线程）")
+        return '\n'.join(lines)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精灵图集
+SPRITE_SPECS 描述每个精灵的源文件与缩放/旋转；build_atlas.py 离线把它们处理好并打包成
+一张图集 + JSON 索引，运行时只加载一张图片再切出子 Surface
+"""
+
+import json
+import os
+import pygame
+
+from assets import AssetJob, decode_image
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMG_DIR = os.path.join(BASE_DIR, 'assets', 'images')
+ATLAS_DIR = os.path.join(BASE_DIR, 'assets', 'atlas')
+ATLAS_IMAGE = os.path.join(ATLAS_DIR, 'sprites.png')
+ATLAS_INDEX = os.path.join(ATLAS_DIR, 'sprites.json')
+ATLAS_VERSION = 1
+
+# 精灵名 -> (源文件（相对 IMG_DIR）, 缩放尺寸, 旋转角度)
+SPRITE_SPECS = {
+    'player': ('newair.png', (50, 40), None),
+    'enemy': ('player.png', (40, 30), 180),  # 敌机180度旋转
+    'bullet': ('bullet.png', (10, 20), 90),  # 子弹90度旋转
+    'shield': ('spr_shield.png', (60, 60), None),  # 护盾图片
+    'plane2': (os.path.join('Plane_by_phobi', 'l0_Plane2.png'), None, None),
+    'plane3': (os.path.join('Plane_by_phobi', 'l0_Plane3.png'), None, None),
+    'plane4': (os.path.join('Plane_by_phobi', 'l0_Plane4.png'), None, None),
+}
+
+
+def spec_record(name):
+    """索引中记录的精灵参数，用于判断图集是否与当前配置一致"""
+    source, scale, rotation = SPRITE_SPECS[name]
+    return {
+        'source': source.replace(os.sep, '/'),
+        'scale': list(scale) if scale else None,
+        'rotation': rotation,
+    }
+
+
+def source_stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_index(index_path=ATLAS_INDEX):
+    """读取图集索引，不存在或损坏时返回 None"""
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != ATLAS_VERSION:
+        return None
+    return index
+
+
+def atlas_is_current(index, img_dir=IMG_DIR):
+    """图集是否覆盖全部精灵、参数一致，且源文件自构建后未改动（按大小和修改时间快速判断）"""
+    if index is None or not os.path.exists(ATLAS_IMAGE):
+        return False
+    sprites = index.get('sprites', {})
+    for name in SPRITE_SPECS:
+        entry = sprites.get(name)
+        if entry is None or entry['spec'] != spec_record(name):
+            return False
+        try:
+            if entry['stat'] != source_stat(os.path.join(img_dir, SPRITE_SPECS[name][0])):
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def slice_atlas(sheet, index):
+    """按索引把图集切成 {精灵名: 子 Surface}（与图集共享像素）"""
+    return {name: sheet.subsurface(pygame.Rect(entry['rect']))
+            for name, entry in index['sprites'].items()}
+
+
+def decode_sprites(names=('player', 'enemy', 'bullet')):
+    """
+    不需要显示设备地解码精灵（已缩放/旋转，未 convert），
+    无头模式（回放、批量模拟）用它得到与窗口模式相同的碰撞掩码
+    """
+    return {name: decode_image(os.path.join(IMG_DIR, SPRITE_SPECS[name][0]), *SPRITE_SPECS[name][1:])
+            for name in names}
+
+
+def atlas_job(name='sprites', image_path=ATLAS_IMAGE, index=None):
+    """资源管理器任务：线程中解码图集，主线程 convert_alpha 后切片"""
+    index = index or load_index()
+    return AssetJob(name, lambda: pygame.image.load(image_path),
+                    lambda sheet: slice_atlas(sheet.convert_alpha(), index))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音效引擎
+音效解码后的 PCM 缓存在磁盘上（按源文件内容和混音器格式区分），之后启动直接读取原始样本；
+每个音效有同时发声数上限和冷却时间，通道用完时抢占优先级更低的声音；
+混音器缓冲区大小可配置（越小延迟越低）；没有音频设备或 --mute 时使用静音后端，
+只做计数不发声。每个音效统计播放与丢弃次数
+"""
+
+import hashlib
+import os
+import struct
+import pygame
+
+from assets import AssetJob
+
+# PCM 缓存文件头：魔数、版本、采样率、样本格式、声道数
+PCM_MAGIC = b'PCMC'
+PCM_VERSION = 1
+PCM_HEADER = struct.Struct('<4sIiii')
+
+DEFAULT_BUFFER = 512
+DEFAULT_CHANNELS = 16
+
+
+class SoundSpec:
+    """一个音效的播放规则"""
+
+    def __init__(self, name, path, max_voices=2, cooldown_ms=0, priority=0, volume=1.0):
+        """
+        :param max_voices: 同时发声数上限，达到上限时重新播放最早的那一个
+        :param cooldown_ms: 两次播放的最小间隔，间隔内的请求直接丢弃
+        :param priority: 通道用完时可以抢占优先级更低的声音
+        """
+        self.name = name
+        self.path = path
+        self.max_voices = max_voices
+        self.cooldown_ms = cooldown_ms
+        self.priority = priority
+        self.volume = volume
+
+
+def init_mixer(buffer=DEFAULT_BUFFER, frequency=44100, channels=2, num_channels=DEFAULT_CHANNELS):
+    """
+    按指定缓冲区大小（重新）初始化混音器
+    :return: 是否成功；失败（没有音频设备）时应使用静音后端
+    """
+    try:
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency=frequency, size=-16, channels=channels, buffer=buffer)
+    except pygame.error as e:
+        print(f"音频初始化失败，使用静音模式: {e}")
+        return False
+    pygame.mixer.set_num_channels(num_channels)
+    return True
+
+
+def pcm_cache_path(path, cache_dir, mixer_format):
+    """缓存文件路径：源文件内容哈希 + 混音器格式，任一变化都会重新解码"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(repr(mixer_format).encode())
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}-{digest.hexdigest()[:16]}.pcm")
+
+
+def load_pcm(path, cache_dir=None):
+    """
+    线程中执行：优先读取已解码的 PCM 缓存，没有时解码源文件并写入缓存
+    :return: pygame.mixer.Sound
+    """
+    mixer_format = pygame.mixer.get_init()
+    cache_path = pcm_cache_path(path, cache_dir, mixer_format) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        magic, version, *fmt = PCM_HEADER.unpack_from(data)
+        if magic == PCM_MAGIC and version == PCM_VERSION and tuple(fmt) == tuple(mixer_format):
+            return pygame.mixer.Sound(buffer=memoryview(data)[PCM_HEADER.size:])
+
+    sound = pygame.mixer.Sound(path)
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # 同一源文件的旧缓存直接删除
+            prefix = os.path.basename(cache_path).rsplit('-', 1)[0] + '-'
+            for old in os.listdir(cache_dir):
+                if old.startswith(prefix) and old.endswith('.pcm'):
+                    os.remove(os.path.join(cache_dir, old))
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(PCM_HEADER.pack(PCM_MAGIC, PCM_VERSION, *mixer_format))
+                f.write(sound.get_raw())
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"写入音效缓存失败: {e}")
+    return sound
+
+
+class AudioEngine:
+    """按音效规则分配混音通道；silent=True 时为静音后端，只计数"""
+
+    def __init__(self, specs, silent=False):
+        self.specs = {spec.name: spec for spec in specs}
+        self.silent = silent
+        self.sounds = {}
+        self.channels = [] if silent else [pygame.mixer.Channel(i) for i in range(pygame.mixer.get_num_channels())]
+        self.voices = {}  # 通道序号 -> (音效名, 优先级, 开始时间)
+        self.last_play = {}
+        self.counters = {name: {'plays': 0, 'cooldown': 0, 'voice_limit': 0, 'stolen': 0, 'dropped': 0}
+                         for name in self.specs}
+
+    def jobs(self, cache_dir=None):
+        """资源管理器任务：在线程中解码或读取 PCM 缓存"""
+        return [AssetJob('sound:' + spec.name, self._loader(spec, cache_dir), self._register(spec))
+                for spec in self.specs.values()]
+
+    def _loader(self, spec, cache_dir):
+        if self.silent:
+            return lambda: None
+        return lambda: load_pcm(spec.path, cache_dir)
+
+    def _register(self, spec):
+        def finalize(sound):
+            if sound is not None:
+                sound.set_volume(spec.volume)
+                self.sounds[spec.name] = sound
+            return sound
+        return finalize
+
+    def _busy(self, index):
+        return self.channels[index].get_busy()
+
+    def _pick_channel(self, spec, counters):
+        """
+        为新声音选择通道：达到发声上限时复用本音效最早的通道，否则用空闲通道，
+        没有空闲通道时抢占优先级更低的最早的声音；都不行时返回 None
+        """
+        playing = [(start, index) for index, (name, _, start) in self.voices.items()
+                   if name == spec.name and self._busy(index)]
+        if len(playing) >= spec.max_voices:
+            counters['voice_limit'] += 1
+            return min(playing)[1]
+        for index in range(len(self.channels)):
+            if not self._busy(index):
+                return index
+        victims = [(priority, start, index) for index, (name, priority, start) in self.voices.items()
+                   if priority < spec.priority]
+        if not victims:
+            return None
+        _, _, index = min(victims)
+        self.counters[self.voices[index][0]]['stolen'] += 1
+        return index
+
+    def play(self, name, now=None):
+        """
+        请求播放音效
+        :param now: 当前时间（毫秒），默认取 pygame.time.get_ticks()
+        :return: 是否真正播放（静音后端通过冷却检查即算播放）
+        """
+        spec = self.specs.get(name)
+        if spec is None:
+            return False
+        counters = self.counters[name]
+        if now is None:
+            now = pygame.time.get_ticks()
+        last = self.last_play.get(name)
+        if last is not None and now - last < spec.cooldown_ms:
+            counters['cooldown'] += 1
+            return False
+        if not self.silent:
+            sound = self.sounds.get(name)
+            index = self._pick_channel(spec, counters) if sound is not None else None
+            if index is None:
+                counters['dropped'] += 1
+                return False
+            self.channels[index].play(sound)
+            self.voices[index] = (name, spec.priority, now)
+        self.last_play[name] = now
+        counters['plays'] += 1
+        return True
+
+    def stats(self):
+        """每个音效的播放次数与丢弃次数（冷却、无通道），以及被抢占、达到上限重播的次数"""
+        return {name: {**c, 'drops': c['cooldown'] + c['dropped']} for name, c in self.counters.items()}
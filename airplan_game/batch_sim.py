@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量对局模拟（平衡性调参）
+用启发式机器人在进程池中无头地打大量对局，按参数网格扫描 GameState 的可调参数
+（每级击杀数、敌机速度/射击间隔、伤害、护盾分数等），逐局结果按固定顺序流式写入 CSV。
+每局只由参数和种子决定，结果与进程数无关；不同参数组合使用同一组种子，便于对比
+用法: python batch_sim.py --games 200 --param level_threshold_per_level=5,10,20 \
+          --param enemy_shoot_delay=1000:2000,2000:4000 --out results.csv
+"""
+
+import argparse
+import csv
+import inspect
+import itertools
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import atlas
+import engine
+import waves
+from engine import WIDTH, DEFAULT_SIZES, GameState, Inputs, step
+from replay import bullet_positions
+
+RESULT_FIELDS = ('score', 'ticks', 'kills', 'level', 'shields_earned', 'shields_used', 'health', 'timed_out')
+
+
+class HeuristicBot:
+    """
+    启发式玩家：躲避即将落到头上的敌机子弹和敌机，没有威胁时追向最低的敌机；
+    按固定间隔开火，威胁很近时使用护盾。只读取游戏状态，不使用随机数
+    """
+
+    def __init__(self, fire_every=6, danger_distance=120, shield_distance=40):
+        """
+        :param fire_every: 每几个逻辑帧按一次开火键（模拟人手速）
+        :param danger_distance: 玩家上方多远以内的子弹/敌机视为威胁（像素）
+        :param shield_distance: 威胁多近时使用护盾（像素）
+        """
+        self.fire_every = fire_every
+        self.danger_distance = danger_distance
+        self.shield_distance = shield_distance
+        self.bullet_w, self.bullet_h = DEFAULT_SIZES['bullet']
+
+    def threats(self, state):
+        """返回 [(威胁中心 x, 与玩家顶部的距离)]"""
+        player = state.player.rect
+        margin = player.width // 2 + 6
+        top = player.top - self.danger_distance
+        found = []
+        for x, y in bullet_positions(state.enemy_bullets):
+            cx = x + self.bullet_w // 2
+            if (top < y + self.bullet_h and y < player.bottom
+                    and abs(cx - player.centerx) < margin + self.bullet_w // 2):
+                found.append((cx, player.top - (y + self.bullet_h)))
+        for enemy in state.enemies:
+            rect = enemy.rect
+            if (top < rect.bottom and rect.top < player.bottom
+                    and abs(rect.centerx - player.centerx) < margin + rect.width // 2):
+                found.append((rect.centerx, player.top - rect.bottom))
+        return found
+
+    def __call__(self, state):
+        player = state.player
+        px = player.rect.centerx
+        fire = state.tick % self.fire_every == 0
+        threats = self.threats(state)
+        if threats:
+            # 往威胁重心的反方向躲，贴墙时换方向
+            mean_x = sum(x for x, _ in threats) / len(threats)
+            go_left = mean_x > px
+            if go_left and player.rect.left <= 0:
+                go_left = False
+            elif not go_left and player.rect.right >= WIDTH:
+                go_left = True
+            shield = (player.shield_count > 0 and not player.shield_active
+                      and min(d for _, d in threats) < self.shield_distance)
+            return Inputs(left=go_left, right=not go_left, fire=fire, shield=shield)
+
+        # 没有威胁：对准屏幕内最低的敌机
+        visible = [e for e in state.enemies if e.rect.bottom > 0]
+        if not visible:
+            return Inputs(fire=fire)
+        target = max(visible, key=lambda e: e.rect.bottom).rect.centerx
+        dx = target - px
+        return Inputs(left=dx < -player.speed, right=dx > player.speed, fire=fire)
+
+
+def play_game(params, seed, max_ticks=36000, array_projectiles=False, bot=None, wave_table=None):
+    """
+    无头打一局
+    :param params: GameState 的参数
+    :param max_ticks: 最长逻辑帧数（默认 10 分钟），到达后记为超时
+    :param wave_table: 刷怪表（waves.WaveTable），None 为经典刷怪
+    :return: 结果字典（见 RESULT_FIELDS）
+    """
+    bot = bot or HeuristicBot()
+    state = GameState(seed=seed, array_projectiles=array_projectiles, waves=wave_table, **params)
+    player = state.player
+    shields_earned = shields_used = 0
+    while state.running and state.tick < max_ticks:
+        inputs = bot(state)
+        shield_count = player.shield_count
+        step(state, inputs)
+        if player.shield_count < shield_count:
+            shields_used += 1
+        elif player.shield_count > shield_count:
+            shields_earned += 1
+    return {
+        'score': state.score,
+        'ticks': state.tick,
+        'kills': state.kill_count,
+        'level': state.player_level,
+        'shields_earned': shields_earned,
+        'shields_used': shields_used,
+        'health': max(0, player.health),
+        'timed_out': state.running,
+    }
+
+
+def load_sprite_shapes():
+    """注入真实精灵图片，像素级碰撞（pixel_collisions=1）才有意义；也用作进程池的初始化函数"""
+    engine.set_images(**atlas.decode_sprites())
+
+
+def _play_task(task):
+    combo_index, game_index, params, seed, max_ticks, array_projectiles, wave_table = task
+    return combo_index, game_index, seed, play_game(params, seed, max_ticks, array_projectiles,
+                                                    wave_table=wave_table)
+
+
+def parse_value(text):
+    """'10' -> 10, '0.5' -> 0.5, '1000:2000' -> (1000, 2000)"""
+    if ':' in text:
+        return tuple(parse_value(part) for part in text.split(':'))
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_grid(specs):
+    """
+    ['name=v1,v2', ...] -> {name: [v1, v2]}，参数名必须是 GameState 的数值关键字参数
+    （刷怪表用 --waves 指定；机器人只操作一名玩家，不扫描 players）
+    """
+    allowed = set(inspect.signature(GameState).parameters) - {'seed', 'array_projectiles', 'waves', 'players'}
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in allowed:
+            raise ValueError(f"未知参数: {name}（可用: {', '.join(sorted(allowed))}）")
+        grid[name] = [parse_value(v) for v in values.split(',') if v]
+    return grid
+
+
+def combinations(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def format_value(value):
+    return ':'.join(map(str, value)) if isinstance(value, tuple) else value
+
+
+def run_batch(grid, games, out_path, base_seed=0, workers=None, max_ticks=36000, array_projectiles=False,
+              wave_table=None):
+    """
+    扫描参数网格，每个组合打 games 局（种子 base_seed .. base_seed+games-1），
+    结果按 (组合, 局) 顺序流式写入 CSV
+    :param wave_table: 所有对局共用的刷怪表，None 为经典刷怪
+    :return: 每个组合的平均值汇总
+    """
+    combos = combinations(grid)
+    tasks = [(c, g, combo, base_seed + g, max_ticks, array_projectiles, wave_table)
+             for c, combo in enumerate(combos) for g in range(games)]
+    workers = workers or os.cpu_count() or 1
+    totals = [dict.fromkeys(RESULT_FIELDS, 0) for _ in combos]
+
+    start = time.perf_counter()
+    load_sprite_shapes()
+    with open(out_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['combo', 'game', 'seed', *grid, *RESULT_FIELDS])
+        if workers == 1:
+            results = map(_play_task, tasks)
+            pool = None
+        else:
+            import multiprocessing
+            pool = multiprocessing.Pool(workers, initializer=load_sprite_shapes)
+            # imap 按提交顺序返回，输出与进程数无关
+            results = pool.imap(_play_task, tasks, chunksize=max(1, len(tasks) // (workers * 16)))
+        try:
+            for done, (c, g, seed, result) in enumerate(results, 1):
+                writer.writerow([c, g, seed, *(format_value(combos[c][n]) for n in grid),
+                                 *(int(result[k]) if k == 'timed_out' else result[k] for k in RESULT_FIELDS)])
+                for key in RESULT_FIELDS:
+                    totals[c][key] += result[key]
+                if done % 100 == 0:
+                    f.flush()
+                    print(f"\r{done}/{len(tasks)} 局", end='', file=sys.stderr)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+    elapsed = time.perf_counter() - start
+    print(f"\r{len(tasks)} 局, 用时 {elapsed:.1f}s, {workers} 个进程 -> {out_path}", file=sys.stderr)
+    return [{**combo, **{k: round(v / games, 2) for k, v in total.items()}}
+            for combo, total in zip(combos, totals)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量对局模拟与参数扫描")
+    parser.add_argument('--games', type=int, default=100, help="每个参数组合的对局数")
+    parser.add_argument('--param', action='append', default=[], metavar='名字=值1,值2',
+                        help="扫描的参数，可重复；区间写作 最小:最大，例如 enemy_speed=1:3,2:4")
+    parser.add_argument('--seed', type=int, default=0, help="起始种子")
+    parser.add_argument('--workers', type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument('--max-ticks', type=int, default=36000, help="单局最长逻辑帧数")
+    parser.add_argument('--array', action='store_true', help="子弹使用 NumPy 数组池")
+    parser.add_argument('--waves', nargs='?', const=waves.DEFAULT_WAVES, metavar='FILE',
+                        help="按波次文件刷怪（不带文件名时使用 assets/waves.json，默认经典刷怪）")
+    parser.add_argument('--out', default='batch_results.csv', help="逐局结果 CSV")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.param)
+        wave_table = waves.load_waves(args.waves) if args.waves else None
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    summary = run_batch(grid, args.games, args.out, args.seed, args.workers, args.max_ticks, args.array,
+                        wave_table)
+    for row in summary:
+        print(', '.join(f"{k}={format_value(v)}" for k, v in row.items()))
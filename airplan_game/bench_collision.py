@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+碰撞检测基准
+在不同实体数量下对比 pygame.sprite.groupcollide 与空间哈希宽相的耗时，
+以及像素级检测（pygame.sprite.collide_mask 逐对检测 vs 矩形筛选后再检测缓存掩码），
+并校验对应实现的命中结果一致
+用法: python bench_collision.py [重复次数]
+"""
+
+import random
+import sys
+import time
+import pygame
+import atlas
+import collision
+import engine
+from engine import WIDTH, HEIGHT, Enemy, Bullet
+
+CASES = [(6, 10), (12, 50), (50, 200), (100, 1000), (300, 3000), (500, 5000)]
+# pygame 逐对掩码检测太慢，精灵对数超过该值时不测
+PYGAME_MASK_MAX_PAIRS = 100 * 1000
+
+
+def make_groups(enemy_count, bullet_count, seed):
+    """按种子生成一组随机分布的敌机和子弹"""
+    rng = random.Random(seed)
+    enemies = pygame.sprite.Group()
+    bullets = pygame.sprite.Group()
+    for _ in range(enemy_count):
+        e = Enemy(rng)
+        e.rect.y = rng.randint(0, HEIGHT - e.rect.height)
+        enemies.add(e)
+    for _ in range(bullet_count):
+        bullets.add(Bullet(rng.randint(0, WIDTH), rng.randint(0, HEIGHT)))
+    return enemies, bullets
+
+
+def index_hits(hits, enemies, bullets):
+    """把命中结果转成下标，便于比较两种实现"""
+    e_index = {s: i for i, s in enumerate(enemies)}
+    b_index = {s: i for i, s in enumerate(bullets)}
+    return [(e_index[e], [b_index[b] for b in bs]) for e, bs in hits.items()]
+
+
+def run_case(enemy_count, bullet_count, repeat):
+    grid = collision.SpatialHash()
+    collide = {
+        'pygame': lambda e, b: pygame.sprite.groupcollide(e, b, True, True),
+        'spatial_hash': lambda e, b: collision.groupcollide(e, b, True, True, grid, min_pairs=0),
+        'pygame_mask': lambda e, b: pygame.sprite.groupcollide(e, b, True, True, pygame.sprite.collide_mask),
+        'mask': lambda e, b: collision.groupcollide(e, b, True, True, grid, collided=collision.collide_mask),
+    }
+    if enemy_count * bullet_count > PYGAME_MASK_MAX_PAIRS:
+        del collide['pygame_mask']
+    timings = dict.fromkeys(collide, 0.0)
+    for r in range(repeat):
+        results = {}
+        for name, func in collide.items():
+            enemies, bullets = make_groups(enemy_count, bullet_count, seed=r)
+            e_list, b_list = enemies.sprites(), bullets.sprites()
+            start = time.perf_counter()
+            hits = func(enemies, bullets)
+            timings[name] += time.perf_counter() - start
+            results[name] = index_hits(hits, e_list, b_list)
+        if results['pygame'] != results['spatial_hash']:
+            raise AssertionError(f"命中结果不一致: 敌机 {enemy_count}, 子弹 {bullet_count}, 种子 {r}")
+        if 'pygame_mask' in results and results['pygame_mask'] != results['mask']:
+            raise AssertionError(f"像素级命中结果不一致: 敌机 {enemy_count}, 子弹 {bullet_count}, 种子 {r}")
+    return {name: t / repeat * 1000 for name, t in timings.items()}
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    engine.set_images(**atlas.decode_sprites())  # 真实图片的掩码（透明边距）
+    print(f"{'敌机':>6} {'子弹':>6} {'pygame(ms)':>12} {'空间哈希(ms)':>14} {'加速比':>8}"
+          f" {'pygame掩码(ms)':>16} {'矩形+掩码(ms)':>15} {'掩码开销':>10}")
+    for enemy_count, bullet_count in CASES:
+        t = run_case(enemy_count, bullet_count, repeat)
+        speedup = t['pygame'] / t['spatial_hash'] if t['spatial_hash'] else float('inf')
+        pygame_mask = f"{t['pygame_mask']:>16.3f}" if 'pygame_mask' in t else f"{'-':>16}"
+        overhead = t['mask'] / t['spatial_hash'] if t['spatial_hash'] else float('inf')
+        print(f"{enemy_count:>6} {bullet_count:>6} {t['pygame']:>12.3f} {t['spatial_hash']:>14.3f} {speedup:>8.1f}x"
+              f" {pygame_mask} {t['mask']:>15.3f} {overhead:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
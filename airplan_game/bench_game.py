@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游戏循环压力基准
+在 SDL dummy 视频/音频驱动下运行预设场景（10/100/1000 架敌机、满级持续开火、敌机弹幕、
+动态背景开/关、波次刷怪），放开正常游戏中的敌机数量和等级上限，输出每秒逻辑帧数、
+帧时间百分位和内存峰值（JSON），便于对比改动前后的性能；render_* 场景对比各渲染后端的帧时间
+每个场景默认在独立子进程中运行，内存峰值互不影响
+用法: python bench_game.py [场景名 ...] [--ticks N] [--array] [--out 结果.json] [--compare 旧结果.json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # stdout 只输出 JSON
+import pygame
+
+import engine
+from engine import GameState, Inputs, step
+from game_loop import FrameStats
+from waves import load_waves
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计内存峰值
+    resource = None
+
+# 场景参数：
+#   enemies 开局敌机数量，max_enemies 敌机上限（None 表示与开局数量相同），level 开局等级，
+#   fire_every 每几个逻辑帧开火一次，shoot_delay 敌机射击间隔范围（毫秒），
+#   render 是否绘制（需要加载 main.py 的资源），background 绘制时是否绘制 GIF 背景，
+#   renderer 绘制使用的渲染后端（见 render_backend.RENDERERS）
+SCENARIOS = {
+    'enemies_10': {'enemies': 10},
+    'enemies_100': {'enemies': 100},
+    'enemies_1000': {'enemies': 1000},
+    'level5_fire': {'enemies': 12, 'level': 5, 'fire_every': 1},
+    'bullet_storm': {'enemies': 100, 'shoot_delay': (100, 300)},
+    'background_on': {'enemies': 12, 'render': True, 'background': True},
+    'background_off': {'enemies': 12, 'render': True, 'background': False},
+    'render_surface': {'enemies': 100, 'render': True, 'renderer': 'surface'},
+    'render_texture': {'enemies': 100, 'render': True, 'renderer': 'texture'},
+    'render_software': {'enemies': 100, 'render': True, 'renderer': 'software'},
+    'waves': {'waves': True},
+}
+DEFAULTS = {'enemies': 6, 'max_enemies': None, 'level': 1, 'max_level': 5, 'fire_every': 6,
+            'shoot_delay': (2000, 4000), 'render': False, 'background': True, 'renderer': 'surface',
+            'waves': False}
+
+
+def peak_rss_mb():
+    """本进程的内存峰值（MB），无法统计时返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def make_state(params, seed, array_projectiles):
+    state = GameState(seed=seed, array_projectiles=array_projectiles,
+                      base_enemy_count=params['enemies'],
+                      max_enemies=params['max_enemies'] or params['enemies'],
+                      max_level=params['max_level'], enemy_shoot_delay=tuple(params['shoot_delay']),
+                      waves=load_waves() if params['waves'] else None)
+    state.player_level = min(params['level'], params['max_level'])
+    state.player.health = 10 ** 9  # 基准中玩家不死，负载保持稳定
+    return state
+
+
+def make_renderer(params):
+    """返回每帧绘制函数；加载 main.py 的资源（dummy 驱动下创建窗口）"""
+    with contextlib.redirect_stdout(sys.stderr):  # 加载明细不混入 JSON 输出
+        import main
+        main.load_assets(main.parse_args(['--mute', '--renderer', params['renderer']]))
+    backend = main.backend
+
+    def render(state):
+        if params['background']:
+            main.gif_bg.update()
+            backend.draw_background(main.gif_bg)
+        else:
+            backend.clear(main.BLACK)
+        main.draw_game(backend.canvas, state)
+        backend.present()
+    return render
+
+
+def run_scenario(name, params, ticks=1800, warmup=60, seed=0, array_projectiles=False):
+    """
+    运行一个场景
+    :param params: 场景参数（未给出的取 DEFAULTS）
+    :param warmup: 不计入统计的预热帧数
+    :return: 结果字典
+    """
+    params = {**DEFAULTS, **params}
+    render = make_renderer(params) if params['render'] else None
+    state = make_state(params, seed, array_projectiles)
+    input_rng = random.Random(seed + 1)
+    stats = FrameStats(engine.TICK_MS, window=ticks)
+    peaks = {'enemies': 0, 'bullets': 0, 'enemy_bullets': 0}
+    perf_counter = time.perf_counter
+
+    elapsed = 0.0
+    for tick in range(warmup + ticks):
+        # 每 30 帧随机换一次方向，模拟玩家左右移动
+        if tick % 30 == 0:
+            direction = input_rng.random()
+        inputs = Inputs(left=direction < 0.4, right=direction > 0.6, fire=tick % params['fire_every'] == 0)
+        start = perf_counter()
+        step(state, inputs)
+        if render:
+            render(state)
+        frame_s = perf_counter() - start
+        if tick >= warmup:
+            elapsed += frame_s
+            stats.record(frame_s * 1000)
+        for key in peaks:
+            peaks[key] = max(peaks[key], len(getattr(state, key)))
+
+    summary = stats.summary()
+    return {
+        'scenario': name,
+        'params': params,
+        'ticks': ticks,
+        'seconds': round(elapsed, 3),
+        'ticks_per_sec': round(ticks / elapsed, 1) if elapsed else 0.0,
+        'frame_mean_ms': summary['mean_ms'],
+        'frame_p50_ms': round(stats.percentile(50), 3),
+        'frame_p95_ms': summary['p95_ms'],
+        'frame_p99_ms': summary['p99_ms'],
+        'frame_max_ms': round(max(stats.frame_times), 3) if stats.frame_times else 0.0,
+        'over_budget_frames': summary['dropped_frames'],  # 超过 1.5 个逻辑帧时长的帧
+        'peak_entities': peaks,
+        'score': state.score,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _run_isolated(args):
+    return run_scenario(*args)
+
+
+def run_all(names, overrides, ticks, array_projectiles, isolate=True):
+    jobs = [(name, {**SCENARIOS[name], **overrides}, ticks, 60, 0, array_projectiles) for name in names]
+    if not isolate:
+        return [run_scenario(*job) for job in jobs]
+    import multiprocessing
+    # 每个场景一个新进程（spawn），内存峰值只反映该场景
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        return pool.map(_run_isolated, jobs, chunksize=1)
+
+
+def environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': numpy_version,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline_path):
+    """与旧结果逐场景比较每秒帧数和 p99 帧时间"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['scenario']: r for r in json.load(f)['results']}
+    print(f"{'场景':<16}{'帧/秒 旧':>12}{'帧/秒 新':>12}{'变化':>9}{'p99 旧':>10}{'p99 新':>10}", file=sys.stderr)
+    for r in results:
+        old = baseline.get(r['scenario'])
+        if old is None:
+            continue
+        change = r['ticks_per_sec'] / old['ticks_per_sec'] - 1 if old['ticks_per_sec'] else 0.0
+        print(f"{r['scenario']:<16}{old['ticks_per_sec']:>12.0f}{r['ticks_per_sec']:>12.0f}{change:>+9.1%}"
+              f"{old['frame_p99_ms']:>10.3f}{r['frame_p99_ms']:>10.3f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="游戏循环压力基准")
+    parser.add_argument('scenarios', nargs='*', metavar='场景', help=f"默认全部: {', '.join(SCENARIOS)}")
+    parser.add_argument('--ticks', type=int, default=1800, help="每个场景统计的逻辑帧数")
+    parser.add_argument('--array', action='store_true', help="子弹使用 NumPy 数组池")
+    parser.add_argument('--enemies', type=int, help="覆盖各场景的敌机数量")
+    parser.add_argument('--max-enemies', type=int, help="覆盖敌机上限")
+    parser.add_argument('--max-level', type=int, help="覆盖等级上限")
+    parser.add_argument('--fire-every', type=int, help="覆盖开火间隔（逻辑帧）")
+    parser.add_argument('--renderer', choices=('surface', 'texture', 'software'),
+                        help="覆盖绘制场景的渲染后端")
+    parser.add_argument('--no-isolate', action='store_true', help="所有场景在当前进程中运行")
+    parser.add_argument('--out', help="结果另存为 JSON 文件")
+    parser.add_argument('--compare', metavar='旧结果.json', help="与之前保存的结果比较")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+    overrides = {key: value for key, value in (('enemies', args.enemies), ('max_enemies', args.max_enemies),
+                                                ('max_level', args.max_level),
+                                                ('fire_every', args.fire_every),
+                                                ('renderer', args.renderer)) if value is not None}
+    results = run_all(args.scenarios or list(SCENARIOS), overrides, args.ticks, args.array,
+                      isolate=not args.no_isolate)
+    report = {'environment': environment(), 'array_projectiles': args.array, 'results': results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    if args.compare:
+        compare(results, args.compare)
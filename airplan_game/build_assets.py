@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线资源构建工具（取代 svg_to_png.py 和 convert_gif_to_bg.py）
+按清单 assets/manifest.json 把 SVG/GIF/PNG 源文件转换为目标图片，每个目标可以输出多种分辨率，
+各输出在工作进程中并行处理。索引记录源文件内容哈希、处理参数和产物哈希，都没变的输出直接跳过。
+不在运行时安装任何包，也不访问网络：SVG 依次尝试已安装的 cairosvg、inkscape、rsvg-convert，
+都不可用时按清单的 fallback 生成替代图片
+用法: python build_assets.py [目标 ...] [--force] [--workers N] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+MANIFEST = os.path.join(ASSETS_DIR, 'manifest.json')
+INDEX_PATH = os.path.join(BASE_DIR, 'cache', 'asset_index.json')
+BUILD_VERSION = 1  # 处理方式变化时加 1，所有输出重新生成
+
+
+def file_sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# ---------- 转换（在工作进程中执行） ----------
+
+def starfield(width, height, seed=42):
+    """替代背景：纵向渐变 + 星星 + 半透明星云；渐变整块用 NumPy 生成"""
+    ratio = np.arange(height, dtype=np.float32)[:, None] / height
+    rows = (np.array([26, 26, 46], np.float32) * (1 - ratio * np.array([0.5, 0.5, 0.3], np.float32)))
+    pixels = np.broadcast_to(rows.astype(np.uint8)[:, None, :], (height, width, 3))
+    img = Image.fromarray(np.ascontiguousarray(pixels), 'RGB')
+
+    rng = random.Random(seed)
+    draw = ImageDraw.Draw(img)
+    # 星星数量按面积缩放，不同分辨率下密度一致
+    for _ in range(max(1, round(100 * width * height / (480 * 720)))):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        brightness = rng.randint(100, 255)
+        size = rng.randint(1, 3)
+        draw.ellipse([x - size, y - size, x + size, y + size], fill=(brightness,) * 3)
+
+    nebula = Image.new('RGBA', img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(nebula)
+    scale = width / 480
+    colors = [(106, 90, 205), (255, 105, 180), (0, 191, 255), (255, 215, 0)]
+    for _ in range(5):
+        x = rng.randint(int(50 * scale), width - int(50 * scale))
+        y = rng.randint(int(50 * scale), height - int(50 * scale))
+        size = int(rng.randint(30, 80) * scale)
+        draw.ellipse([x - size, y - size, x + size, y + size // 2], fill=rng.choice(colors) + (50,))
+    return Image.alpha_composite(img.convert('RGBA'), nebula).convert('RGB')
+
+
+FALLBACKS = {'starfield': starfield}
+
+
+def detect_svg_renderer():
+    """已安装的 SVG 渲染器：cairosvg、inkscape、rsvg-convert，都没有时返回 None"""
+    try:
+        import cairosvg  # noqa: F401  可选依赖，缺少系统 cairo 库时导入会抛 OSError
+        return 'cairosvg'
+    except (ImportError, OSError):
+        pass
+    for tool in ('inkscape', 'rsvg-convert'):
+        if shutil.which(tool):
+            return tool
+    return None
+
+
+def render_svg(path, size, renderer):
+    width, height = size
+    if renderer == 'cairosvg':
+        import cairosvg
+        data = cairosvg.svg2png(url=path, output_width=width, output_height=height)
+        return Image.open(io.BytesIO(data)).convert('RGB')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out = os.path.join(tmp_dir, 'out.png')
+        if renderer == 'inkscape':
+            cmd = ['inkscape', '--export-type=png', f'--export-filename={out}',
+                   f'--export-width={width}', f'--export-height={height}', path]
+        else:
+            cmd = ['rsvg-convert', '-w', str(width), '-h', str(height), '-o', out, path]
+        subprocess.run(cmd, check=True, capture_output=True, timeout=120)
+        with Image.open(out) as img:
+            return img.convert('RGB')
+
+
+def load_raster(path, frame=0):
+    """读取 PNG/GIF（GIF 取第 frame 帧），透明部分合成到黑色背景上"""
+    with Image.open(path) as img:
+        if getattr(img, 'n_frames', 1) > 1:
+            img.seek(frame)
+        rgba = img.convert('RGBA')
+    background = Image.new('RGBA', rgba.size, (0, 0, 0, 255))
+    return Image.alpha_composite(background, rgba).convert('RGB')
+
+
+def fit_image(img, size, fit):
+    """
+    调整到目标尺寸
+    :param fit: 'cover' 等比缩放到覆盖目标区域后居中裁剪；'stretch' 直接拉伸
+    """
+    width, height = size
+    if img.size == (width, height):
+        return img
+    if fit == 'stretch':
+        return img.resize((width, height), Image.Resampling.LANCZOS)
+    scale = max(width / img.width, height / img.height)
+    resized = img.resize((round(img.width * scale), round(img.height * scale)), Image.Resampling.LANCZOS)
+    left = (resized.width - width) // 2
+    top = (resized.height - height) // 2
+    return resized.crop((left, top, left + width, top + height))
+
+
+def same_pixels(path, img):
+    """
+    已有的输出文件解码后是否与 img 像素完全相同；
+    索引在 cache/ 中不随仓库提交，新克隆首次构建时靠它避免改写已提交的产物（PNG 编码结果不保证逐字节一致）
+    """
+    try:
+        with Image.open(path) as existing:
+            return existing.size == img.size and existing.convert(img.mode).tobytes() == img.tobytes()
+    except OSError:
+        return False
+
+
+def build_output(task):
+    """
+    生成一个输出文件（先写临时文件再替换）
+    :return: (输出相对路径, 实际使用的渲染方式, 产物哈希, 毫秒)
+    """
+    start = time.perf_counter()
+    recipe = task['recipe']
+    source = os.path.join(ASSETS_DIR, task['source'])
+    renderer = recipe['renderer']
+    size = recipe['size']
+    if renderer in FALLBACKS:
+        img = FALLBACKS[renderer](*size)
+    elif source.lower().endswith('.svg'):
+        try:
+            img = render_svg(source, size, renderer)
+        except (OSError, subprocess.SubprocessError) as e:
+            if not recipe['fallback']:
+                raise
+            print(f"{task['output']}: {renderer} 转换失败（{e}），使用 {recipe['fallback']}", file=sys.stderr)
+            renderer = recipe['fallback']
+            img = FALLBACKS[renderer](*size)
+    else:
+        img = fit_image(load_raster(source, recipe['frame']), size, recipe['fit'])
+
+    out_path = os.path.join(ASSETS_DIR, task['output'])
+    if not same_pixels(out_path, img):
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        tmp_path = out_path + '.tmp'
+        img.save(tmp_path, 'PNG')
+        os.replace(tmp_path, out_path)
+    return task['output'], renderer, file_sha1(out_path), (time.perf_counter() - start) * 1000
+
+
+# ---------- 清单与索引 ----------
+
+def load_manifest(path=MANIFEST):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def expand_tasks(manifest, names=None, svg_renderer=None):
+    """把清单展开为逐个输出文件的任务；recipe 是决定输出内容的全部参数"""
+    targets = manifest['targets']
+    unknown = [n for n in names or () if n not in targets]
+    if unknown:
+        raise ValueError(f"清单中没有目标: {', '.join(unknown)}")
+    tasks = []
+    source_hashes = {}
+    for name in names or targets:
+        target = targets[name]
+        source = target['source']
+        if source not in source_hashes:
+            source_hashes[source] = file_sha1(os.path.join(ASSETS_DIR, source))
+        fallback = target.get('fallback')
+        if fallback and fallback not in FALLBACKS:
+            raise ValueError(f"{name}: 未知的替代方式 {fallback}")
+        if source.lower().endswith('.svg'):
+            renderer = svg_renderer or fallback
+            if renderer is None:
+                raise ValueError(f"{name}: 没有可用的 SVG 渲染器（cairosvg/inkscape/rsvg-convert），也没有 fallback")
+        else:
+            renderer = 'pillow'
+        for suffix, size in target['sizes'].items():
+            tasks.append({
+                'target': name,
+                'source': source,
+                'output': target['output'].format(suffix=suffix),
+                'source_sha1': source_hashes[source],
+                'recipe': {'version': BUILD_VERSION, 'size': list(size), 'fit': target.get('fit', 'cover'),
+                           'frame': target.get('frame', 0), 'fallback': fallback, 'renderer': renderer},
+            })
+    return tasks
+
+
+def load_index(path=INDEX_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index.get('outputs', {}) if index.get('version') == BUILD_VERSION else {}
+
+
+def write_index(outputs, path=INDEX_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': BUILD_VERSION, 'outputs': outputs}, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_current(task, entry):
+    """源文件内容、处理参数和输出文件本身都与上次构建一致"""
+    if not entry or entry['source_sha1'] != task['source_sha1'] or entry['recipe'] != task['recipe']:
+        return False
+    out_path = os.path.join(ASSETS_DIR, task['output'])
+    return os.path.exists(out_path) and file_sha1(out_path) == entry['output_sha1']
+
+
+def build(names=None, force=False, workers=None, dry_run=False, manifest_path=MANIFEST):
+    """
+    构建清单中的目标（默认全部）
+    :return: 失败的输出数
+    """
+    svg_renderer = detect_svg_renderer()
+    tasks = expand_tasks(load_manifest(manifest_path), names, svg_renderer)
+    outputs = load_index()
+    stale = [t for t in tasks if force or not is_current(t, outputs.get(t['output']))]
+    print(f"SVG 渲染器: {svg_renderer or '无（使用 fallback）'}")
+    if not force:
+        # 没有 SVG 渲染器时不用替代图片覆盖已有的输出（可能是在别的机器上正常渲染的）
+        kept = [t for t in stale if t['recipe']['renderer'] in FALLBACKS
+                and os.path.exists(os.path.join(ASSETS_DIR, t['output']))]
+        for task in kept:
+            print(f"保留现有输出 {task['output']}（--force 可用 {task['recipe']['renderer']} 重新生成）")
+        stale = [t for t in stale if t not in kept]
+    print(f"{len(tasks)} 个输出, {len(stale)} 个需要生成")
+    if dry_run or not stale:
+        for task in stale:
+            print(f"  {task['output']}")
+        return 0
+
+    start = time.perf_counter()
+    failed = 0
+    workers = workers or min(len(stale), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_output, task): task for task in stale}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                output, renderer, output_sha1, ms = future.result()
+            except Exception as e:
+                failed += 1
+                outputs.pop(task['output'], None)
+                print(f"  失败 {task['output']}: {e}")
+                continue
+            # 记录实际使用的渲染方式：渲染器出错改用 fallback 时，下次会重试渲染器
+            outputs[output] = {'source': task['source'], 'source_sha1': task['source_sha1'],
+                               'recipe': {**task['recipe'], 'renderer': renderer}, 'output_sha1': output_sha1}
+            print(f"  {output} {task['recipe']['size'][0]}x{task['recipe']['size'][1]} ({renderer}, {ms:.0f}ms)")
+    write_index(outputs)
+    print(f"完成: {len(stale) - failed} 个输出, 用时 {(time.perf_counter() - start) * 1000:.0f}ms, {workers} 个进程")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按清单离线构建资源")
+    parser.add_argument('targets', nargs='*', metavar='目标', help="只构建这些目标（默认全部）")
+    parser.add_argument('--manifest', default=MANIFEST, help="资源清单")
+    parser.add_argument('--force', action='store_true', help="忽略索引，全部重新生成")
+    parser.add_argument('--workers', type=int, default=None, help="进程数（默认 CPU 核数）")
+    parser.add_argument('--dry-run', action='store_true', help="只列出需要生成的输出")
+    args = parser.parse_args()
+
+    try:
+        failures = build(args.targets, args.force, args.workers, args.dry_run, args.manifest)
+    except ValueError as e:
+        parser.error(str(e))
+    sys.exit(1 if failures else 0)
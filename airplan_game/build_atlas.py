@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精灵图集构建工具
+按 atlas.SPRITE_SPECS 加载源图片，一次性完成缩放/旋转，打包为一张图集和 JSON 索引；
+源文件内容哈希与参数都没变的精灵直接从旧图集中复用，不重新处理
+用法: python build_atlas.py [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+from PIL import Image
+
+import atlas
+
+PADDING = 2  # 精灵之间的间隔，避免相邻像素串色
+SHEET_WIDTH = 256
+
+
+def file_sha1(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def process_sprite(name):
+    """与运行时 load_image 完全相同的处理：convert_alpha -> 缩放 -> 旋转，返回 RGBA Image"""
+    source, scale, rotation = atlas.SPRITE_SPECS[name]
+    img = pygame.image.load(os.path.join(atlas.IMG_DIR, source)).convert_alpha()
+    if scale:
+        img = pygame.transform.scale(img, scale)
+    if rotation:
+        img = pygame.transform.rotate(img, rotation)
+    return Image.frombytes('RGBA', img.get_size(), pygame.image.tostring(img, 'RGBA'))
+
+
+def pack(sizes, sheet_width=SHEET_WIDTH):
+    """
+    货架式装箱：按高度降序逐行摆放
+    :param sizes: {名字: (w, h)}
+    :return: ({名字: (x, y)}, (图集宽, 图集高))
+    """
+    width = max([sheet_width] + [w + PADDING for w, _ in sizes.values()])
+    positions = {}
+    x = y = shelf_h = 0
+    for name in sorted(sizes, key=lambda n: (-sizes[n][1], n)):
+        w, h = sizes[name]
+        if x + w > width:
+            x = 0
+            y += shelf_h + PADDING
+            shelf_h = 0
+        positions[name] = (x, y)
+        x += w + PADDING
+        shelf_h = max(shelf_h, h)
+    return positions, (width, y + shelf_h)
+
+
+def build(force=False):
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))  # convert_alpha 需要显示设备（dummy 驱动即可）
+
+    old_index = None if force else atlas.load_index()
+    old_sprites = old_index['sprites'] if old_index else {}
+    old_sheet = None
+    if old_sprites and os.path.exists(atlas.ATLAS_IMAGE):
+        old_sheet = Image.open(atlas.ATLAS_IMAGE).convert('RGBA')
+
+    images = {}
+    entries = {}
+    rebuilt = []
+    for name, (source, _, _) in atlas.SPRITE_SPECS.items():
+        path = os.path.join(atlas.IMG_DIR, source)
+        entry = {'spec': atlas.spec_record(name), 'sha1': file_sha1(path), 'stat': atlas.source_stat(path)}
+        old = old_sprites.get(name)
+        if (old_sheet is not None and old is not None
+                and old['sha1'] == entry['sha1'] and old['spec'] == entry['spec']):
+            x, y, w, h = old['rect']
+            images[name] = old_sheet.crop((x, y, x + w, y + h))
+        else:
+            images[name] = process_sprite(name)
+            rebuilt.append(name)
+        entries[name] = entry
+
+    if not rebuilt and old_index and set(old_sprites) == set(entries):
+        if any(old_sprites[n]['stat'] != entries[n]['stat'] for n in entries):
+            # 只有修改时间变化（内容没变）：只更新索引
+            for name, entry in entries.items():
+                old_sprites[name]['stat'] = entry['stat']
+            write_index(old_index)
+        print(f"图集已是最新: {atlas.ATLAS_IMAGE}")
+        return False
+
+    positions, sheet_size = pack({name: img.size for name, img in images.items()})
+    sheet = Image.new('RGBA', sheet_size, (0, 0, 0, 0))
+    for name, img in images.items():
+        sheet.paste(img, positions[name])  # 不带 mask，逐像素原样拷贝
+        entries[name]['rect'] = [*positions[name], *img.size]
+
+    os.makedirs(atlas.ATLAS_DIR, exist_ok=True)
+    sheet.save(atlas.ATLAS_IMAGE, 'PNG', optimize=True)
+    write_index({'version': atlas.ATLAS_VERSION, 'size': list(sheet_size), 'sprites': entries})
+    print(f"重新处理: {', '.join(rebuilt) if rebuilt else '无（仅重新打包）'}")
+    print(f"图集已生成: {atlas.ATLAS_IMAGE} {sheet_size[0]}x{sheet_size[1]}, {len(entries)} 个精灵")
+    return True
+
+
+def write_index(index):
+    tmp_path = atlas.ATLAS_INDEX + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, atlas.ATLAS_INDEX)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="构建精灵图集")
+    parser.add_argument('--force', action='store_true', help="忽略旧图集，全部重新处理")
+    build(parser.parse_args().force)
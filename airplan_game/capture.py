@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对局录屏（帧间差分视频文件）
+主循环每帧只把窗口 Surface 的像素缓冲（buffer protocol，不经过 PNG/Surface 转换）整块复制到预分配的缓冲区，
+编码在后台线程中进行：与上一帧按字节异或后 zlib 压缩（画面不变的区域异或后全为 0，压缩率很高），
+每隔若干帧插入一个关键帧，文件末尾写入帧索引，可以快速跳转。
+缓冲区用完（编码跟不上）时丢弃当前帧而不阻塞主循环；zlib 和 NumPy 运算期间会释放 GIL
+用法:
+  python capture.py info 文件.apcv
+  python capture.py play 文件.apcv [--start 秒] [--speed 倍数]   空格暂停，←/→ 跳转 5 秒
+  python capture.py gif 文件.apcv 输出.gif [--start 秒] [--duration 秒] [--fps 15] [--scale 0.5]
+"""
+
+import bisect
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+CAPTURE_MAGIC = b'APCV'
+CAPTURE_VERSION = 1
+# 魔数、版本、宽、高、每行字节数、每像素字节数、R/G/B 所在字节
+HEADER = struct.Struct('<4sHHHIB3B')
+RECORD = struct.Struct('<BII')  # 标志位、时间戳（毫秒）、压缩数据长度
+INDEX_ENTRY = struct.Struct('<QIB')  # 记录偏移、时间戳、标志位
+FOOTER = struct.Struct('<QI4s')  # 索引偏移、帧数、结尾魔数
+FOOTER_MAGIC = b'APCI'
+KEYFRAME = 1
+
+
+class CaptureWriter:
+    """
+    后台编码的录屏写入器
+    grab() 在主线程调用，只做一次内存复制；编码和写文件都在后台线程
+    """
+
+    def __init__(self, path, surface, fps=30, queue_frames=4, keyframe_every=150, level=1):
+        """
+        :param surface: 要录制的 Surface（确定尺寸和像素格式）
+        :param fps: 录制帧率上限，超出的帧不复制
+        :param queue_frames: 等待编码的帧缓冲数量，用完时丢帧
+        :param keyframe_every: 每隔多少帧插入一个关键帧（跳转时最多解码这么多帧）
+        :param level: zlib 压缩级别
+        """
+        self.path = path
+        self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.bytesize = surface.get_bytesize()
+        self.interval = 1.0 / fps if fps else 0.0
+        self.keyframe_every = keyframe_every
+        self.level = level
+        frame_bytes = self.pitch * self.size[1]
+        # 预分配的帧缓冲：空闲的在 free 中，后台线程另持有上一帧和异或结果
+        self.free = queue.Queue()
+        for _ in range(queue_frames):
+            self.free.put(np.empty(frame_bytes, np.uint8))
+        self.pending = queue.Queue()
+        self._prev = np.zeros(frame_bytes, np.uint8)
+        self._scratch = np.empty(frame_bytes, np.uint8)
+        self.index = []
+        self.start = None
+        self.next_due = 0.0
+        # 统计
+        self.grabbed = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.encode_ms = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'wb')
+        shifts = [shift // 8 for shift in surface.get_shifts()[:3]]
+        self.file.write(HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, self.size[0], self.size[1], self.pitch,
+                                    self.bytesize, *shifts))
+        self.thread = threading.Thread(target=self._run, name='capture-writer', daemon=True)
+        self.thread.start()
+
+    def due(self, now=None):
+        """本帧是否到了录制间隔（不改变状态）"""
+        now = time.perf_counter() if now is None else now
+        return self.start is None or now >= self.next_due
+
+    def grab(self, surface, now=None):
+        """
+        复制一帧等待编码，返回是否录入（未到录制间隔或缓冲用完时返回 False）
+        :param surface: 与创建时尺寸、格式相同的 Surface，或返回它的函数
+                        （纹理后端读回像素代价高，只在确实要录入时调用）
+        """
+        now = time.perf_counter() if now is None else now
+        if not self.due(now):
+            return False
+        if self.start is None:
+            self.start = self.next_due = now
+        # 按固定间隔录制；落后超过一个间隔时不补录
+        self.next_due = max(self.next_due + self.interval, now - self.interval)
+        try:
+            buf = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if callable(surface):
+            surface = surface()
+        buf[:] = np.frombuffer(surface.get_buffer(), np.uint8)
+        self.pending.put((buf, int((now - self.start) * 1000)))
+        self.grabbed += 1
+        return True
+
+    def _run(self):
+        f = self.file
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            buf, timestamp = item
+            start = time.perf_counter()
+            flags = KEYFRAME if len(self.index) % self.keyframe_every == 0 else 0
+            if flags & KEYFRAME:
+                data = zlib.compress(buf, self.level)
+            else:
+                np.bitwise_xor(buf, self._prev, out=self._scratch)
+                data = zlib.compress(self._scratch, self.level)
+            self.index.append((f.tell(), timestamp, flags))
+            f.write(RECORD.pack(flags, timestamp, len(data)))
+            f.write(data)
+            self.bytes_written += RECORD.size + len(data)
+            # 本帧成为下一帧的差分基准，旧的基准缓冲归还
+            self.free.put(self._prev)
+            self._prev = buf
+            self.encode_ms += (time.perf_counter() - start) * 1000
+
+    def close(self):
+        """等待剩余帧编码完成，写入索引并关闭文件，返回统计"""
+        self.pending.put(None)
+        self.thread.join()
+        f = self.file
+        index_offset = f.tell()
+        for entry in self.index:
+            f.write(INDEX_ENTRY.pack(*entry))
+        f.write(FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC))
+        f.close()
+        return self.stats()
+
+    def stats(self):
+        written = len(self.index)
+        raw = written * self.pitch * self.size[1]
+        return {
+            'frames': written,
+            'grabbed': self.grabbed,
+            'dropped': self.dropped,
+            'bytes': self.bytes_written,
+            'ratio': round(self.bytes_written / raw, 4) if raw else 0.0,
+            'encode_mean_ms': round(self.encode_ms / written, 3) if written else 0.0,
+        }
+
+
+class CaptureReader:
+    """读取录屏文件；frame(i) 从不晚于 i 的最近关键帧（或当前解码位置）开始逐帧还原"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        magic, version, w, h, self.pitch, self.bytesize, *self.rgb_bytes = HEADER.unpack(
+            self.file.read(HEADER.size))
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION:
+            raise ValueError(f"不是有效的录屏文件: {path}")
+        self.size = (w, h)
+        self.index = self._read_index()
+        self.timestamps = [entry[1] for entry in self.index]
+        self.keyframes = [i for i, entry in enumerate(self.index) if entry[2] & KEYFRAME]
+        self._raw = np.zeros(self.pitch * h, np.uint8)
+        self._position = None  # _raw 中当前是第几帧
+
+    def _read_index(self):
+        f = self.file
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        if end >= HEADER.size + FOOTER.size:
+            f.seek(end - FOOTER.size)
+            index_offset, count, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic == FOOTER_MAGIC:
+                f.seek(index_offset)
+                data = f.read(count * INDEX_ENTRY.size)
+                return [INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size) for i in range(count)]
+        # 没有正常关闭（例如游戏崩溃）的文件：顺序扫描记录重建索引，末尾不完整的记录丢弃
+        index = []
+        offset = HEADER.size
+        while offset + RECORD.size <= end:
+            f.seek(offset)
+            flags, timestamp, length = RECORD.unpack(f.read(RECORD.size))
+            if offset + RECORD.size + length > end:
+                break
+            index.append((offset, timestamp, flags))
+            offset += RECORD.size + length
+        return index
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def duration_ms(self):
+        return self.timestamps[-1] if self.timestamps else 0
+
+    def index_at(self, ms):
+        """时间戳不晚于 ms 的最后一帧"""
+        return max(0, bisect.bisect_right(self.timestamps, ms) - 1)
+
+    def _decode(self, i):
+        offset, _, flags = self.index[i]
+        self.file.seek(offset)
+        _, _, length = RECORD.unpack(self.file.read(RECORD.size))
+        data = np.frombuffer(zlib.decompress(self.file.read(length)), np.uint8)
+        if flags & KEYFRAME:
+            self._raw[:] = data
+        else:
+            np.bitwise_xor(self._raw, data, out=self._raw)
+
+    def frame(self, i):
+        """第 i 帧的 RGB 数组（高, 宽, 3）"""
+        if not 0 <= i < len(self):
+            raise IndexError(f"帧序号超出范围: {i}（共 {len(self)} 帧）")
+        key = self.keyframes[bisect.bisect_right(self.keyframes, i) - 1]
+        if self._position is not None and key <= self._position <= i:
+            start = self._position + 1  # 顺序播放时接着当前帧解码
+        else:
+            start = key
+        for j in range(start, i + 1):
+            self._decode(j)
+        self._position = i
+        w, h = self.size
+        pixels = self._raw.reshape(h, self.pitch)[:, :w * self.bytesize].reshape(h, w, self.bytesize)
+        return pixels[:, :, self.rgb_bytes]
+
+    def info(self):
+        return {'frames': len(self), 'size': self.size, 'duration_s': round(self.duration_ms / 1000, 2),
+                'keyframes': len(self.keyframes), 'bytes': os.path.getsize(self.file.name)}
+
+    def close(self):
+        self.file.close()
+
+
+def export_gif(reader, out_path, start_s=0.0, duration_s=None, fps=15, scale=0.5):
+    """
+    按固定帧率从录屏中取帧导出 GIF
+    :param scale: 缩放比例（GIF 只有 256 色，缩小后文件小得多）
+    """
+    from PIL import Image
+
+    if not len(reader):
+        raise ValueError("录屏文件中没有帧")
+    end_ms = reader.duration_ms if duration_s is None else min(reader.duration_ms, (start_s + duration_s) * 1000)
+    w, h = reader.size
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    frames = []
+    t = start_s * 1000
+    while t <= end_ms:
+        image = Image.fromarray(reader.frame(reader.index_at(t)))
+        if size != reader.size:
+            image = image.resize(size, Image.Resampling.BILINEAR)
+        frames.append(image.quantize(256, method=Image.Quantize.FASTOCTREE))
+        t += 1000 / fps
+    if not frames:
+        raise ValueError("指定的时间范围内没有帧")
+    frames[0].save(out_path, save_all=True, append_images=frames[1:], duration=round(1000 / fps), loop=0)
+    return len(frames)
+
+
+def play(reader, start_s=0.0, speed=1.0):
+    """窗口播放：空格暂停，←/→ 跳转 5 秒，Esc 退出"""
+    import pygame
+
+    if not len(reader):
+        raise ValueError("录屏文件中没有帧")
+    pygame.init()
+    screen = pygame.display.set_mode(reader.size)
+    pygame.display.set_caption(f"录屏回放 - {os.path.basename(reader.file.name)}")
+    clock = pygame.time.Clock()
+    position = start_s * 1000
+    paused = False
+    shown = None
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    position = max(0, position - 5000)
+                elif event.key == pygame.K_RIGHT:
+                    position = min(reader.duration_ms, position + 5000)
+        elapsed = clock.tick(60)
+        if not paused:
+            position = min(reader.duration_ms, position + elapsed * speed)
+        i = reader.index_at(position)
+        if i != shown:
+            pygame.surfarray.blit_array(screen, reader.frame(i).swapaxes(0, 1))
+            pygame.display.flip()
+            shown = i
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="录屏文件查看、回放与导出 GIF")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_info = sub.add_parser('info', help="输出帧数、时长、大小")
+    p_info.add_argument('path')
+    p_play = sub.add_parser('play', help="窗口回放")
+    p_play.add_argument('path')
+    p_play.add_argument('--start', type=float, default=0.0, help="起始时间（秒）")
+    p_play.add_argument('--speed', type=float, default=1.0, help="播放速度倍数")
+    p_gif = sub.add_parser('gif', help="导出 GIF")
+    p_gif.add_argument('path')
+    p_gif.add_argument('out')
+    p_gif.add_argument('--start', type=float, default=0.0, help="起始时间（秒）")
+    p_gif.add_argument('--duration', type=float, default=None, help="导出时长（秒，默认到结尾）")
+    p_gif.add_argument('--fps', type=float, default=15, help="GIF 帧率")
+    p_gif.add_argument('--scale', type=float, default=0.5, help="缩放比例")
+    args = parser.parse_args()
+
+    capture = CaptureReader(args.path)
+    try:
+        if args.command == 'info':
+            print(json.dumps(capture.info(), ensure_ascii=False))
+        elif args.command == 'play':
+            play(capture, args.start, args.speed)
+        else:
+            t = time.perf_counter()
+            count = export_gif(capture, args.out, args.start, args.duration, args.fps, args.scale)
+            print(f"已导出 {args.out}: {count} 帧, {os.path.getsize(args.out) / 1024:.0f} KB, "
+                  f"用时 {time.perf_counter() - t:.1f}s")
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        capture.close()
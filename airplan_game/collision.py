@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+碰撞检测宽相（空间哈希）
+每个逻辑帧按均匀网格重建被查询的精灵组，只对同格的候选做矩形检测；
+groupcollide / spritecollide 的返回结果与 pygame.sprite 同名函数完全一致
+（包括字典顺序、列表顺序和 dokill 时“一颗子弹只击中一个敌机”的语义）
+传入 collided=collide_mask 时先用矩形筛出候选，只对矩形相交的候选做像素级检测，
+结果与 pygame 的同名函数配合 pygame.sprite.collide_mask 相同
+"""
+
+import pygame
+
+# 精灵对数低于该值时直接使用 pygame 的逐对检测（网格的构建开销反而更大）
+AUTO_MIN_PAIRS = 256
+
+
+class SpatialHash:
+    """均匀网格空间哈希，每个格子保存精灵列表和对应的矩形列表"""
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.order = {}  # 精灵 -> 在原精灵组中的顺序，用于还原 pygame 的结果顺序
+
+    def clear(self):
+        self.cells.clear()
+        self.order.clear()
+
+    def _cell_range(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, (rect.right - 1) // cs,
+                rect.top // cs, (rect.bottom - 1) // cs)
+
+    def insert(self, sprite):
+        self.order[sprite] = len(self.order)
+        x0, x1, y0, y1 = self._cell_range(sprite.rect)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = ([sprite], [sprite.rect])
+                else:
+                    bucket[0].append(sprite)
+                    bucket[1].append(sprite.rect)
+
+    def build(self, sprites):
+        """用精灵组重建网格（insert 的内联版本）"""
+        self.clear()
+        cells = self.cells
+        order = self.order
+        cs = self.cell_size
+        for i, sprite in enumerate(sprites):
+            order[sprite] = i
+            rect = sprite.rect
+            x0 = rect.left // cs
+            x1 = (rect.right - 1) // cs
+            y0 = rect.top // cs
+            y1 = (rect.bottom - 1) // cs
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket is None:
+                        cells[(cx, cy)] = ([sprite], [rect])
+                    else:
+                        bucket[0].append(sprite)
+                        bucket[1].append(rect)
+        return self
+
+    def query(self, rect):
+        """返回与 rect 相交的精灵列表（按插入顺序）"""
+        x0, x1, y0, y1 = self._cell_range(rect)
+        cells = self.cells
+        collidelistall = rect.collidelistall  # 矩形检测在 C 层完成
+        found = None
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    continue
+                idx = collidelistall(bucket[1])
+                if not idx:
+                    continue
+                sprites = bucket[0]
+                if found is None:
+                    found = {sprites[i]: None for i in idx}
+                else:
+                    for i in idx:
+                        found[sprites[i]] = None
+        if found is None:
+            return []
+        found = list(found)
+        if len(found) > 1:
+            found.sort(key=self.order.__getitem__)
+        return found
+
+
+def collide_mask(a, b):
+    """
+    像素级检测，调用前矩形已相交；a.mask / b.mask 为按图片缓存的掩码（engine.get_mask）
+    """
+    rect_a = a.rect
+    rect_b = b.rect
+    return a.mask.overlap(b.mask, (rect_b.x - rect_a.x, rect_b.y - rect_a.y)) is not None
+
+
+def spritecollide(sprite, group, dokill, grid=None, collided=None):
+    """
+    与 pygame.sprite.spritecollide(sprite, group, dokill, collided) 结果相同
+    :param grid: 已用 group 构建好的 SpatialHash；单次查询时为 None，
+                 直接用 Rect.collidelistall 在 C 层逐个检测
+    :param collided: 矩形相交后的精确检测函数（如 collide_mask），None 表示只用矩形
+    """
+    if grid is None:
+        members = group.sprites()
+        crashed = [members[i] for i in sprite.rect.collidelistall([s.rect for s in members])]
+    else:
+        crashed = [s for s in grid.query(sprite.rect) if group.has(s)]
+    if collided is not None and crashed:
+        crashed = [s for s in crashed if collided(sprite, s)]
+    if dokill:
+        for s in crashed:
+            s.kill()
+    return crashed
+
+
+def groupcollide(groupa, groupb, dokilla, dokillb, grid=None, min_pairs=AUTO_MIN_PAIRS, collided=None):
+    """
+    与 pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb, collided) 结果相同
+    对 groupb 建网格，逐个查询 groupa 中的精灵
+    """
+    if len(groupa) * len(groupb) < min_pairs:
+        if collided is None:
+            return pygame.sprite.groupcollide(groupa, groupb, dokilla, dokillb)
+        query = None  # 精灵少时不建网格，逐个用 collidelistall 做矩形筛选
+    else:
+        if grid is None:
+            grid = SpatialHash()
+        query = grid.build(groupb).query
+
+    crashed = {}
+    for a in groupa.sprites():
+        if query is None:
+            members = groupb.sprites()
+            found = [members[i] for i in a.rect.collidelistall([b.rect for b in members])]
+        else:
+            found = query(a.rect)
+        if found and collided is not None:
+            found = [b for b in found if collided(a, b)]
+        if not found:
+            continue
+        if dokillb:
+            # 已被前面的精灵击中并移除的不再参与
+            found = [b for b in found if groupb.has(b)]
+            if not found:
+                continue
+            for b in found:
+                b.kill()
+        crashed[a] = found
+        if dokilla:
+            a.kill()
+    return crashed
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+脏矩形渲染
+记录每帧精灵、HUD 文字和护盾叠层画过的区域；背景动画没有换帧时，
+只在上一帧画过的区域下重绘背景，并用 display.update(rects) 只提交变化区域，
+背景换帧时退回整屏重绘 + flip
+"""
+
+import pygame
+
+
+class DirtyRenderer:
+    """脏矩形渲染器，每帧依次调用 begin() 和 end(rects)"""
+
+    def __init__(self, background, max_rects=80):
+        """
+        :param background: GifBackground（提供 current_frame / draw / draw_area）
+        :param max_rects: 变化区域超过该数量时直接整屏提交，避免大量小矩形的开销
+        """
+        self.background = background
+        self.max_rects = max_rects
+        self.prev_rects = []
+        self.last_frame = None
+        self.full_redraw = True
+        # 统计
+        self.frames = 0
+        self.full_frames = 0
+        self.updated_pixels = 0
+
+    def invalidate(self):
+        """下一帧强制整屏重绘（例如窗口恢复、切换界面后）"""
+        self.last_frame = None
+
+    def begin(self, surf):
+        """擦除上一帧：背景换帧时整屏重绘，否则只重绘上一帧画过的区域"""
+        frame = self.background.current_frame
+        self.full_redraw = frame != self.last_frame or len(self.prev_rects) > self.max_rects
+        self.last_frame = frame
+        if self.full_redraw:
+            self.background.draw(surf)
+        else:
+            for rect in self.prev_rects:
+                self.background.draw_area(surf, rect)
+
+    def end(self, rects):
+        """提交本帧：rects 为本帧绘制过的区域"""
+        screen_rect = pygame.display.get_surface().get_rect()
+        self.frames += 1
+        if self.full_redraw or len(rects) > self.max_rects:
+            pygame.display.flip()
+            self.full_frames += 1
+            self.updated_pixels += screen_rect.width * screen_rect.height
+        else:
+            # 上一帧的位置需要擦掉，本帧的位置需要画上
+            changed = [r.clip(screen_rect) for r in self.prev_rects + rects]
+            pygame.display.update(changed)
+            self.updated_pixels += sum(r.width * r.height for r in changed)
+        self.prev_rects = rects
+
+    def stats(self):
+        screen = pygame.display.get_surface()
+        full = screen.get_width() * screen.get_height() if screen else 1
+        frames = max(1, self.frames)
+        return {
+            'frames': self.frames,
+            'full_frames': self.full_frames,
+            'avg_updated_ratio': round(self.updated_pixels / (frames * full), 3),
+        }
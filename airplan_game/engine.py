@@ -0,0 +1,651 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无头游戏引擎
+游戏状态 + 纯逻辑 step(state, inputs)，不依赖窗口、事件队列和绘制，
+可在 SDL dummy 驱动或完全没有显示设备时以远高于 60fps 的速度运行
+"""
+
+import math
+import random
+import pygame
+import collision
+from scheduler import Scheduler
+from sprite_pool import PooledSprite, SpritePool
+
+# 屏幕设置
+WIDTH, HEIGHT = 480, 720
+
+# 逻辑频率：所有速度、护盾时长等都以逻辑帧为单位，
+# 配合固定步长循环（game_loop.py）即可与渲染帧率无关地保持真实时间
+STEP_HZ = 60
+TICK_MS = 1000 / STEP_HZ
+
+# 各精灵图片的默认尺寸（与 main.py 中 load_image 的缩放/旋转结果一致）
+DEFAULT_SIZES = {
+    'player': (50, 40),
+    'enemy': (40, 30),
+    'bullet': (20, 10),  # 10x20 旋转 90 度后
+}
+
+# 子弹速度（像素/逻辑帧）
+BULLET_SPEED = 10
+ENEMY_BULLET_SPEED = 8  # 增加敌机子弹速度
+ENEMY_BULLET_OFFSET = 20  # 从敌机下方20像素处发射，避免贴在一起
+
+# 精灵图片，窗口模式下由渲染层通过 set_images() 注入真实图片
+_images = {}
+# 精灵碰撞掩码，每张共享图片只计算一次
+_masks = {}
+
+
+def set_images(**images):
+    """注入精灵图片（player / enemy / bullet）"""
+    _images.update(images)
+    for name in images:
+        _masks.pop(name, None)
+
+
+def get_image(name):
+    """获取精灵图片，未注入时使用默认尺寸的空白 Surface（无头模式）"""
+    img = _images.get(name)
+    if img is None:
+        img = pygame.Surface(DEFAULT_SIZES[name])
+        _images[name] = img
+    return img
+
+
+def get_mask(name):
+    """精灵图片的碰撞掩码（缓存）；空白图片的掩码是整个矩形，结果与矩形检测相同"""
+    mask = _masks.get(name)
+    if mask is None:
+        mask = _masks[name] = pygame.mask.from_surface(get_image(name))
+    return mask
+
+
+class Inputs:
+    """单帧输入：left/right 为按住状态，fire/shield/pause 为本帧按下"""
+
+    __slots__ = ('left', 'right', 'fire', 'shield', 'pause')
+
+    def __init__(self, left=False, right=False, fire=False, shield=False, pause=False):
+        self.left = left
+        self.right = right
+        self.fire = fire
+        self.shield = shield
+        self.pause = pause
+
+    def merge(self, newer):
+        """合并尚未被逻辑帧消费的按下事件，按住状态以较新的为准"""
+        return Inputs(left=newer.left, right=newer.right,
+                      fire=self.fire or newer.fire,
+                      shield=self.shield or newer.shield,
+                      pause=self.pause or newer.pause)
+
+    def held(self):
+        """只保留按住状态（按下事件只在一个逻辑帧内生效）"""
+        return Inputs(left=self.left, right=self.right)
+
+
+NO_INPUT = Inputs()
+
+
+# 玩家飞机
+class Player(pygame.sprite.Sprite):
+    def __init__(self, timers=None):
+        """:param timers: 逻辑帧调度器（GameState.timers），护盾到期由它触发"""
+        super().__init__()
+        self.timers = timers if timers is not None else Scheduler()
+        self.image = get_image('player')
+        self.mask = get_mask('player')
+        self.rect = self.image.get_rect()
+        self.rect.centerx = WIDTH // 2
+        self.rect.bottom = HEIGHT - 10
+        self.speed = 8
+        self.health = 100
+        self.shield_active = False
+        self.shield_end = 0  # 护盾结束的逻辑帧
+        self._shield_timer = None
+        self.shield_max_duration = 300  # 护盾持续5秒（60fps * 5）
+        self.shield_count = 0  # 存储的护盾数量
+        self.inputs = NO_INPUT  # 本逻辑帧的输入，由 step 写入（合作模式下每名玩家各自一份）
+
+    @property
+    def shield_duration(self):
+        """护盾剩余逻辑帧数"""
+        return max(0, self.shield_end - self.timers.now) if self.shield_active else 0
+
+    def update(self, *args):
+        inputs = self.inputs
+        if inputs.left and self.rect.left > 0:
+            self.rect.x -= self.speed
+        if inputs.right and self.rect.right < WIDTH:
+            self.rect.x += self.speed
+
+    def activate_shield(self):
+        """激活护盾"""
+        if self.shield_count > 0 and not self.shield_active:
+            self.shield_active = True
+            self.shield_end = self.timers.now + self.shield_max_duration
+            self._shield_timer = self.timers.schedule(self.shield_end, self._shield_expired)
+            self.shield_count -= 1  # 消耗一个护盾
+            return True
+        return False
+
+    def add_shield(self):
+        """获得一个护盾"""
+        if self.shield_count < 3:  # 最多存储3个护盾
+            self.shield_count += 1
+
+    def break_shield(self):
+        """护盾被击破"""
+        self.shield_active = False
+        self.timers.cancel(self._shield_timer)
+        self._shield_timer = None
+
+    def _shield_expired(self):
+        self.shield_active = False
+        self._shield_timer = None
+
+
+# 敌机
+class Enemy(PooledSprite):
+    def __init__(self, rng=random, shoot_delay=(2000, 4000), speed=(1, 3)):
+        super().__init__()
+        self.image = get_image('enemy')
+        self.mask = get_mask('enemy')
+        self.rect = self.image.get_rect()
+        self.generation = 0  # 每次重用加一，旧的定时事件据此作废
+        self.on_wrap = None  # 飞出屏幕底部回到顶部时的回调（GameState 用来登记出现射击）
+        self.reset(rng, shoot_delay, speed)
+
+    def reset(self, rng=random, shoot_delay=(2000, 4000), speed=(1, 3), position=None):
+        """
+        :param shoot_delay: 随机射击间隔范围（毫秒）
+        :param speed: 随机飞行速度范围（像素/逻辑帧）
+        :param position: (centerx, top)，为 None 或其中一项为 None 时随机
+        """
+        self.rng = rng
+        x, y = position or (None, None)
+        if x is None:
+            self.rect.x = rng.randint(0, WIDTH - self.rect.width)
+        else:
+            self.rect.centerx = x
+        self.rect.y = rng.randint(-100, -40) if y is None else y
+        self.speed = rng.randint(*speed)  # 降低敌机飞行速度
+        self.last_shot = 0
+        self.shoot_delay = rng.randint(*shoot_delay)  # 默认2-4秒随机射击间隔
+        self.has_shot_on_spawn = False  # 是否已经在出现时射击过
+        self.spawn_shot_tick = -1  # 最近一次出现射击的逻辑帧
+        # 波次模式按敌机类型覆盖以下属性（waves.py）
+        self.wrap = True  # 飞出底部后回到顶部，否则离场回收
+        self.fire = None  # 射击方式 FirePattern，None 为单发
+        self.score = 10
+        self.generation += 1
+
+    def update(self, *args):
+        self.rect.y += self.speed
+        if self.rect.top > HEIGHT:
+            if not self.wrap:
+                self.kill()
+                return
+            self.rect.x = self.rng.randint(0, WIDTH - self.rect.width)
+            self.rect.bottom = 0
+            self.has_shot_on_spawn = False  # 重置射击标志
+            if self.on_wrap:
+                self.on_wrap(self)
+
+    def spawn_shot_delay(self):
+        """再过多少个逻辑帧进入出现射击的区域（y > -50），已在区域内时为 0"""
+        if self.rect.y > -50 or self.speed <= 0:
+            return 0
+        return (-50 - self.rect.y) // self.speed + 1
+
+    def can_shoot(self, now):
+        """检查是否可以射击（now 为游戏内时间，毫秒）"""
+        if now - self.last_shot > self.shoot_delay:
+            self.last_shot = now
+            return True
+        return False
+
+    def should_shoot_on_spawn(self):
+        """检查是否应该在出现时射击"""
+        if not self.has_shot_on_spawn and self.rect.y > -50 and self.rect.y < 50:
+            self.has_shot_on_spawn = True
+            return True
+        return False
+
+
+# 子弹
+class Bullet(PooledSprite):
+    def __init__(self, x=0, y=0):
+        super().__init__()
+        self.image = get_image('bullet')
+        self.mask = get_mask('bullet')
+        self.rect = self.image.get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.rect.centerx = x
+        self.rect.bottom = y
+        self.speed = BULLET_SPEED
+
+    def update(self, *args):
+        self.rect.y -= self.speed
+        if self.rect.bottom < 0:
+            self.kill()
+
+
+# 敌机子弹
+class EnemyBullet(PooledSprite):
+    def __init__(self, x=0, y=0):
+        super().__init__()
+        self.image = get_image('bullet')
+        self.mask = get_mask('bullet')
+        self.rect = self.image.get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.rect.centerx = x
+        self.rect.bottom = y + ENEMY_BULLET_OFFSET
+        self.speed = ENEMY_BULLET_SPEED
+
+    def update(self, *args):
+        self.rect.y += self.speed
+        if self.rect.top > HEIGHT:
+            self.kill()
+
+
+def bullet_offsets_for_level(level):
+    """按等级发射多枚直线子弹（横向散开）"""
+    if level <= 1:
+        return [0]
+    elif level == 2:
+        return [-8, 8]
+    elif level == 3:
+        return [-14, 0, 14]
+    elif level == 4:
+        return [-20, -7, 7, 20]
+    return [-24, -12, 0, 12, 24]
+
+
+# 对象池预分配数量与上限
+POOL_SIZES = {
+    'enemy': (16, 1024),
+    'bullet': (64, 8192),
+    'enemy_bullet': (64, 8192),
+}
+
+
+def create_pools():
+    """创建敌机/子弹对象池；预分配对象使用独立的随机数，不影响对局的随机序列"""
+    scratch_rng = random.Random(0)
+    factories = {
+        'enemy': lambda: Enemy(scratch_rng),
+        'bullet': Bullet,
+        'enemy_bullet': EnemyBullet,
+    }
+    return {name: SpritePool(factories[name], prealloc, limit)
+            for name, (prealloc, limit) in POOL_SIZES.items()}
+
+
+class GameState:
+    """一局游戏的全部状态"""
+
+    def __init__(self, seed=None, array_projectiles=False, base_enemy_count=6, max_enemies=12,
+                 max_level=5, enemy_shoot_delay=(2000, 4000), enemy_speed=(1, 3),
+                 level_threshold_per_level=10, shield_score_step=300, collision_damage=30, bullet_damage=15,
+                 pixel_collisions=False, waves=None, players=1):
+        """
+        :param seed: 随机种子，相同种子和输入得到相同的对局
+        :param array_projectiles: 为 True 时子弹使用 NumPy 数组池（projectiles.py）
+                                  而不是逐个 Sprite，需要安装 numpy
+        :param base_enemy_count: 开局敌机数量
+        :param max_enemies: 按分数增加敌机的上限
+        :param max_level: 玩家等级上限
+        :param enemy_shoot_delay: 敌机射击间隔范围（毫秒）
+        :param enemy_speed: 敌机速度范围（像素/逻辑帧）
+        :param level_threshold_per_level: 每级需要的击杀数
+        :param shield_score_step: 每得多少分获得一个护盾
+        :param collision_damage: 撞上敌机的伤害
+        :param bullet_damage: 被敌机子弹击中的伤害
+        :param pixel_collisions: 为 True 时先做矩形检测，相交后再按图片掩码做像素级检测
+        :param waves: 编译好的刷怪表（waves.WaveTable），给出时敌机按波次生成，
+                      base_enemy_count/max_enemies 等经典刷怪参数不再使用
+        :param players: 玩家数量（合作模式 2-4），得分、等级共享，全部倒下时结束
+        以上参数默认即正常游戏的数值，压力测试（bench_game.py）和平衡性扫描（batch_sim.py）可以修改
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.array_projectiles = array_projectiles
+        self.pixel_collisions = pixel_collisions
+        self.collided = collision.collide_mask if pixel_collisions else None
+
+        self.all_sprites = pygame.sprite.Group()
+        self.enemies = pygame.sprite.Group()
+        if array_projectiles:
+            from projectiles import ProjectilePool
+            bullet_size = get_image('bullet').get_size()
+            self.bullets = ProjectilePool(bullet_size)
+            self.enemy_bullets = ProjectilePool(bullet_size)
+        else:
+            self.bullets = pygame.sprite.Group()
+            self.enemy_bullets = pygame.sprite.Group()
+
+        # 逻辑帧定时事件（敌机射击、护盾到期），暂停时不推进
+        self.timers = Scheduler()
+
+        self.players = [Player(self.timers) for _ in range(players)]
+        if players > 1:
+            # 合作模式：玩家沿底部均匀排开
+            for i, player in enumerate(self.players):
+                player.rect.centerx = WIDTH * (i + 1) // (players + 1)
+        self.player = self.players[0]  # 单人模式的玩家（合作模式为 1 号玩家）
+        self.all_sprites.add(*self.players)
+
+        self.score = 0
+        self.running = True
+        self.paused = False
+        self.last_shield_score = 0  # 上次获得护盾的分数
+
+        # 进度/升级
+        self.player_level = 1
+        self.kill_count = 0
+        self.level_threshold_per_level = level_threshold_per_level  # 每级需要的击杀数
+        self.shield_score_step = shield_score_step
+        self.collision_damage = collision_damage
+        self.bullet_damage = bullet_damage
+        self.max_level = max_level
+        self.base_enemy_count = base_enemy_count  # 基础敌机数量
+        self.max_enemies = max_enemies
+        self.enemy_shoot_delay = enemy_shoot_delay
+        self.enemy_speed = enemy_speed
+
+        # 精灵对象池
+        self.pools = create_pools()
+
+        # 碰撞宽相网格，每帧复用
+        self.collision_grid = collision.SpatialHash()
+
+        # 游戏内时钟
+        self.tick = 0
+        self.time_ms = 0.0
+
+        # 可选的分阶段计时器（profiler.FrameProfiler），step 中按阶段打点
+        self.profiler = None
+
+        # 本逻辑帧的表现事件 [(类型, x, y)]：'explosion' / 'shield_break' / 'player_hit'，
+        # 在敌机被对象池复用（位置重置）之前记录，供渲染层生成粒子效果；不影响游戏逻辑
+        self.effects = []
+
+        if waves is not None:
+            # 波次模式：刷怪表中第 0 帧的敌机立即生成
+            from waves import WaveDirector
+            self.wave_director = WaveDirector(waves)
+            self.wave_director.advance(self)
+        else:
+            self.wave_director = None
+            # 创建初始敌机（默认6个）
+            for _ in range(self.base_enemy_count):
+                self.spawn_enemy()
+
+    def spawn_enemy(self):
+        enemy = self.pools['enemy'].acquire((self.rng, self.enemy_shoot_delay, self.enemy_speed),
+                                            (self.all_sprites, self.enemies))
+        enemy.on_wrap = self.schedule_spawn_shot
+        self.schedule_spawn_shot(enemy)
+        self.schedule_shot(enemy)
+        return enemy
+
+    def spawn_wave_enemy(self, enemy_type, x=None, y=None):
+        """
+        按敌机类型生成一架敌机（WaveDirector 调用）
+        :param x: centerx，None 时随机
+        :param y: rect.top，None 时随机
+        """
+        enemy = self.pools['enemy'].acquire((self.rng, enemy_type.shoot_delay, enemy_type.speed, (x, y)),
+                                            (self.all_sprites, self.enemies))
+        enemy.wrap = enemy_type.wrap
+        enemy.fire = enemy_type.fire
+        enemy.score = enemy_type.score
+        enemy.on_wrap = self.schedule_spawn_shot
+        self.schedule_spawn_shot(enemy)
+        self.schedule_shot(enemy)
+        return enemy
+
+    # 敌机射击的定时事件：
+    # 出现射击在敌机进入 -50 < y < 50 的那一帧触发；间隔射击在游戏内时间超过
+    # last_shot + shoot_delay 的第一帧触发，同一帧已出现射击时顺延一帧（与逐帧检查的结果一致）
+    def schedule_spawn_shot(self, enemy):
+        self.timers.schedule(self.tick + enemy.spawn_shot_delay(), self._spawn_shot_due,
+                             enemy, enemy.generation, priority=0)
+
+    def schedule_shot(self, enemy, due=None):
+        if due is None:
+            # 第一个满足 tick * TICK_MS > last_shot + shoot_delay 的逻辑帧；恰好整除时
+            # 累加的浮点时钟可能略大或略小，先在该帧检查，不满足再顺延
+            due = max(self.tick + 1, math.ceil((enemy.last_shot + enemy.shoot_delay) / TICK_MS - 1e-6))
+        self.timers.schedule(due, self._shot_due, enemy, enemy.generation, priority=1)
+
+    def _spawn_shot_due(self, enemy, generation):
+        if enemy.generation != generation or not enemy.alive():
+            return
+        if enemy.should_shoot_on_spawn():
+            enemy.spawn_shot_tick = self.tick
+            if enemy.rect.y > -100:
+                self.enemy_fire(enemy)
+
+    def _shot_due(self, enemy, generation):
+        if enemy.generation != generation or not enemy.alive():
+            return
+        if enemy.spawn_shot_tick == self.tick or not enemy.can_shoot(self.time_ms):
+            # 本帧已出现射击，或浮点时钟还差一点：下一帧再检查
+            self.schedule_shot(enemy, self.tick + 1)
+            return
+        if enemy.rect.y > -100:
+            self.enemy_fire(enemy)
+        self.schedule_shot(enemy)
+
+    def _burst_due(self, enemy, generation):
+        if enemy.generation == generation and enemy.alive() and enemy.rect.y > -100:
+            for dx in enemy.fire.offsets:
+                self.spawn_enemy_bullet(enemy, dx)
+
+    def enemy_fire(self, enemy):
+        """敌机射击一次：经典敌机单发，波次敌机按射击方式多发并安排连发"""
+        pattern = enemy.fire
+        if pattern is None:
+            self.spawn_enemy_bullet(enemy)
+            return
+        for dx in pattern.offsets:
+            self.spawn_enemy_bullet(enemy, dx)
+        for i in range(1, pattern.burst):
+            self.timers.schedule(self.tick + i * pattern.burst_gap, self._burst_due,
+                                 enemy, enemy.generation, priority=1)
+
+    def live_players(self):
+        """未倒下的玩家"""
+        return [player for player in self.players if player.alive()]
+
+    def spawn_bullets(self, player=None):
+        player = player or self.player
+        centerx, top = player.rect.centerx, player.rect.top
+        for dx in bullet_offsets_for_level(self.player_level):
+            if self.array_projectiles:
+                self.bullets.spawn_centered(centerx + dx, top, 0, -BULLET_SPEED)
+            else:
+                self.pools['bullet'].acquire((centerx + dx, top), (self.all_sprites, self.bullets))
+
+    def spawn_enemy_bullet(self, enemy, dx=0):
+        if self.array_projectiles:
+            self.enemy_bullets.spawn_centered(enemy.rect.centerx + dx, enemy.rect.bottom + ENEMY_BULLET_OFFSET,
+                                              0, ENEMY_BULLET_SPEED)
+        else:
+            self.pools['enemy_bullet'].acquire((enemy.rect.centerx + dx, enemy.rect.bottom),
+                                               (self.all_sprites, self.enemy_bullets))
+
+    def collide_bullets_enemies(self):
+        """子弹击中敌机，返回 {敌机: 命中的子弹}"""
+        if self.array_projectiles:
+            return self.bullets.groupcollide(self.enemies, True, True, self.bullet_mask())
+        return collision.groupcollide(self.enemies, self.bullets, True, True, self.collision_grid,
+                                      collided=self.collided)
+
+    def collide_player_enemy_bullets(self, player=None):
+        """玩家与敌机子弹碰撞，返回命中的子弹"""
+        player = player or self.player
+        if self.array_projectiles:
+            return self.enemy_bullets.spritecollide(player, True, self.bullet_mask())
+        return collision.spritecollide(player, self.enemy_bullets, True, collided=self.collided)
+
+    def collide_player_enemies(self, player=None):
+        """玩家与敌机碰撞（相撞的敌机被移除），返回撞上的敌机"""
+        return collision.spritecollide(player or self.player, self.enemies, True, collided=self.collided)
+
+    def bullet_mask(self):
+        """数组池子弹的掩码（所有子弹共用一张图片），矩形模式为 None"""
+        return get_mask('bullet') if self.pixel_collisions else None
+
+    def pool_stats(self):
+        """各对象池的命中/未命中/峰值统计"""
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def damage_player(self, amount, player=None):
+        """玩家受击：有护盾则护盾消失，否则扣血；所有玩家都倒下时游戏结束"""
+        player = player or self.player
+        if player.shield_active:
+            player.break_shield()
+            return 'shield_break'
+        player.health -= amount
+        if player.health <= 0:
+            if any(p.health > 0 for p in self.players):
+                player.kill()  # 合作模式：倒下的玩家退出碰撞和绘制，其余玩家继续
+            else:
+                self.running = False
+        return 'player_hit'
+
+
+def step(state, inputs=NO_INPUT):
+    """
+    推进一个逻辑帧
+    :param state: GameState
+    :param inputs: 本帧输入 Inputs；合作模式为每名玩家一份的列表（按玩家顺序）
+    :return: 本帧产生的事件列表（'shoot' / 'explosion' / 'shield_break' / 'player_hit'），
+             由渲染层决定播放音效等表现
+    """
+    events = []
+    state.effects.clear()
+    if not state.running:
+        return events
+    prof = state.profiler
+    if prof:
+        prof.lap('logic')
+
+    # 输入处理
+    per_player = inputs if isinstance(inputs, (list, tuple)) else (inputs,) * len(state.players)
+    if not state.paused:
+        for player, player_inputs in zip(state.players, per_player):
+            if player_inputs.fire and player.alive():
+                state.spawn_bullets(player)
+                events.append('shoot')
+    if any(player_inputs.pause for player_inputs in per_player):
+        state.paused = not state.paused
+    if not state.paused:
+        for player, player_inputs in zip(state.players, per_player):
+            if player_inputs.shield and player.alive():
+                player.activate_shield()
+
+    # 暂停时不更新、不判定
+    if state.paused:
+        return events
+
+    state.tick += 1
+    state.time_ms += TICK_MS
+
+    for player, player_inputs in zip(state.players, per_player):
+        player.inputs = player_inputs
+    state.all_sprites.update()
+    if state.array_projectiles:
+        state.bullets.update()
+        state.enemy_bullets.update()
+    if prof:
+        prof.lap('update')
+
+    # 到期的定时事件：敌机出现射击/间隔射击、护盾到期
+    state.timers.advance(state.tick)
+    # 波次模式：游标推进到本帧，生成到期的敌机
+    if state.wave_director is not None:
+        state.wave_director.advance(state)
+    if prof:
+        prof.lap('enemy_fire')
+
+    # 子弹击中敌机
+    hits = state.collide_bullets_enemies()
+    if hits:
+        destroyed = len(hits)
+        events.append('explosion')
+        state.effects.extend(('explosion', *enemy.rect.center) for enemy in hits)
+        state.score += sum(enemy.score for enemy in hits)
+        state.kill_count += destroyed
+
+        # 护盾获得：默认每300分获得一个护盾
+        if state.score >= state.last_shield_score + state.shield_score_step:
+            for player in state.live_players():
+                player.add_shield()
+            state.last_shield_score = state.score
+
+        # 升级判定：达到每级阈值则升级，提升子弹数量
+        while (state.kill_count >= state.player_level * state.level_threshold_per_level
+               and state.player_level < state.max_level):
+            state.player_level += 1
+        # 经典模式：按分数增加敌机数量（每50分+1个，默认最多12个）；波次模式由刷怪表决定
+        if state.wave_director is None:
+            current_enemy_target = min(state.max_enemies, state.base_enemy_count + int(state.score // 50))
+            for _ in range(destroyed):
+                state.spawn_enemy()
+            # 如果目标数量大于当前数量，补充敌机
+            while len(state.enemies) < current_enemy_target:
+                state.spawn_enemy()
+
+    for player in state.live_players():
+        # 玩家与敌机碰撞
+        crashed = state.collide_player_enemies(player)
+        if crashed:
+            state.effects.extend(('explosion', *enemy.rect.center) for enemy in crashed)
+            events.append(state.damage_player(state.collision_damage, player))
+            state.effects.append((events[-1], *player.rect.center))
+
+        # 玩家与敌机子弹碰撞（子弹伤害较小）
+        for _ in state.collide_player_enemy_bullets(player):
+            events.append(state.damage_player(state.bullet_damage, player))
+            state.effects.append((events[-1], *player.rect.center))
+    if prof:
+        prof.lap('collision')
+
+    return events
+
+
+if __name__ == "__main__":
+    # 无头自测：随机输入跑若干帧并输出速度
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="无头逻辑自测：随机输入运行若干逻辑帧并输出速度")
+    parser.add_argument('ticks', type=int, nargs='?', default=10000, help="逻辑帧数")
+    parser.add_argument('--array', action='store_true', help="子弹使用 NumPy 数组存储")
+    args = parser.parse_args()
+    ticks = args.ticks
+    array_projectiles = args.array
+    state = GameState(seed=0, array_projectiles=array_projectiles)
+    input_rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if not state.running:
+            state = GameState(seed=state.tick, array_projectiles=array_projectiles)
+        step(state, Inputs(left=input_rng.random() < 0.3,
+                           right=input_rng.random() < 0.3,
+                           fire=input_rng.random() < 0.2,
+                           shield=input_rng.random() < 0.01))
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} 帧, 用时 {elapsed:.3f}s, {ticks / elapsed:.0f} 帧/秒, 得分 {state.score}")
+    print(f"对象池: {state.pool_stats()}")
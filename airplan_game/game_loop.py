@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+固定步长游戏循环
+逻辑以固定步长推进（与渲染帧率解耦），渲染落后时追帧但限制最大步数，
+并提供渲染插值系数和帧时间统计（平均、p95、p99、掉帧数）
+"""
+
+from collections import deque
+import pygame
+
+
+class FrameStats:
+    """帧时间统计，只保留最近 window 帧"""
+
+    def __init__(self, target_ms, window=600):
+        self.target_ms = target_ms
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.dropped_frames = 0  # 帧时间超过目标 1.5 倍的帧数
+        self.skipped_steps = 0  # 因追帧上限被丢弃的逻辑步数
+
+    def record(self, frame_ms):
+        self.frame_times.append(frame_ms)
+        self.frames += 1
+        if frame_ms > self.target_ms * 1.5:
+            self.dropped_frames += 1
+
+    def percentile(self, p):
+        """最近窗口内帧时间的第 p 百分位（毫秒）"""
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def mean(self):
+        if not self.frame_times:
+            return 0.0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    def summary(self):
+        return {
+            'frames': self.frames,
+            'mean_ms': round(self.mean, 3),
+            'p95_ms': round(self.percentile(95), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'dropped_frames': self.dropped_frames,
+            'skipped_steps': self.skipped_steps,
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return (f"帧数 {s['frames']}, 平均 {s['mean_ms']:.2f}ms, p95 {s['p95_ms']:.2f}ms, "
+                f"p99 {s['p99_ms']:.2f}ms, 掉帧 {s['dropped_frames']}, 丢弃逻辑步 {s['skipped_steps']}")
+
+
+class FixedStepLoop:
+    """
+    固定步长调度器
+    每个渲染帧调用一次 advance()，得到本帧应执行的逻辑步数；
+    渲染时使用 alpha 在上一逻辑帧与当前逻辑帧之间插值
+    """
+
+    def __init__(self, step_hz=60, render_fps=60, max_steps=5):
+        """
+        :param step_hz: 逻辑频率（每秒逻辑步数）
+        :param render_fps: 渲染帧率上限，0 表示不限
+        :param max_steps: 单个渲染帧内最多追赶的逻辑步数
+        """
+        self.step_ms = 1000 / step_hz
+        self.render_fps = render_fps
+        self.max_steps = max_steps
+        self.clock = pygame.time.Clock()  # 只创建一次，tick 才能测到上一帧
+        self.accumulator = 0.0
+        self.stats = FrameStats(1000 / render_fps if render_fps else self.step_ms)
+        self._started = False
+
+    def advance(self):
+        """等待到下一渲染帧，返回本帧需要执行的逻辑步数"""
+        frame_ms = self.clock.tick(self.render_fps)
+        if not self._started:
+            # 第一帧的间隔包含了菜单等待时间，只推进一步
+            self._started = True
+            frame_ms = self.step_ms
+        else:
+            self.stats.record(frame_ms)
+        self.accumulator += frame_ms
+
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            # 落后太多时放弃追赶，避免越追越慢
+            self.stats.skipped_steps += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step_ms
+        else:
+            self.accumulator -= steps * self.step_ms
+        return steps
+
+    def resync(self):
+        """阻塞等待（暂停、菜单）之后调用：下一帧只推进一步，等待时间不计入帧统计和追帧"""
+        self._started = False
+        self.accumulator = 0.0
+
+    def set_render_fps(self, render_fps):
+        """调整渲染帧率上限（窗口失去焦点时降频），逻辑频率不变"""
+        if render_fps != self.render_fps:
+            self.render_fps = render_fps
+            self.stats.target_ms = 1000 / render_fps if render_fps else self.step_ms
+
+    @property
+    def alpha(self):
+        """渲染插值系数 [0, 1)"""
+        return self.accumulator / self.step_ms
@@ -5,17 +5,31 @@
 将 GIF 动画转换为 pygame 可用的动态背景
 """
 
+import hashlib
+import mmap
 import os
+import random
+import struct
+import threading
 import pygame
 from PIL import Image
 
+# 预处理帧缓存文件头：魔数、版本、帧数、宽、高、每像素字节数（3 为 RGB，1 为调色板）
+CACHE_MAGIC = b'GIFC'
+CACHE_VERSION = 2
+CACHE_HEADER = struct.Struct('<4sIIIII')
+PALETTE_BYTES = 256 * 3
+
 class GifBackground:
-    def __init__(self, gif_path, screen_width, screen_height):
+    def __init__(self, gif_path, screen_width, screen_height, cache_dir=None, palette=False, load=True):
         """
         初始化 GIF 背景
         :param gif_path: GIF 文件路径
         :param screen_width: 屏幕宽度
         :param screen_height: 屏幕高度
+        :param cache_dir: 预处理帧缓存目录，None 表示不使用磁盘缓存
+        :param palette: 为 True 时帧保存为 8 位调色板 Surface（内存约为 1/3，blit 时展开）
+        :param load: 为 False 时只初始化属性、不加载帧（子类自行加载）
         """
         self.screen_width = screen_width
         self.screen_height = screen_height
@@ -24,12 +38,20 @@ class GifBackground:
         self.frame_count = 0
         self.animation_speed = 100  # 毫秒，控制动画速度
         self.last_update = 0
-        
-        # 加载 GIF 帧
-        self.load_gif_frames(gif_path)
+        self.resample = Image.Resampling.LANCZOS
+        self.palette = palette
+        self.cache_dir = cache_dir
+        self._cache_map = None  # 缓存文件的内存映射，帧 Surface 直接引用其内存
+        if not load:
+            return
+
+        # 加载 GIF 帧：优先从磁盘缓存映射，缓存失效时重新解码并写入缓存
+        if not self.load_cached_frames(gif_path):
+            if self.load_gif_frames(gif_path):
+                self.save_cached_frames(gif_path)
         
     def load_gif_frames(self, gif_path):
-        """加载 GIF 的所有帧"""
+        """加载 GIF 的所有帧，失败时使用默认背景并返回 False"""
         try:
             with Image.open(gif_path) as gif:
                 self.frame_count = gif.n_frames
@@ -38,39 +60,46 @@ class GifBackground:
                 
                 for frame_idx in range(self.frame_count):
                     gif.seek(frame_idx)
-                    frame = gif.copy()
-                    
-                    # 转换为 RGB 模式
-                    if frame.mode in ('RGBA', 'LA', 'P'):
-                        # 创建黑色背景
-                        background = Image.new('RGB', frame.size, (0, 0, 0))
-                        if frame.mode == 'P':
-                            frame = frame.convert('RGBA')
-                        if frame.mode == 'RGBA':
-                            background.paste(frame, mask=frame.split()[-1])
-                        else:
-                            background.paste(frame)
-                        frame = background
-                    else:
-                        frame = frame.convert('RGB')
-                    
-                    # 调整尺寸以适应屏幕
-                    frame = self.resize_frame(frame)
-                    
-                    # 转换为 pygame Surface
-                    frame_str = frame.tobytes()
-                    frame_size = frame.size
-                    pygame_frame = pygame.image.fromstring(frame_str, frame_size, 'RGB')
-                    
-                    self.frames.append(pygame_frame)
+                    frame = self.prepare_frame(gif.copy())
+                    self.frames.append(self.frame_to_surface(frame))
                     
                 print(f"成功加载 {len(self.frames)} 帧")
+                return True
                 
         except Exception as e:
             print(f"加载 GIF 失败: {e}")
             # 创建默认背景
             self.create_default_background()
+            return False
     
+    def prepare_frame(self, frame):
+        """把一帧 GIF 合成到黑色背景上并缩放裁剪到屏幕尺寸，返回 RGB Image"""
+        # 转换为 RGB 模式
+        if frame.mode in ('RGBA', 'LA', 'P'):
+            # 创建黑色背景
+            background = Image.new('RGB', frame.size, (0, 0, 0))
+            if frame.mode == 'P':
+                frame = frame.convert('RGBA')
+            if frame.mode == 'RGBA':
+                background.paste(frame, mask=frame.split()[-1])
+            else:
+                background.paste(frame)
+            frame = background
+        else:
+            frame = frame.convert('RGB')
+
+        # 调整尺寸以适应屏幕
+        return self.resize_frame(frame)
+
+    def frame_to_surface(self, frame):
+        """RGB Image 转为 pygame Surface，调色板模式下先量化为 256 色"""
+        if not self.palette:
+            return pygame.image.fromstring(frame.tobytes(), frame.size, 'RGB')
+        indexed = frame.quantize(colors=256)
+        surface = pygame.image.fromstring(indexed.tobytes(), indexed.size, 'P')
+        surface.set_palette(palette_colors(indexed.getpalette()))
+        return surface
+
     def resize_frame(self, frame):
         """调整帧尺寸以适应屏幕"""
         img_width, img_height = frame.size
@@ -84,7 +113,7 @@ class GifBackground:
         new_height = int(img_height * scale)
         
         # 缩放
-        resized = frame.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        resized = frame.resize((new_width, new_height), self.resample)
         
         # 居中裁剪
         left = (new_width - self.screen_width) // 2
@@ -94,6 +123,93 @@ class GifBackground:
         
         return resized.crop((left, top, right, bottom))
     
+    def cache_path(self, gif_path):
+        """
+        缓存文件路径：{文件名}-{变体}-{内容哈希}.frames
+        变体由源文件路径、目标尺寸、缩放算法和调色板设置决定，内容哈希只取源文件内容；
+        同一变体只保留最新内容的缓存，不同尺寸、调色板设置的缓存互不影响
+        """
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1()
+        with open(gif_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        variant = hashlib.sha1(f"{os.path.abspath(gif_path)}:{self.screen_width}x{self.screen_height}:"
+                               f"{int(self.resample)}:{self.palette}".encode()).hexdigest()[:8]
+        name = os.path.splitext(os.path.basename(gif_path))[0]
+        return os.path.join(self.cache_dir, f"{name}-{variant}-{digest.hexdigest()[:16]}.frames")
+
+    def load_cached_frames(self, gif_path):
+        """从缓存文件内存映射加载帧（零拷贝），成功返回 True"""
+        try:
+            path = self.cache_path(gif_path)
+        except OSError:
+            return False
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                # ACCESS_COPY：写时复制，不会改动缓存文件
+                cache_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            magic, version, count, width, height, depth = CACHE_HEADER.unpack_from(cache_map)
+            pixel_bytes = width * height * depth
+            # 调色板模式下每帧先存 256 色调色板，再存像素索引
+            record_bytes = pixel_bytes + (PALETTE_BYTES if depth == 1 else 0)
+            if (magic != CACHE_MAGIC or version != CACHE_VERSION
+                    or (width, height) != (self.screen_width, self.screen_height)
+                    or depth != (1 if self.palette else 3)
+                    or len(cache_map) != CACHE_HEADER.size + count * record_bytes):
+                cache_map.close()
+                return False
+            view = memoryview(cache_map)
+            frames = []
+            for i in range(count):
+                start = CACHE_HEADER.size + i * record_bytes
+                if depth == 1:
+                    colors = palette_colors(view[start:start + PALETTE_BYTES])
+                    start += PALETTE_BYTES
+                    frame = pygame.image.frombuffer(view[start:start + pixel_bytes], (width, height), 'P')
+                    frame.set_palette(colors)
+                else:
+                    frame = pygame.image.frombuffer(view[start:start + pixel_bytes], (width, height), 'RGB')
+                frames.append(frame)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"读取 GIF 缓存失败: {e}")
+            return False
+        self._cache_map = cache_map
+        self.frames = frames
+        self.frame_count = count
+        print(f"从缓存加载 GIF: {path}, {count} 帧")
+        return True
+
+    def save_cached_frames(self, gif_path):
+        """把预处理好的帧写入缓存文件（先写临时文件再替换，避免半截文件）"""
+        if not self.cache_dir or not self.frames:
+            return
+        try:
+            path = self.cache_path(gif_path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 同一变体的旧缓存（源文件内容已变化）直接删除
+            prefix = os.path.basename(path).rsplit('-', 1)[0] + '-'
+            for old in os.listdir(self.cache_dir):
+                if old.startswith(prefix) and old.endswith('.frames'):
+                    os.remove(os.path.join(self.cache_dir, old))
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(self.frames),
+                                          self.screen_width, self.screen_height, 1 if self.palette else 3))
+                for frame in self.frames:
+                    if self.palette:
+                        f.write(bytes(c for color in frame.get_palette() for c in color[:3]))
+                        f.write(pygame.image.tostring(frame, 'P'))
+                    else:
+                        f.write(pygame.image.tostring(frame, 'RGB'))
+            os.replace(tmp_path, path)
+            print(f"GIF 帧已缓存: {path}")
+        except OSError as e:
+            print(f"写入 GIF 缓存失败: {e}")
+
     def create_default_background(self):
         """创建默认背景（当 GIF 加载失败时）"""
         default_bg = pygame.Surface((self.screen_width, self.screen_height))
@@ -101,25 +217,201 @@ class GifBackground:
         
         # 添加一些星星
         for _ in range(50):
-            x = pygame.math.Vector2().random() * self.screen_width
-            y = pygame.math.Vector2().random() * self.screen_height
-            pygame.draw.circle(default_bg, (255, 255, 255), (int(x), int(y)), 1)
+            x = random.randrange(self.screen_width)
+            y = random.randrange(self.screen_height)
+            pygame.draw.circle(default_bg, (255, 255, 255), (x, y), 1)
         
         self.frames = [default_bg]
         self.frame_count = 1
     
     def update(self):
-        """更新动画帧"""
+        """按系统时钟更新动画帧（轮询方式；游戏中由调度器定时调用 advance_frame）"""
         current_time = pygame.time.get_ticks()
         if current_time - self.last_update > self.animation_speed:
-            self.current_frame = (self.current_frame + 1) % self.frame_count
+            self.advance_frame()
             self.last_update = current_time
+
+    def advance_frame(self):
+        """切换到下一帧，返回是否切换成功"""
+        self.current_frame = (self.current_frame + 1) % self.frame_count
+        return True
     
+    def frame_surface(self):
+        """当前帧的 Surface，没有可用的帧时返回 None"""
+        return self.frames[self.current_frame] if self.frames else None
+
     def draw(self, screen):
         """绘制当前帧"""
-        if self.frames:
-            screen.blit(self.frames[self.current_frame], (0, 0))
+        frame = self.frame_surface()
+        if frame is not None:
+            screen.blit(frame, (0, 0))
+
+    def draw_area(self, screen, rect):
+        """只重绘当前帧中 rect 区域（脏矩形渲染用）"""
+        frame = self.frame_surface()
+        if frame is not None:
+            screen.blit(frame, rect, rect)
     
     def set_animation_speed(self, speed):
         """设置动画速度（毫秒）"""
         self.animation_speed = max(10, speed)  # 最小 10ms
+
+    def resident_frames(self):
+        """当前常驻内存的帧 Surface"""
+        return self.frames
+
+    def stop(self):
+        """释放后台资源（整体加载的背景没有后台线程）"""
+
+    def memory_report(self):
+        """帧占用的内存（字节）；缓存映射的帧由操作系统按需换入，单独标记"""
+        frames = self.resident_frames()
+        return {
+            'frames': len(frames),
+            'bytes': sum(frame_bytes(f) for f in frames),
+            'mapped': self._cache_map is not None,
+            'palette': self.palette,
+        }
+
+
+class StreamingGifBackground(GifBackground):
+    """
+    流式 GIF 背景
+    后台线程按顺序解码，在 current_frame 之前最多预先准备 buffer_frames 帧（环形缓冲），
+    已播放的帧立即释放，常驻内存与 GIF 长度无关
+    """
+
+    def __init__(self, gif_path, screen_width, screen_height, buffer_frames=8, palette=False):
+        """
+        :param buffer_frames: 环形缓冲的帧数（决定常驻内存）
+        :param palette: 为 True 时缓冲中的帧为 8 位调色板 Surface
+        """
+        super().__init__(gif_path, screen_width, screen_height, palette=palette, load=False)
+        self.buffer = {}  # 帧序号 -> Surface
+        self.stalls = 0  # 解码跟不上、沿用上一帧的次数
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self.buffer_frames = 0
+        try:
+            with Image.open(gif_path) as gif:
+                self.frame_count = gif.n_frames
+        except Exception as e:
+            print(f"加载 GIF 失败: {e}")
+            self.use_default_background()
+            return
+        self.buffer_frames = max(1, min(buffer_frames, self.frame_count - 1))
+        print(f"流式加载 GIF: {gif_path}, 帧数: {self.frame_count}, 缓冲 {self.buffer_frames} 帧")
+
+        self._thread = threading.Thread(target=self._decode_loop, args=(gif_path,), daemon=True)
+        self._thread.start()
+        # 等待第一帧就绪
+        with self._cond:
+            self._cond.wait_for(lambda: 0 in self.buffer or self._stopped, timeout=5)
+
+    def _ahead(self, index):
+        """index 在 current_frame 之后第几帧"""
+        return (index - self.current_frame) % self.frame_count
+
+    def _decode_loop(self, gif_path):
+        try:
+            with Image.open(gif_path) as gif:
+                index = 0
+                while True:
+                    with self._cond:
+                        # 缓冲已满时等待播放推进
+                        self._cond.wait_for(lambda: self._stopped or self._ahead(index) < self.buffer_frames)
+                        if self._stopped:
+                            return
+                    gif.seek(index)
+                    surface = self.frame_to_surface(self.prepare_frame(gif.copy()))
+                    with self._cond:
+                        self.buffer[index] = surface
+                        self._cond.notify_all()
+                    if self.frame_count <= 1:
+                        return  # 单帧 GIF 解码一次即可，不会再推进
+                    index = (index + 1) % self.frame_count
+        except Exception as e:
+            print(f"流式解码 GIF 失败: {e}")
+            self.use_default_background()
+
+    def use_default_background(self):
+        """GIF 无法读取时改用默认背景（单帧），并停止解码"""
+        with self._cond:
+            self.create_default_background()
+            self.buffer = {0: self.frames[0]}
+            self.frames = []
+            self.current_frame = 0
+            self._stopped = True
+            self._cond.notify_all()
+
+    def update(self):
+        """按系统时钟更新动画帧（轮询方式）；下一帧还没解码好时保持当前帧"""
+        current_time = pygame.time.get_ticks()
+        if current_time - self.last_update <= self.animation_speed:
+            return
+        self.last_update = current_time
+        self.advance_frame()
+
+    def advance_frame(self):
+        """切换到下一帧；下一帧还没解码好时保持当前帧并返回 False"""
+        if self.frame_count <= 1:
+            return True
+        next_frame = (self.current_frame + 1) % self.frame_count
+        with self._cond:
+            if next_frame not in self.buffer:
+                self.stalls += 1
+                return False
+            # 释放已播放的帧，唤醒解码线程补充
+            self.buffer.pop(self.current_frame, None)
+            self.current_frame = next_frame
+            self._cond.notify_all()
+        return True
+
+    def frame_surface(self):
+        """当前帧的 Surface，解码线程还没产出时返回 None"""
+        return self.buffer.get(self.current_frame)
+
+    def stop(self):
+        """停止后台解码线程"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def resident_frames(self):
+        with self._cond:
+            return list(self.buffer.values())
+
+    def memory_report(self):
+        report = super().memory_report()
+        report.update(buffer_frames=self.buffer_frames, stalls=self.stalls)
+        return report
+
+
+def palette_colors(data):
+    """把 PIL / 缓存中的扁平调色板字节转成 pygame 需要的 256 个 (r, g, b)"""
+    data = bytes(data)[:PALETTE_BYTES].ljust(PALETTE_BYTES, b'\0')
+    return [tuple(data[i:i + 3]) for i in range(0, PALETTE_BYTES, 3)]
+
+
+def frame_bytes(surface):
+    """Surface 像素数据占用的字节数"""
+    return surface.get_pitch() * surface.get_height()
+
+
+def load_background(gif_path, screen_width, screen_height, cache_dir=None, stream_frames=0, palette=False):
+    """
+    按配置创建 GIF 背景
+    :param stream_frames: 大于 0 时使用流式背景，环形缓冲为该帧数（缓冲装得下整个 GIF 时仍整体加载）
+    """
+    if stream_frames > 0:
+        try:
+            with Image.open(gif_path) as gif:
+                total = gif.n_frames
+        except Exception:
+            total = 0
+        if stream_frames < total:
+            return StreamingGifBackground(gif_path, screen_width, screen_height, stream_frames, palette)
+    return GifBackground(gif_path, screen_width, screen_height, cache_dir, palette)
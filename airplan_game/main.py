@@ -1,17 +1,40 @@
 # main.py - 答辩级飞机大战游戏
-import pygame
+import argparse
 import random
+import time
+import pygame
 import os
-from gif_background import GifBackground
 
-# 初始化
+STARTUP_TIME = time.perf_counter()  # 用于统计启动到首帧的耗时
+
+from gif_background import load_background
+import engine
+from engine import WIDTH, HEIGHT, GameState, Inputs, step
+from game_loop import FixedStepLoop
+from dirty_render import DirtyRenderer
+from text_cache import TextCache
+from replay import Replay, ReplayRecorder
+from profiler import FrameProfiler, ProfilerOverlay
+from particles import ParticleSystem
+from scheduler import Scheduler
+from assets import AssetManager, AssetJob, image_job
+import render_backend
+from render_backend import draw_rect
+import audio
+from audio import AudioEngine, SoundSpec
+import atlas
+import waves
+import netplay
+from capture import CaptureWriter
+
+# 初始化（混音器在 load_assets() 中按 --audio-buffer 初始化）
 pygame.init()
-pygame.mixer.init()
 
-# 屏幕设置
-WIDTH, HEIGHT = 480, 720
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("飞机大战 - 期中答辩项目")
+# 屏幕设置：窗口和渲染后端在 load_assets() 中按 --renderer 创建
+# screen 用于加载界面、菜单等整屏画面，游戏画面画在 backend.canvas 上
+CAPTION = "飞机大战 - 期中答辩项目"
+backend = None
+screen = None
 
 # 颜色
 WHITE = (255, 255, 255)
@@ -25,81 +48,83 @@ GREY = (40, 40, 40)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 IMG_DIR = os.path.join(BASE_DIR, 'assets', 'images')
 SND_DIR = os.path.join(BASE_DIR, 'assets', 'sounds')
-
-# 加载图片
-def load_image(name, scale=None, rotation=None):
-    img = pygame.image.load(os.path.join(IMG_DIR, name)).convert_alpha()
-    if scale:
-        img = pygame.transform.scale(img, scale)
-    if rotation:
-        img = pygame.transform.rotate(img, rotation)
-    return img
-
-background_img = load_image('background.png', (WIDTH, HEIGHT))
-menu_bg_img = load_image('plane_war_background.png', (WIDTH, HEIGHT))  # 菜单和结束界面背景
-gif_bg = GifBackground(os.path.join(IMG_DIR, 'preview.gif'), WIDTH, HEIGHT)  # 游戏中的动态GIF背景
-player_img = load_image('newair.png', (50, 40))
-enemy_img = load_image('player.png', (40, 30), 180)  # 敌机180度旋转
-bullet_img = load_image('bullet.png', (10, 20), 90)  # 子弹90度旋转
-shield_img = load_image('spr_shield.png', (60, 60))  # 护盾图片
-
-# 加载音效
-shoot_sound = pygame.mixer.Sound(os.path.join(SND_DIR, 'shoot.mp3'))
-explosion_sound = pygame.mixer.Sound(os.path.join(SND_DIR, 'explosion.mp3'))
-pygame.mixer.music.load(os.path.join(SND_DIR, 'background.ogg'))
-pygame.mixer.music.set_volume(0.3)
-pygame.mixer.music.play(-1)  # 循环播放
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')  # 预处理资源缓存（可随时删除）
+
+# 音效规则：开火声很密集，限制发声数并设冷却；爆炸声优先级更高，通道不够时抢占开火声
+SOUND_SPECS = (
+    SoundSpec('shoot', os.path.join(SND_DIR, 'shoot.mp3'), max_voices=3, cooldown_ms=60, priority=1),
+    SoundSpec('explosion', os.path.join(SND_DIR, 'explosion.mp3'), max_voices=4, cooldown_ms=30, priority=2),
+)
+
+# 资源：在 main() 中由 load_assets() 并行加载
+background_img = None
+menu_bg_img = None  # 菜单和结束界面背景
+gif_bg = None  # 游戏中的动态GIF背景
+player_img = None
+enemy_img = None
+bullet_img = None
+shield_img = None  # 护盾图片
+audio_engine = None  # 音效引擎（--mute 或没有音频设备时为静音后端）
+wave_table = None  # --waves 指定的刷怪表（加载时编译），None 为经典刷怪
 
 # 字体
 font_name = pygame.font.match_font('SimHei', 'Arial', 'sans-serif')  # 支持中文
 
-def draw_text(surf, text, size, x, y, color=WHITE):
-    font = pygame.font.Font(font_name, size)
-    text_surface = font.render(text, True, color)
-    text_rect = text_surface.get_rect()
-    text_rect.midtop = (x, y)
-    surf.blit(text_surface, text_rect)
+# 文字渲染缓存（字体、渲染结果和数字字形）
+text_cache = TextCache(font_name)
+
+# 空闲/低功耗：菜单和暂停时阻塞等待事件；窗口失去焦点时降低渲染帧率，最小化时自动暂停
+RENDER_FPS = 60
+UNFOCUSED_FPS = 15  # 不超过逻辑频率 / 追帧上限，失焦时逻辑仍按真实时间推进
+IDLE_WAIT_MS = 1000  # 阻塞等待的超时，期间仍能响应 Ctrl+C
+window_focused = True
+window_minimized = False
+pause_overlay = None  # 暂停叠层，首次暂停时创建
+
+# 分阶段耗时叠层（F3 切换），等宽字体便于对齐
+show_profiler = False
+profiler_overlay = ProfilerOverlay(pygame.font.Font(pygame.font.match_font('Consolas', 'DejaVu Sans Mono', 'monospace'), 14))
 
-# 缓存字体对象
-_font_cache = {}
+def draw_text(surf, text, size, x, y, color=WHITE):
+    return text_cache.draw(surf, text, size, (x, y), color)
 
 def draw_text_shadow(surf, text, size, x, y, color=WHITE, shadow_color=BLACK, offset=(2, 2)):
-    if size not in _font_cache:
-        _font_cache[size] = pygame.font.Font(font_name, size)
-    font = _font_cache[size]
-    shadow_surface = font.render(text, True, shadow_color)
-    text_surface = font.render(text, True, color)
-    shadow_rect = shadow_surface.get_rect()
-    shadow_rect.midtop = (x + offset[0], y + offset[1])
-    text_rect = text_surface.get_rect()
-    text_rect.midtop = (x, y)
-    surf.blit(shadow_surface, shadow_rect)
-    surf.blit(text_surface, text_rect)
+    return text_cache.draw(surf, text, size, (x, y), color, shadow_color, offset)
 
 def draw_health_bar(surf, x, y, w, h, percent):
     percent = max(0, min(100, percent))
     # 背景与边框
-    pygame.draw.rect(surf, GREY, (x, y, w, h), border_radius=6)
+    draw_rect(surf, GREY, (x, y, w, h), border_radius=6)
     inner_w = int(w * (percent / 100.0))
     bar_color = GREEN if percent > 50 else YELLOW if percent > 20 else RED
     if inner_w > 0:
-        pygame.draw.rect(surf, bar_color, (x, y, inner_w, h), border_radius=6)
-    pygame.draw.rect(surf, WHITE, (x, y, w, h), width=2, border_radius=6)
+        draw_rect(surf, bar_color, (x, y, inner_w, h), border_radius=6)
+    return draw_rect(surf, WHITE, (x, y, w, h), width=2, border_radius=6)
 
 def draw_score_top_right(surf, score, y=10):
-    text = f"得分: {score}"
-    font = pygame.font.Font(font_name, 22)
-    ts = font.render(text, True, WHITE)
-    rect = ts.get_rect()
-    rect.top = y
-    rect.right = WIDTH - 16
-    # 阴影
-    shadow = font.render(text, True, BLACK)
-    shadow_rect = shadow.get_rect()
-    shadow_rect.top = y + 2
-    shadow_rect.right = WIDTH - 16 + 2
-    surf.blit(shadow, shadow_rect)
-    surf.blit(ts, rect)
+    # 前缀整体缓存，分数逐位拼接缓存字形（带阴影）
+    return text_cache.draw_number(surf, "得分: ", score, 22, (WIDTH - 16, y), WHITE, BLACK)
+
+def track_window_event(event):
+    """记录窗口焦点与最小化状态"""
+    global window_focused, window_minimized
+    if event.type == pygame.WINDOWFOCUSLOST:
+        window_focused = False
+    elif event.type == pygame.WINDOWFOCUSGAINED:
+        window_focused = True
+    elif event.type == pygame.WINDOWMINIMIZED:
+        window_minimized = True
+    elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWMAXIMIZED):
+        window_minimized = False
+
+def wait_event():
+    """阻塞等待下一个事件，超时返回 NOEVENT；等待期间几乎不占 CPU"""
+    event = pygame.event.wait(IDLE_WAIT_MS)
+    track_window_event(event)
+    if event.type == pygame.WINDOWCLOSE:
+        # 纹理后端另有隐藏窗口，关闭游戏窗口时 SDL 不会发出 QUIT
+        return pygame.event.Event(pygame.QUIT)
+    return event
 
 def show_menu():
     screen.blit(menu_bg_img, (0, 0))
@@ -108,322 +133,387 @@ def show_menu():
     draw_text_shadow(screen, "S键激活护盾 · P暂停/继续", 22, WIDTH//2, HEIGHT//2 + 10)
     draw_text_shadow(screen, "每300分获得护盾(最多3个)", 18, WIDTH//2, HEIGHT//2 + 40)
     draw_text_shadow(screen, "按任意键开始", 28, WIDTH//2, HEIGHT*3//4)
-    pygame.display.flip()
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if event.type == pygame.KEYUP:
-                waiting = False
-
-# 玩家飞机
-class Player(pygame.sprite.Sprite):
-    def __init__(self):
-        super().__init__()
-        self.image = player_img
-        self.rect = self.image.get_rect()
-        self.rect.centerx = WIDTH // 2
-        self.rect.bottom = HEIGHT - 10
-        self.speed = 8
-        self.health = 100
-        self.shield_active = False
-        self.shield_duration = 0
-        self.shield_max_duration = 300  # 护盾持续5秒（60fps * 5）
-        self.shield_count = 0  # 存储的护盾数量
-
-    def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and self.rect.left > 0:
-            self.rect.x -= self.speed
-        if keys[pygame.K_RIGHT] and self.rect.right < WIDTH:
-            self.rect.x += self.speed
-        
-        # 护盾更新
-        if self.shield_active:
-            self.shield_duration -= 1
-            if self.shield_duration <= 0:
-                self.shield_active = False
-    
-    def activate_shield(self):
-        """激活护盾"""
-        if self.shield_count > 0 and not self.shield_active:
-            self.shield_active = True
-            self.shield_duration = self.shield_max_duration
-            self.shield_count -= 1  # 消耗一个护盾
-            return True
-        return False
-    
-    def add_shield(self):
-        """获得一个护盾"""
-        if self.shield_count < 3:  # 最多存储3个护盾
-            self.shield_count += 1
-    
-    def draw_shield(self, screen):
-        """绘制护盾"""
-        if self.shield_active:
-            # 获取护盾图片的尺寸
-            shield_width, shield_height = shield_img.get_size()
-            # 创建护盾矩形，以飞机中心为中心
-            shield_rect = pygame.Rect(0, 0, shield_width, shield_height)
-            shield_rect.center = self.rect.center
-            screen.blit(shield_img, shield_rect)
-
-# 敌机
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self):
-        super().__init__()
-        self.image = enemy_img
-        self.rect = self.image.get_rect()
-        self.rect.x = random.randint(0, WIDTH - self.rect.width)
-        self.rect.y = random.randint(-100, -40)
-        self.speed = random.randint(1, 3)  # 降低敌机飞行速度
-        self.last_shot = 0
-        self.shoot_delay = random.randint(2000, 4000)  # 2-4秒随机射击间隔
-        self.has_shot_on_spawn = False  # 是否已经在出现时射击过
-
-    def update(self):
-        self.rect.y += self.speed
-        if self.rect.top > HEIGHT:
-            self.rect.x = random.randint(0, WIDTH - self.rect.width)
-            self.rect.bottom = 0
-            self.has_shot_on_spawn = False  # 重置射击标志
-    
-    def can_shoot(self):
-        """检查是否可以射击"""
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_shot > self.shoot_delay:
-            self.last_shot = current_time
-            return True
-        return False
-    
-    def should_shoot_on_spawn(self):
-        """检查是否应该在出现时射击"""
-        if not self.has_shot_on_spawn and self.rect.y > -50 and self.rect.y < 50:
-            self.has_shot_on_spawn = True
-            return True
-        return False
-
-# 子弹
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = bullet_img
-        self.rect = self.image.get_rect()
-        self.rect.centerx = x
-        self.rect.bottom = y
-        self.speed = 10
-
-    def update(self):
-        self.rect.y -= self.speed
-        if self.rect.bottom < 0:
-            self.kill()
-
-# 敌机子弹
-class EnemyBullet(pygame.sprite.Sprite):
-    def __init__(self, x, y):
-        super().__init__()
-        self.image = bullet_img
-        self.rect = self.image.get_rect()
-        self.rect.centerx = x
-        self.rect.bottom = y + 20  # 从敌机下方20像素处发射，避免贴在一起
-        self.speed = 8  # 增加敌机子弹速度
-
-    def update(self):
-        self.rect.y += self.speed
-        if self.rect.top > HEIGHT:
-            self.kill()
-
-# 游戏主函数
-def main_game():
-    all_sprites = pygame.sprite.Group()
-    enemies = pygame.sprite.Group()
-    bullets = pygame.sprite.Group()
-    enemy_bullets = pygame.sprite.Group()
-
-    player = Player()
-    all_sprites.add(player)
-
-    # 创建初始敌机（6个）
-    for _ in range(6):
-        enemy = Enemy()
-        all_sprites.add(enemy)
-        enemies.add(enemy)
-
-    score = 0
-    running = True
-    paused = False
-    last_shield_score = 0  # 上次获得护盾的分数
-
-    # 进度/升级
-    player_level = 1
-    kill_count = 0
-    level_threshold_per_level = 10  # 每级需要的击杀数
-    base_enemy_count = 6  # 基础敌机数量
-
-    def spawn_bullets_for_level(center_x, top_y, level):
-        # 按等级发射多枚直线子弹（横向散开）
-        if level <= 1:
-            offsets = [0]
-        elif level == 2:
-            offsets = [-8, 8]
-        elif level == 3:
-            offsets = [-14, 0, 14]
-        elif level == 4:
-            offsets = [-20, -7, 7, 20]
+    backend.present_screen()
+    while True:
+        event = wait_event()
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            exit()
+        if event.type == pygame.KEYUP:
+            return
+
+def lerp_rect(sprite, prev_positions, alpha):
+    """按插值系数计算精灵在上一逻辑帧与当前逻辑帧之间的绘制位置"""
+    rect = sprite.rect
+    prev = prev_positions.get(sprite)
+    # 新生成或瞬移（敌机回到顶部）的精灵不插值
+    if prev is None or abs(rect.y - prev[1]) > 50 or abs(rect.x - prev[0]) > 50:
+        return rect
+    return rect.move(round((prev[0] - rect.x) * (1 - alpha)),
+                     round((prev[1] - rect.y) * (1 - alpha)))
+
+def draw_sprites(surf, sprites, prev_positions, alpha, doreturn=False):
+    """插值绘制精灵组，doreturn 为 True 时返回各精灵绘制区域"""
+    return surf.blits([(s.image, lerp_rect(s, prev_positions, alpha)) for s in sprites], doreturn=doreturn)
+
+def draw_shield(surf, player_rect):
+    """绘制护盾"""
+    # 获取护盾图片的尺寸
+    shield_width, shield_height = shield_img.get_size()
+    # 创建护盾矩形，以飞机中心为中心
+    shield_rect = pygame.Rect(0, 0, shield_width, shield_height)
+    shield_rect.center = player_rect.center
+    return surf.blit(shield_img, shield_rect)
+
+def read_inputs():
+    """读取本帧事件与按键，转换为引擎输入；收到退出事件时返回 None"""
+    global show_profiler
+    fire = shield = pause = False
+    for event in pygame.event.get():
+        track_window_event(event)
+        if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
+            return None
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                fire = True
+            if event.key == pygame.K_p:
+                pause = True
+            if event.key == pygame.K_s:
+                shield = True
+            if event.key == pygame.K_F3:
+                show_profiler = not show_profiler
+    keys = pygame.key.get_pressed()
+    return Inputs(left=keys[pygame.K_LEFT], right=keys[pygame.K_RIGHT],
+                  fire=fire, shield=shield, pause=pause)
+
+def play_event_sounds(events):
+    """根据引擎事件播放音效"""
+    if 'shoot' in events:
+        audio_engine.play('shoot')
+    if 'explosion' in events:
+        audio_engine.play('explosion')
+
+def spawn_effects(particles, state):
+    """按引擎本逻辑帧的表现事件生成粒子（击毁爆炸、护盾破碎、受击火花），并喷出玩家引擎尾焰"""
+    for kind, x, y in state.effects:
+        if kind == 'explosion':
+            particles.explosion(x, y)
+        elif kind == 'shield_break':
+            particles.shield_break(x, y)
+        elif kind == 'player_hit':
+            particles.hit_sparks(x, y)
+    if state.running and not state.paused:
+        particles.trail(state.player.rect.centerx, state.player.rect.bottom)
+
+def get_pause_overlay():
+    """暂停时的半透明遮罩，只创建一次"""
+    global pause_overlay
+    if pause_overlay is None:
+        pause_overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        pause_overlay.fill((0, 0, 0, 140))
+    return pause_overlay
+
+def draw_game(surf, state, prev_positions=None, alpha=1.0, track_sprites=False, particles=None):
+    """
+    绘制一帧游戏画面（不含背景），prev_positions/alpha 用于渲染插值
+    :param track_sprites: 为 True 时返回值包含每个精灵的绘制区域（脏矩形模式）
+    :param particles: ParticleSystem，画在精灵之上、护盾和 HUD 之下
+    :return: 本帧绘制过的区域列表
+    """
+    player = state.player
+    prof = state.profiler
+    prev_positions = prev_positions or {}
+    player_rect = lerp_rect(player, prev_positions, alpha)
+    touched = []
+
+    sprite_rects = draw_sprites(surf, state.all_sprites, prev_positions, alpha, track_sprites)
+    if track_sprites:
+        touched.extend(sprite_rects)
+    if state.array_projectiles:
+        # 数组池中的子弹一次批量绘制
+        for pool in (state.bullets, state.enemy_bullets):
+            pool_rects = pool.draw(surf, bullet_img, alpha, track_sprites)
+            if track_sprites:
+                touched.extend(pool_rects)
+    if particles is not None:
+        particle_rects = particles.draw(surf, track_sprites)
+        if track_sprites:
+            touched.extend(particle_rects)
+    if prof:
+        prof.lap('sprites')
+
+    # 绘制护盾
+    if player.shield_active:
+        touched.append(draw_shield(surf, player_rect))
+
+    # HUD：右上角得分
+    touched.append(draw_score_top_right(surf, state.score, y=10))
+
+    # 护盾状态显示
+    if player.shield_active:
+        shield_percent = (player.shield_duration / player.shield_max_duration) * 100
+        touched.append(draw_health_bar(surf, 200, 16, 160, 12, shield_percent))
+        touched.append(draw_text_shadow(surf, "护盾激活", 16, 200 + 40, 30, (0, 200, 255)))
+
+    # 护盾数量显示
+    if player.shield_count > 0:
+        touched.append(draw_text_shadow(surf, f"护盾: {player.shield_count}", 16, 70, 50, (0, 255, 0)))
+        touched.append(draw_text_shadow(surf, "按S键激活", 14, 70, 70, (255, 255, 0)))
+
+    # 飞机下方进度条
+    progress_x = player_rect.centerx - 30
+    progress_y = player_rect.bottom + 5
+    progress_width = 60
+    progress_height = 6
+
+    # 进度条背景
+    draw_rect(surf, GREY, (progress_x, progress_y, progress_width, progress_height), border_radius=3)
+
+    # 进度条填充（基于护盾状态或血量）
+    if player.shield_active:
+        shield_progress = (player.shield_duration / player.shield_max_duration) * progress_width
+        draw_rect(surf, (0, 200, 255), (progress_x, progress_y, shield_progress, progress_height), border_radius=3)
+    else:
+        health_progress = (player.health / 100) * progress_width
+        bar_color = GREEN if player.health > 50 else YELLOW if player.health > 20 else RED
+        draw_rect(surf, bar_color, (progress_x, progress_y, health_progress, progress_height), border_radius=3)
+
+    # 进度条边框
+    touched.append(draw_rect(surf, WHITE, (progress_x, progress_y, progress_width, progress_height), width=1, border_radius=3))
+
+    # 等级显示（在飞机上方）
+    level_x = player_rect.centerx
+    level_y = player_rect.top - 25
+    touched.append(draw_text_shadow(surf, f"L{state.player_level}", 18, level_x, level_y, (255, 255, 0)))  # 黄色等级显示
+
+    # 暂停叠层
+    if state.paused:
+        touched.append(surf.blit(get_pause_overlay(), (0, 0)))
+        draw_text_shadow(surf, "已暂停", 48, WIDTH//2, HEIGHT//2 - 40)
+        draw_text_shadow(surf, "按 P 继续", 24, WIDTH//2, HEIGHT//2 + 10)
+
+    # 分阶段耗时叠层
+    if prof and show_profiler:
+        touched.append(profiler_overlay.draw(surf, prof))
+    if prof:
+        prof.lap('hud')
+
+    return touched
+
+def report_stats(loop, dirty=None, prof=None, particles=None):
+    """一局结束时输出帧时间等统计"""
+    print(f"帧时间统计: {loop.stats}")
+    if prof:
+        print(f"分阶段平均耗时: {prof}")
+    print(f"文字缓存: {text_cache.stats()}")
+    print(f"音效统计: {audio_engine.stats()}")
+    print(f"渲染后端: {backend.stats()}")
+    if particles is not None:
+        print(f"粒子统计: {particles.stats()}")
+    if dirty:
+        print(f"脏矩形统计: {dirty.stats()}")
+
+def finish_game(state, loop, dirty, recorder, replay, options, particles=None, capture=None):
+    """一局结束：输出统计，保存录像或报告回放校验结果，导出帧分析数据，写完录屏文件"""
+    report_stats(loop, dirty, state.profiler, particles)
+    if capture:
+        print(f"录屏已保存: {options.capture} {capture.close()}")
+    if state.wave_director:
+        print(f"波次统计: {state.wave_director.stats()}")
+    if options.profile_out:
+        state.profiler.export(options.profile_out)
+    if recorder:
+        recorder.save(options.record)
+    if replay:
+        if replay.mismatch is None:
+            print(f"回放校验通过（{replay.position}/{len(replay)} 帧）")
         else:
-            offsets = [-24, -12, 0, 12, 24]
-        created = []
-        for dx in offsets:
-            b = Bullet(center_x + dx, top_y)
-            created.append(b)
-        return created
-
-    while running:
-        # 事件处理
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return 'quit'
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and not paused:
-                    new_bullets = spawn_bullets_for_level(player.rect.centerx, player.rect.top, player_level)
-                    for b in new_bullets:
-                        all_sprites.add(b)
-                        bullets.add(b)
-                    shoot_sound.play()
-                if event.key == pygame.K_p:
-                    paused = not paused
-                if event.key == pygame.K_s and not paused:
-                    # 按S键激活护盾
-                    if player.activate_shield():
-                        pass  # 护盾激活成功
-
-        # 更新（暂停时不更新）
-        if not paused:
-            all_sprites.update()
-            gif_bg.update()  # 更新GIF背景动画
-            
-            # 敌机射击
-            for enemy in enemies:
-                # 敌机一出现就发射炮弹，或者按正常间隔射击
-                if (enemy.should_shoot_on_spawn() or enemy.can_shoot()) and enemy.rect.y > -100:
-                    enemy_bullet = EnemyBullet(enemy.rect.centerx, enemy.rect.bottom)
-                    all_sprites.add(enemy_bullet)
-                    enemy_bullets.add(enemy_bullet)
-
-        # 子弹击中敌机（暂停时不判定）
-        if not paused:
-            hits = pygame.sprite.groupcollide(enemies, bullets, True, True)
-            if hits:
-                destroyed = len(hits)
-                explosion_sound.play()
-                score += 10 * destroyed
-                kill_count += destroyed
-                
-                # 护盾获得：每300分获得一个护盾
-                if score >= last_shield_score + 300:
-                    player.add_shield()
-                    last_shield_score = score
-                
-                # 升级判定：达到每级阈值则升级，提升子弹数量
-                while kill_count >= player_level * level_threshold_per_level and player_level < 5:
-                    player_level += 1
-                # 按分数增加敌机数量（每50分+1个，最多12个）
-                current_enemy_target = min(12, base_enemy_count + int(score // 50))
-                for _ in range(destroyed):
-                    enemy = Enemy()
-                    all_sprites.add(enemy)
-                    enemies.add(enemy)
-                # 如果目标数量大于当前数量，补充敌机
-                while len(enemies) < current_enemy_target:
-                    enemy = Enemy()
-                    all_sprites.add(enemy)
-                    enemies.add(enemy)
-
-        # 玩家与敌机碰撞（暂停时不判定）
-        if not paused and pygame.sprite.spritecollide(player, enemies, True):
-            if player.shield_active:
-                # 护盾状态下不受伤害，但护盾消失
-                player.shield_active = False
-                player.shield_duration = 0
-            else:
-                player.health -= 30
-                if player.health <= 0:
-                    running = False
-        
-        # 玩家与敌机子弹碰撞（暂停时不判定）
-        if not paused:
-            bullet_hits = pygame.sprite.spritecollide(player, enemy_bullets, True)
-            for hit in bullet_hits:
-                if player.shield_active:
-                    # 护盾状态下不受伤害，但护盾消失
-                    player.shield_active = False
-                    player.shield_duration = 0
-                else:
-                    player.health -= 15  # 子弹伤害较小
-                    if player.health <= 0:
-                        running = False
-
-        # 绘制
-        gif_bg.draw(screen)  # 绘制动态GIF背景
-        all_sprites.draw(screen)
-        
-        # 绘制护盾
-        player.draw_shield(screen)
-        
-        # HUD：右上角得分
-        draw_score_top_right(screen, score, y=10)
-        
-        # 护盾状态显示
-        if player.shield_active:
-            shield_percent = (player.shield_duration / player.shield_max_duration) * 100
-            draw_health_bar(screen, 200, 16, 160, 12, shield_percent)
-            draw_text_shadow(screen, "护盾激活", 16, 200 + 40, 30, (0, 200, 255))
-        
-        # 护盾数量显示
-        if player.shield_count > 0:
-            draw_text_shadow(screen, f"护盾: {player.shield_count}", 16, 70, 50, (0, 255, 0))
-            draw_text_shadow(screen, "按S键激活", 14, 70, 70, (255, 255, 0))
-        
-        # 飞机下方进度条
-        progress_x = player.rect.centerx - 30
-        progress_y = player.rect.bottom + 5
-        progress_width = 60
-        progress_height = 6
-        
-        # 进度条背景
-        pygame.draw.rect(screen, GREY, (progress_x, progress_y, progress_width, progress_height), border_radius=3)
-        
-        # 进度条填充（基于护盾状态或血量）
-        if player.shield_active:
-            shield_progress = (player.shield_duration / player.shield_max_duration) * progress_width
-            pygame.draw.rect(screen, (0, 200, 255), (progress_x, progress_y, shield_progress, progress_height), border_radius=3)
+            print(f"回放校验失败：第 {replay.mismatch} 帧状态哈希不一致")
+
+# 游戏主函数：引擎负责逻辑，这里只负责输入、音效与绘制
+def main_game(options):
+    # 回放时使用录像的种子和输入；否则使用指定或随机的种子，便于录制后复现
+    replay = Replay(options.replay) if options.replay else None
+    if replay:
+        state = replay.new_state()
+    else:
+        seed = options.seed if options.seed is not None else random.randrange(2 ** 32)
+        state = GameState(seed=seed, array_projectiles=options.array_projectiles,
+                          pixel_collisions=not options.rect_collisions, waves=wave_table)
+    recorder = (ReplayRecorder(state.seed, state.array_projectiles, pixel_collisions=state.pixel_collisions,
+                               waves=wave_table if state.wave_director else None)
+                if options.record else None)
+    state.profiler = prof = FrameProfiler(options.profile_frames)
+    loop = FixedStepLoop(step_hz=engine.STEP_HZ, render_fps=RENDER_FPS)
+    loop.resync()  # 菜单等待的时间不算作第一帧
+    # 脏矩形只对 surface 后端有意义（纹理后端每帧整屏提交绘制命令）
+    dirty = DirtyRenderer(gif_bg) if options.dirty_rects and backend.name == 'surface' else None
+    particles = ParticleSystem(options.particles)
+    # 录屏：每帧复制窗口像素，编码在后台线程
+    capture = CaptureWriter(options.capture, backend.frame_buffer(), options.capture_fps) if options.capture else None
+    pending = Inputs()  # 尚未被逻辑帧消费的输入
+    prev_positions = {}
+
+    # 背景动画按游戏内毫秒定时切帧，暂停时时钟不走，恢复后不会跳帧
+    bg_timers = Scheduler()
+    def next_bg_frame():
+        # 流式解码跟不上时，下一渲染帧再试
+        bg_timers.schedule_in(gif_bg.animation_speed if gif_bg.advance_frame() else 1, next_bg_frame)
+    bg_timers.schedule(gif_bg.animation_speed, next_bg_frame)
+
+    while state.running:
+        prof.begin_frame()
+        steps = loop.advance()
+        prof.lap('wait')
+        inputs = read_inputs()
+        prof.lap('events')
+        if inputs is None:
+            finish_game(state, loop, dirty, recorder, replay, options, particles, capture)
+            return 'quit'
+        pending = pending.merge(inputs)
+        if window_minimized and not state.paused and not replay:
+            pending = pending.merge(Inputs(pause=True))  # 最小化时自动暂停（作为输入录入录像）
+        loop.set_render_fps(RENDER_FPS if window_focused else UNFOCUSED_FPS)
+
+        # 固定步长推进逻辑，渲染慢时一帧内追多步
+        for i in range(steps):
+            if i == steps - 1:
+                prev_positions = {s: s.rect.topleft for s in state.all_sprites}
+            step_inputs = replay.next_inputs() if replay else pending
+            play_event_sounds(step(state, step_inputs))
+            spawn_effects(particles, state)
+            pending = pending.held()
+            if recorder:
+                recorder.record(step_inputs, state)
+            if replay:
+                replay.verify(state)
+                if replay.finished:
+                    state.running = False
+            if not state.running:
+                break
+        if not state.paused:
+            particles.update(steps * loop.step_ms)
+        prof.lap('logic')
+        if not state.paused:
+            bg_timers.advance(bg_timers.now + steps * loop.step_ms)  # 更新GIF背景动画
+
+        if dirty:
+            # 脏矩形模式：只重绘上一帧画过的区域下的背景，只提交变化区域
+            dirty.begin(screen)
+            prof.lap('background')
+            rects = draw_game(screen, state, prev_positions, loop.alpha, track_sprites=True, particles=particles)
+            if capture:
+                capture.grab(screen)
+            dirty.end(rects)
         else:
-            health_progress = (player.health / 100) * progress_width
-            bar_color = GREEN if player.health > 50 else YELLOW if player.health > 20 else RED
-            pygame.draw.rect(screen, bar_color, (progress_x, progress_y, health_progress, progress_height), border_radius=3)
-        
-        # 进度条边框
-        pygame.draw.rect(screen, WHITE, (progress_x, progress_y, progress_width, progress_height), width=1, border_radius=3)
-        
-        # 等级显示（在飞机上方）
-        level_x = player.rect.centerx
-        level_y = player.rect.top - 25
-        draw_text_shadow(screen, f"L{player_level}", 18, level_x, level_y, (255, 255, 0))  # 黄色等级显示
-
-        # 暂停叠层
-        if paused:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 140))
-            screen.blit(overlay, (0, 0))
-            draw_text_shadow(screen, "已暂停", 48, WIDTH//2, HEIGHT//2 - 40)
-            draw_text_shadow(screen, "按 P 继续", 24, WIDTH//2, HEIGHT//2 + 10)
-
-        pygame.display.flip()
-        pygame.time.Clock().tick(60)
-
-    return 'game_over', score
+            backend.draw_background(gif_bg)  # 绘制动态GIF背景
+            prof.lap('background')
+            draw_game(backend.canvas, state, prev_positions, loop.alpha, particles=particles)
+            if capture:
+                # 在 present 之前读取画面（之后后备缓冲内容不确定），未到录制间隔时不读回
+                capture.grab(backend.frame_buffer)
+            backend.present()
+        prof.lap('flip')
+        prof.end_frame(steps=steps, all_sprites=len(state.all_sprites), enemies=len(state.enemies),
+                       bullets=len(state.bullets), enemy_bullets=len(state.enemy_bullets),
+                       particles=len(particles))
+
+        if state.paused and not replay:
+            # 暂停画面已经画好：阻塞等待下一个事件，放回队列交给下一帧处理
+            event = wait_event()
+            while event.type == pygame.NOEVENT:
+                event = wait_event()
+            pygame.event.post(event)
+            loop.resync()
+
+    finish_game(state, loop, dirty, recorder, replay, options, particles, capture)
+    return 'game_over', state.score
+
+def draw_coop(surf, view, slot):
+    """合作模式：按插值后的快照绘制敌机、子弹和所有玩家，自己的飞机标为黄色"""
+    surf.blits([(enemy_img, pos) for pos in view.enemies], doreturn=False)
+    surf.blits([(bullet_img, pos) for pos in view.bullets + view.enemy_bullets], doreturn=False)
+    own = None
+    for i, (x, y, health, shield_count, flags, shield_percent) in enumerate(view.players):
+        if not flags & netplay.PLAYER_ALIVE:
+            continue
+        rect = surf.blit(player_img, (x, y))
+        if flags & netplay.PLAYER_SHIELD:
+            draw_shield(surf, rect)
+        # 飞机下方血量条，上方玩家编号
+        draw_rect(surf, GREY, (rect.centerx - 30, rect.bottom + 5, 60, 6), border_radius=3)
+        bar_color = GREEN if health > 50 else YELLOW if health > 20 else RED
+        draw_rect(surf, bar_color, (rect.centerx - 30, rect.bottom + 5, min(health, 100) / 100 * 60, 6),
+                  border_radius=3)
+        draw_text_shadow(surf, f"P{i + 1}", 18, rect.centerx, rect.top - 25, YELLOW if i == slot else WHITE)
+        if i == slot:
+            own = (shield_count, flags, shield_percent)
+
+    draw_score_top_right(surf, view.score, y=10)
+    draw_text_shadow(surf, f"L{view.level}", 18, 30, 20, (255, 255, 0))
+    if own:
+        shield_count, flags, shield_percent = own
+        if flags & netplay.PLAYER_SHIELD:
+            draw_health_bar(surf, 200, 16, 160, 12, shield_percent)
+        if shield_count > 0:
+            draw_text_shadow(surf, f"护盾: {shield_count}", 16, 70, 50, (0, 255, 0))
+    elif view.running:
+        draw_text_shadow(surf, "你已被击落，队友仍在战斗", 24, WIDTH//2, HEIGHT//2)
+
+def draw_lobby(text):
+    screen.fill((10, 10, 30))
+    draw_text_shadow(screen, "合作模式", 64, WIDTH//2, HEIGHT//4, (0, 200, 255))
+    draw_text_shadow(screen, text, 24, WIDTH//2, HEIGHT//2)
+    backend.present_screen()
+
+# 合作模式客户端：逻辑由服务器运行，这里只发送输入并绘制插值后的快照
+def main_coop(options):
+    host, _, port = options.connect.partition(':')
+    client = netplay.CoopClient(host or 'localhost', int(port or netplay.DEFAULT_PORT),
+                                options.session, options.players)
+    client.start()
+    loop = FixedStepLoop(step_hz=engine.STEP_HZ, render_fps=RENDER_FPS)
+    pending = Inputs()
+    score = 0
+    while True:
+        steps = loop.advance()
+        inputs = read_inputs()
+        if inputs is None:
+            break
+        pending = pending.merge(inputs)
+        # 每个逻辑帧发送一次输入（按下事件合并到下一次发送）
+        for _ in range(steps):
+            client.send_inputs(pending)
+            if pending.fire:
+                audio_engine.play('shoot')
+            pending = pending.held()
+
+        view = client.view()
+        if client.error:
+            print(f"合作模式: {client.error}")
+            draw_lobby(client.error)
+            wait_event()
+            return 'quit'
+        if view is None:
+            if client.closed:
+                draw_lobby("与服务器的连接已断开")
+                wait_event()
+                return 'quit'
+            joined, size = client.lobby
+            draw_lobby(f"等待玩家加入 {joined}/{size or options.players}" if client.slot is not None else "连接中...")
+            continue
+        score = view.score
+        gif_bg.update()
+        backend.draw_background(gif_bg)
+        draw_coop(backend.canvas, view, client.slot)
+        backend.present()
+        if not view.running or client.closed:
+            break
+
+    client.close()
+    print(f"帧时间统计: {loop.stats}")
+    print(f"合作模式网络统计: {client.stats()}")
+    return 'quit' if inputs is None else ('game_over', score)
 
 # 游戏结束界面
 def show_game_over(score):
@@ -431,32 +521,146 @@ def show_game_over(score):
     draw_text_shadow(screen, "游戏结束", 64, WIDTH//2, HEIGHT//4)
     draw_text_shadow(screen, f"得分: {score}", 32, WIDTH//2, HEIGHT//2)
     draw_text_shadow(screen, "按 R 重新开始 · Q 退出", 24, WIDTH//2, HEIGHT*3//4)
-    pygame.display.flip()
+    backend.present_screen()
 
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    while True:
+        event = wait_event()
+        if event.type == pygame.QUIT:
+            return 'quit'
+        if event.type == pygame.KEYUP:
+            if event.key == pygame.K_r:
+                return 'restart'
+            if event.key == pygame.K_q:
                 return 'quit'
-            if event.type == pygame.KEYUP:
-                if event.key == pygame.K_r:
-                    return 'restart'
-                if event.key == pygame.K_q:
-                    return 'quit'
 
-# 主循环
-def main():
-    while True:
-        show_menu()
-        result = main_game()
-        if result == 'quit':
-            break
-        score = result[1] if isinstance(result, tuple) else 0
-        action = show_game_over(score)
-        if action == 'quit':
-            break
+def parse_args(argv=None):
+    """命令行选项"""
+    parser = argparse.ArgumentParser(description="飞机大战")
+    parser.add_argument('--array-projectiles', action='store_true',
+                        help="子弹使用 NumPy 数组池（大量子弹时更快）")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="脏矩形渲染，只更新变化区域（适合软件渲染的机器）")
+    parser.add_argument('--bg-stream', type=int, default=0, metavar='N',
+                        help="GIF 背景流式解码，只缓冲 N 帧（0 表示整体加载）")
+    parser.add_argument('--bg-palette', action='store_true',
+                        help="GIF 背景帧以 8 位调色板保存，约省 2/3 内存")
+    parser.add_argument('--rect-collisions', action='store_true',
+                        help="只用矩形判定碰撞（默认矩形相交后再做像素级检测）")
+    parser.add_argument('--seed', type=int, default=None, help="随机种子（默认随机）")
+    parser.add_argument('--record', metavar='FILE', help="录制本局输入到文件")
+    parser.add_argument('--replay', metavar='FILE', help="回放录像（忽略键盘输入）")
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help="退出时导出分阶段帧耗时（.json 为 Chrome trace，.csv 为表格）")
+    parser.add_argument('--profile-frames', type=int, default=600, metavar='N',
+                        help="帧分析环形缓冲保留的帧数")
+    parser.add_argument('--audio-buffer', type=int, default=audio.DEFAULT_BUFFER, metavar='N',
+                        help="混音器缓冲区样本数（越小延迟越低，过小可能爆音）")
+    parser.add_argument('--mute', action='store_true', help="静音（不初始化音频设备）")
+    parser.add_argument('--particles', type=int, default=1500, metavar='N',
+                        help="同时存在的粒子上限（0 关闭粒子效果）")
+    parser.add_argument('--renderer', choices=render_backend.RENDERERS, default='surface',
+                        help="渲染后端：surface 软件 blit；texture SDL2 纹理（优先 GPU）；software SDL2 软件渲染器")
+    parser.add_argument('--waves', nargs='?', const=waves.DEFAULT_WAVES, metavar='FILE',
+                        help="按波次文件刷怪（不带文件名时使用 assets/waves.json，默认经典刷怪）")
+    parser.add_argument('--capture', metavar='FILE',
+                        help="录屏到文件（帧间差分压缩，python capture.py play/gif 回放或导出 GIF）")
+    parser.add_argument('--capture-fps', type=float, default=30, metavar='N', help="录屏帧率上限")
+    parser.add_argument('--connect', metavar='HOST[:PORT]',
+                        help="加入合作模式服务器（netplay.py server），默认端口 8765")
+    parser.add_argument('--session', default='default', help="合作模式会话名，同名的玩家进入同一局")
+    parser.add_argument('--players', type=int, default=2, choices=range(2, netplay.MAX_PLAYERS + 1),
+                        help="创建会话时的人数（人齐后开始）")
+    return parser.parse_args(argv)
+
+def draw_loading(done, total, name):
+    """加载界面：进度条 + 最近完成的资源名"""
+    pygame.event.pump()  # 保持窗口响应
+    screen.fill((10, 10, 30))
+    draw_text_shadow(screen, "飞机大战", 64, WIDTH//2, HEIGHT//4, (0, 200, 255))
+    draw_text_shadow(screen, f"加载中... {done}/{total}", 24, WIDTH//2, HEIGHT//2 - 40)
+    draw_health_bar(screen, WIDTH//2 - 150, HEIGHT//2, 300, 16, done / max(1, total) * 100)
+    if name:
+        draw_text_shadow(screen, name, 16, WIDTH//2, HEIGHT//2 + 30, (180, 180, 180))
+    backend.present_screen()
+
+def load_assets(options):
+    """在线程池中并行加载图片、音效和GIF背景，期间显示加载界面，结束后输出耗时明细"""
+    global background_img, menu_bg_img, gif_bg, player_img, enemy_img, bullet_img, shield_img
+    global audio_engine, backend, screen, wave_table
+
+    if backend is None:
+        backend = render_backend.create_backend(options.renderer, (WIDTH, HEIGHT), CAPTION)
+        screen = backend.screen
+    # 没有音频设备时退回静音后端
+    mixer_ok = not options.mute and audio.init_mixer(options.audio_buffer)
+    audio_engine = AudioEngine(SOUND_SPECS, silent=not mixer_ok)
+
+    manager = AssetManager()
+    manager.add(image_job('background', os.path.join(IMG_DIR, 'background.png'), (WIDTH, HEIGHT)))
+    manager.add(image_job('menu_bg', os.path.join(IMG_DIR, 'plane_war_background.png'), (WIDTH, HEIGHT)))
+    # 精灵：优先使用 build_atlas.py 生成的图集（一张图片，已缩放/旋转），否则逐个加载源图片
+    atlas_index = atlas.load_index()
+    use_atlas = atlas.atlas_is_current(atlas_index)
+    if use_atlas:
+        manager.add(atlas.atlas_job('sprites', index=atlas_index))
+    else:
+        for name, (source, scale, rotation) in atlas.SPRITE_SPECS.items():
+            manager.add(image_job(name, os.path.join(IMG_DIR, source), scale, rotation))
+    for job in audio_engine.jobs(CACHE_DIR):
+        manager.add(job)
+    manager.add(AssetJob('gif_background', lambda: load_background(
+        os.path.join(IMG_DIR, 'preview.gif'), WIDTH, HEIGHT, CACHE_DIR,
+        stream_frames=options.bg_stream, palette=options.bg_palette)))
+    if options.waves:
+        manager.add(AssetJob('waves', lambda: waves.load_waves(options.waves)))
+    assets = manager.load_all(draw_loading)
+    sprites = assets['sprites'] if use_atlas else assets
+
+    background_img = assets['background']
+    menu_bg_img = assets['menu_bg']
+    gif_bg = assets['gif_background']
+    player_img = sprites['player']
+    enemy_img = sprites['enemy']
+    bullet_img = sprites['bullet']
+    shield_img = sprites['shield']
+    wave_table = assets.get('waves')
+    engine.set_images(player=player_img, enemy=enemy_img, bullet=bullet_img)
+    backend.preload([player_img, enemy_img, bullet_img, shield_img])
+
+    # 背景音乐为流式播放，直接在主线程加载
+    if mixer_ok:
+        pygame.mixer.music.load(os.path.join(SND_DIR, 'background.ogg'))
+        pygame.mixer.music.set_volume(0.3)
+        pygame.mixer.music.play(-1)  # 循环播放
+
+    print(manager.report())
+    print(f"渲染后端: {backend.name}")
+    if wave_table is not None:
+        print(f"刷怪表: {options.waves}, {wave_table.summary()}")
+    print("精灵来源: " + ("图集 " + atlas.ATLAS_IMAGE if use_atlas else "源图片（可运行 build_atlas.py 生成图集）"))
+    mem = gif_bg.memory_report()
+    print(f"GIF 背景内存: {mem['frames']} 帧, {mem['bytes'] / 1024 / 1024:.1f} MB"
+          f"{'（磁盘缓存映射）' if mem['mapped'] else ''}")
+    print(f"启动到资源就绪: {(time.perf_counter() - STARTUP_TIME) * 1000:.0f}ms")
 
+# 主循环
+def main(options=None):
+    options = options or parse_args([])
+    load_assets(options)
+    try:
+        while True:
+            show_menu()
+            result = main_coop(options) if options.connect else main_game(options)
+            if result == 'quit':
+                break
+            score = result[1] if isinstance(result, tuple) else 0
+            action = show_game_over(score)
+            if action == 'quit':
+                break
+    finally:
+        # 菜单中关闭窗口时 exit() 也经过这里，先停止背景解码线程
+        gif_bg.stop()
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
@@ -0,0 +1,843 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+局域网合作模式（2-4 人）
+asyncio 权威服务器：每个会话是一局多玩家的 GameState，所有会话在同一个逻辑帧循环里推进；
+客户端只发送输入，服务器每隔几个逻辑帧发送一份二进制快照。快照相对客户端最近确认的那一份做差分：
+敌机按编号只发送新增、消失和偏离预测（匀速下落）的部分，子弹按匀速直线预测后只发送新增和消失的，
+较大的差分再用 zlib 压缩；客户端缓存快照，在两份快照之间插值显示
+用法:
+  python netplay.py server [--host 0.0.0.0] [--port 8765]
+  python netplay.py bench [--sessions 25] [--players 4] [--seconds 10]   回环压力测试，输出带宽与逻辑帧耗时
+  python main.py --connect 主机[:端口] [--session 名字] [--players N]
+"""
+
+import asyncio
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+
+from engine import (BULLET_SPEED, DEFAULT_SIZES, ENEMY_BULLET_SPEED, HEIGHT, NO_INPUT, STEP_HZ, TICK_MS,
+                    GameState, Inputs, step)
+from game_loop import FrameStats
+from replay import PAUSE, bullet_positions, decode_inputs, encode_inputs
+
+PROTOCOL_MAGIC = b'APCO'
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 8765
+MAX_PLAYERS = 4
+SEND_EVERY = 3  # 每 3 个逻辑帧发送一次快照（20Hz）
+HISTORY = 64  # 服务器为差分保留、客户端为解码保留的快照数量
+INTERP_TICKS = 2 * SEND_EVERY  # 客户端显示落后服务器的逻辑帧数，保证总有两份快照可以插值
+SEND_BUFFER_LIMIT = 64 * 1024  # 客户端发送缓冲积压超过该字节数时跳过本次快照
+COMPRESS_MIN = 96  # 差分超过该字节数才尝试 zlib
+
+# 消息：长度（不含消息头）、类型
+FRAME = struct.Struct('<IB')
+MSG_HELLO, MSG_WELCOME, MSG_LOBBY, MSG_INPUT, MSG_SNAPSHOT, MSG_ERROR = range(1, 7)
+HELLO = struct.Struct('<4sHB')  # 魔数、版本、会话人数，后接会话名（UTF-8）
+WELCOME = struct.Struct('<BBQB')  # 玩家序号、会话人数、随机种子、快照间隔
+LOBBY = struct.Struct('<BB')  # 已加入人数、会话人数
+INPUT = struct.Struct('<IIB')  # 输入序号、确认的快照编号、输入位（replay.encode_inputs）
+SNAPSHOT = struct.Struct('<IIB')  # 快照编号、差分基准编号（0 为完整快照）、标志位
+
+# 快照内容
+HEAD = struct.Struct('<IiBBB')  # 逻辑帧、得分、等级、状态标志、玩家数
+PLAYER = struct.Struct('<hhhBBB')  # 左上角坐标、血量、护盾数、玩家标志、护盾剩余百分比
+COUNTS = struct.Struct('<HHH')  # 消失、偏离预测、新增的敌机数
+PAIR_COUNTS = struct.Struct('<HH')  # 消失、新增的子弹数
+SNAP_COMPRESSED = 1
+STATE_RUNNING = 1
+PLAYER_ALIVE, PLAYER_SHIELD = 1, 2
+
+BULLET_HEIGHT = DEFAULT_SIZES['bullet'][1]  # 服务器无头运行，子弹尺寸即默认尺寸
+
+
+class Snapshot:
+    """一份用于显示的状态快照；enemies 为 {编号: (x, y, 速度)}，子弹为左上角坐标的有序列表"""
+
+    __slots__ = ('id', 'tick', 'score', 'level', 'flags', 'players', 'enemies', 'bullets', 'enemy_bullets')
+
+    def __init__(self, snapshot_id=0, tick=0, score=0, level=1, flags=0, players=(), enemies=None,
+                 bullets=(), enemy_bullets=()):
+        self.id = snapshot_id
+        self.tick = tick
+        self.score = score
+        self.level = level
+        self.flags = flags
+        self.players = list(players)
+        self.enemies = enemies if enemies is not None else {}
+        self.bullets = list(bullets)
+        self.enemy_bullets = list(enemy_bullets)
+
+    @property
+    def running(self):
+        return bool(self.flags & STATE_RUNNING)
+
+
+EMPTY = Snapshot()
+
+
+class EnemyIds:
+    """给敌机分配网络编号；对象池复用的敌机（generation 变化）视为新敌机"""
+
+    def __init__(self):
+        self.next_id = 1
+        self.ids = {}
+
+    def get(self, enemy):
+        entry = self.ids.get(enemy)
+        if entry is None or entry[0] != enemy.generation:
+            entry = self.ids[enemy] = (enemy.generation, self.next_id)
+            self.next_id += 1
+        return entry[1]
+
+
+def _int16(value):
+    return max(-32768, min(32767, int(value)))
+
+
+def capture(state, ids, snapshot_id):
+    """从游戏状态生成快照"""
+    players = []
+    for player in state.players:
+        flags = ((PLAYER_ALIVE if player.alive() else 0)
+                 | (PLAYER_SHIELD if player.shield_active else 0))
+        players.append((player.rect.x, player.rect.y, _int16(player.health), player.shield_count, flags,
+                        player.shield_duration * 100 // player.shield_max_duration))
+    return Snapshot(snapshot_id, state.tick, state.score, state.player_level,
+                    STATE_RUNNING if state.running else 0, players,
+                    {ids.get(e): (e.rect.x, e.rect.y, e.speed) for e in state.enemies},
+                    sorted(bullet_positions(state.bullets)), sorted(bullet_positions(state.enemy_bullets)))
+
+
+def predict_bullets(bullets, dt):
+    """玩家子弹匀速上升 dt 个逻辑帧后的位置，飞出顶部的剔除（与 Bullet.update 相同）"""
+    dy = BULLET_SPEED * dt
+    return [(x, y - dy) for x, y in bullets if y - dy + BULLET_HEIGHT >= 0]
+
+
+def predict_enemy_bullets(bullets, dt):
+    """敌机子弹匀速下落 dt 个逻辑帧后的位置，飞出底部的剔除（与 EnemyBullet.update 相同）"""
+    dy = ENEMY_BULLET_SPEED * dt
+    return [(x, y + dy) for x, y in bullets if y + dy <= HEIGHT]
+
+
+def _pack_pairs(pairs):
+    flat = [v for pair in pairs for v in pair]
+    return struct.pack(f'<{len(flat)}h', *flat)
+
+
+def _unpack_pairs(data, offset, count):
+    flat = struct.unpack_from(f'<{count * 2}h', data, offset)
+    return list(zip(flat[0::2], flat[1::2])), offset + count * 4
+
+
+def _bullet_delta(current, predicted):
+    """子弹差分：预测中有而实际没有的为消失，反之为新增（按多重集合比较）"""
+    cur, pred = Counter(current), Counter(predicted)
+    removed = sorted((pred - cur).elements())
+    added = sorted((cur - pred).elements())
+    return PAIR_COUNTS.pack(len(removed), len(added)) + _pack_pairs(removed) + _pack_pairs(added)
+
+
+def _apply_bullet_delta(predicted, data, offset):
+    n_removed, n_added = PAIR_COUNTS.unpack_from(data, offset)
+    removed, offset = _unpack_pairs(data, offset + PAIR_COUNTS.size, n_removed)
+    added, offset = _unpack_pairs(data, offset, n_added)
+    bullets = Counter(predicted)
+    bullets.subtract(removed)
+    bullets.update(added)
+    return sorted(bullets.elements()), offset
+
+
+def encode_delta(cur, base=EMPTY):
+    """
+    快照相对 base 的差分（base 为 EMPTY 时即完整快照）
+    :return: 未压缩的字节串
+    """
+    dt = cur.tick - base.tick
+    out = bytearray(HEAD.pack(cur.tick, cur.score, cur.level, cur.flags, len(cur.players)))
+    for player in cur.players:
+        out += PLAYER.pack(*player)
+
+    removed = [eid for eid in base.enemies if eid not in cur.enemies]
+    changed, added = [], []
+    for eid, (x, y, speed) in cur.enemies.items():
+        old = base.enemies.get(eid)
+        if old is None:
+            added.append((eid, x, y, speed))
+        elif old[0] != x or old[1] + old[2] * dt != y or old[2] != speed:
+            # 敌机回到顶部、速度变化等偏离匀速预测的情况
+            changed.append((eid, x, y, speed))
+    out += COUNTS.pack(len(removed), len(changed), len(added))
+    out += struct.pack(f'<{len(removed)}I', *removed)
+    for record in changed:
+        out += struct.pack('<Ihhb', *record)
+    for record in added:
+        out += struct.pack('<Ihhb', *record)
+
+    out += _bullet_delta(cur.bullets, predict_bullets(base.bullets, dt))
+    out += _bullet_delta(cur.enemy_bullets, predict_enemy_bullets(base.enemy_bullets, dt))
+    return bytes(out)
+
+
+def decode_delta(data, base=EMPTY, snapshot_id=0):
+    """encode_delta 的逆过程"""
+    tick, score, level, flags, n_players = HEAD.unpack_from(data)
+    offset = HEAD.size
+    players = []
+    for _ in range(n_players):
+        players.append(PLAYER.unpack_from(data, offset))
+        offset += PLAYER.size
+    dt = tick - base.tick
+
+    n_removed, n_changed, n_added = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    removed = set(struct.unpack_from(f'<{n_removed}I', data, offset))
+    offset += 4 * n_removed
+    enemies = {eid: (x, y + speed * dt, speed) for eid, (x, y, speed) in base.enemies.items()
+               if eid not in removed}
+    for _ in range(n_changed + n_added):
+        eid, x, y, speed = struct.unpack_from('<Ihhb', data, offset)
+        offset += 9
+        enemies[eid] = (x, y, speed)
+
+    bullets, offset = _apply_bullet_delta(predict_bullets(base.bullets, dt), data, offset)
+    enemy_bullets, offset = _apply_bullet_delta(predict_enemy_bullets(base.enemy_bullets, dt), data, offset)
+    return Snapshot(snapshot_id, tick, score, level, flags, players, enemies, bullets, enemy_bullets)
+
+
+SNAPSHOT_HEADER = FRAME.size + SNAPSHOT.size  # 一条快照消息的消息头字节数
+
+
+def pack_snapshot(cur, base=EMPTY):
+    """快照消息体：差分超过 COMPRESS_MIN 字节且压缩后更小时用 zlib，返回 (消息体, 未压缩长度)"""
+    raw = encode_delta(cur, base)
+    flags = 0
+    body = raw
+    if len(raw) >= COMPRESS_MIN:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            body, flags = packed, SNAP_COMPRESSED
+    return SNAPSHOT.pack(cur.id, base.id, flags) + body, len(raw)
+
+
+def unpack_snapshot(payload, history):
+    """
+    解码快照消息
+    :param history: {编号: Snapshot}，差分基准从这里取
+    """
+    snapshot_id, base_id, flags = SNAPSHOT.unpack_from(payload)
+    body = payload[SNAPSHOT.size:]
+    if flags & SNAP_COMPRESSED:
+        body = zlib.decompress(body)
+    base = history[base_id] if base_id else EMPTY
+    return decode_delta(body, base, snapshot_id)
+
+
+# ---- 消息收发 ----
+
+def frame(msg_type, payload=b''):
+    return FRAME.pack(len(payload), msg_type) + payload
+
+
+async def read_message(reader):
+    """读取一条消息，返回 (类型, 内容)；连接关闭时抛出 IncompleteReadError"""
+    length, msg_type = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return msg_type, await reader.readexactly(length)
+
+
+class NetStats:
+    """带宽与快照统计"""
+
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.raw_bytes = 0  # 快照差分数据压缩前的字节数
+        self.payload_bytes = 0  # 快照差分数据实际发送的字节数（压缩后，不含消息头）
+        self.header_bytes = 0  # 快照的 FRAME + SNAPSHOT 消息头字节数
+        self.snapshot_bytes = 0  # 快照实际发送的总字节数（含消息头）
+        self.full = 0
+        self.delta = 0
+        self.skipped = 0  # 客户端积压而跳过的快照
+        self.inputs = 0
+
+    def summary(self, seconds, clients):
+        snapshots = max(1, self.full + self.delta)
+        return {
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'kbps_out_per_client': round(self.bytes_out * 8 / 1000 / max(seconds, 1e-9) / max(1, clients), 2),
+            'snapshots_full': self.full,
+            'snapshots_delta': self.delta,
+            'snapshots_skipped': self.skipped,
+            'snapshot_mean_bytes': round(self.snapshot_bytes / snapshots, 1),
+            'snapshot_header_bytes': self.header_bytes,
+            'compression_ratio': round(self.payload_bytes / max(1, self.raw_bytes), 3),
+            'inputs': self.inputs,
+        }
+
+
+# ---- 服务器 ----
+
+class Peer:
+    """服务器端的一个玩家连接"""
+
+    def __init__(self, writer, slot):
+        self.writer = writer
+        self.slot = slot
+        self.pending = Inputs()  # 尚未被逻辑帧消费的输入
+        self.ack = 0  # 客户端确认收到的最新快照
+
+    def send(self, data, stats):
+        self.writer.write(data)
+        stats.bytes_out += len(data)
+
+    def backlogged(self):
+        transport = self.writer.transport
+        return transport.is_closing() or transport.get_write_buffer_size() > SEND_BUFFER_LIMIT
+
+
+class Session:
+    """一局合作游戏：人齐后开始，所有玩家倒下或全部断开时结束"""
+
+    def __init__(self, name, size, seed, send_every=SEND_EVERY, waves=None, player_health=None):
+        """
+        :param size: 玩家人数
+        :param waves: 刷怪表（waves.WaveTable），None 为经典刷怪
+        :param player_health: 覆盖玩家血量（压力测试中玩家不死）
+        """
+        self.name = name
+        self.size = size
+        self.seed = seed
+        self.send_every = send_every
+        self.waves = waves
+        self.player_health = player_health
+        self.peers = [None] * size
+        self.state = None
+        self.ids = EnemyIds()
+        self.history = OrderedDict()
+        self.next_snapshot = 1
+        self.step_ms = 0.0
+        self.ticks = 0
+
+    @property
+    def joined(self):
+        return sum(peer is not None for peer in self.peers)
+
+    @property
+    def started(self):
+        return self.state is not None
+
+    def join(self, writer):
+        slot = self.peers.index(None)
+        peer = self.peers[slot] = Peer(writer, slot)
+        return peer
+
+    def leave(self, peer):
+        if self.peers[peer.slot] is peer:
+            self.peers[peer.slot] = None
+
+    def broadcast(self, data, stats):
+        for peer in self.peers:
+            if peer is not None:
+                peer.send(data, stats)
+
+    def start(self):
+        self.state = GameState(seed=self.seed, pixel_collisions=False, waves=self.waves, players=self.size)
+        if self.player_health is not None:
+            for player in self.state.players:
+                player.health = self.player_health
+
+    def tick(self, stats):
+        """推进一个逻辑帧，到发送间隔时向所有玩家发送快照"""
+        state = self.state
+        inputs = [peer.pending if peer else NO_INPUT for peer in self.peers]
+        start = time.perf_counter()
+        step(state, inputs)
+        self.step_ms += (time.perf_counter() - start) * 1000
+        self.ticks += 1
+        for peer in self.peers:
+            if peer:
+                peer.pending = peer.pending.held()
+        if state.tick % self.send_every == 0 or not state.running:
+            self.send_snapshot(stats)
+
+    def send_snapshot(self, stats):
+        snap = capture(self.state, self.ids, self.next_snapshot)
+        self.next_snapshot += 1
+        self.history[snap.id] = snap
+        while len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+        encoded = {}  # 确认到同一份快照的玩家共用差分结果
+        for peer in self.peers:
+            if peer is None:
+                continue
+            if peer.backlogged() and snap.running:
+                stats.skipped += 1
+                continue
+            base = self.history.get(peer.ack, EMPTY)
+            cached = encoded.get(base.id)
+            if cached is None:
+                payload, raw_len = pack_snapshot(snap, base)
+                cached = encoded[base.id] = frame(MSG_SNAPSHOT, payload), raw_len
+            message, raw_len = cached
+            if base is EMPTY:
+                stats.full += 1
+            else:
+                stats.delta += 1
+            # 压缩率只按差分数据计算，消息头单独统计
+            stats.raw_bytes += raw_len
+            stats.payload_bytes += len(message) - SNAPSHOT_HEADER
+            stats.header_bytes += SNAPSHOT_HEADER
+            stats.snapshot_bytes += len(message)
+            peer.send(message, stats)
+
+
+class CoopServer:
+    """合作模式服务器：接受连接、按会话名分组，在一个协程中按固定逻辑帧推进所有会话"""
+
+    def __init__(self, send_every=SEND_EVERY, waves=None, seed=None, player_health=None):
+        self.send_every = send_every
+        self.waves = waves
+        self.rng = random.Random(seed)
+        self.player_health = player_health
+        self.sessions = {}
+        self.stats = NetStats()
+        self.tick_stats = FrameStats(TICK_MS, window=3600)  # 每个逻辑帧推进全部会话的耗时
+        self.finished_sessions = 0
+        self.peak_sessions = 0
+        self.peak_clients = 0
+        self._server = None
+
+    async def start(self, host='0.0.0.0', port=DEFAULT_PORT):
+        """开始监听，返回实际端口（port 为 0 时由系统分配）"""
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for session in self.sessions.values():
+            for peer in session.peers:
+                if peer:
+                    peer.writer.close()
+
+    async def run(self, stop=None):
+        """固定步长推进所有会话，直到 stop（asyncio.Event）被设置"""
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while stop is None or not stop.is_set():
+            start = time.perf_counter()
+            self.tick()
+            self.tick_stats.record((time.perf_counter() - start) * 1000)
+            next_time += TICK_MS / 1000
+            delay = next_time - loop.time()
+            if delay < -0.25:
+                # 落后太多时放弃追赶
+                self.tick_stats.skipped_steps += int(-delay * STEP_HZ)
+                next_time = loop.time()
+                delay = 0
+            await asyncio.sleep(max(0.0, delay))
+
+    def tick(self):
+        for session in list(self.sessions.values()):
+            if not session.started:
+                continue
+            session.tick(self.stats)
+            if not session.state.running:
+                # 所有玩家倒下：最后一份快照已发出，关闭连接
+                for peer in session.peers:
+                    if peer:
+                        peer.writer.close()
+                self.end_session(session)
+
+    def end_session(self, session):
+        """移除会话；同名的新会话可能已经替换了它，只移除仍登记着的这一个"""
+        if self.sessions.get(session.name) is session:
+            del self.sessions[session.name]
+            self.finished_sessions += 1
+
+    def clients(self):
+        return sum(session.joined for session in self.sessions.values())
+
+    async def handle_client(self, reader, writer):
+        session = peer = None
+        stats = self.stats
+        try:
+            msg_type, payload = await read_message(reader)
+            stats.bytes_in += FRAME.size + len(payload)
+            if msg_type != MSG_HELLO or len(payload) < HELLO.size:
+                return
+            magic, version, size = HELLO.unpack_from(payload)
+            name = payload[HELLO.size:].decode('utf-8', 'replace')
+            if magic != PROTOCOL_MAGIC or version != PROTOCOL_VERSION:
+                writer.write(frame(MSG_ERROR, "协议版本不一致".encode()))
+                return
+            if not 2 <= size <= MAX_PLAYERS:
+                writer.write(frame(MSG_ERROR, f"人数应为 2-{MAX_PLAYERS}".encode()))
+                return
+            session = self.sessions.get(name)
+            if session is None:
+                session = self.sessions[name] = Session(name, size, self.rng.randrange(2 ** 32),
+                                                        self.send_every, self.waves, self.player_health)
+                self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+            elif session.started or session.joined >= session.size:
+                session = None
+                writer.write(frame(MSG_ERROR, f"会话 {name} 已开始或已满".encode()))
+                return
+            peer = session.join(writer)
+            self.peak_clients = max(self.peak_clients, self.clients())
+            peer.send(frame(MSG_WELCOME, WELCOME.pack(peer.slot, session.size, session.seed,
+                                                      session.send_every)), stats)
+            session.broadcast(frame(MSG_LOBBY, LOBBY.pack(session.joined, session.size)), stats)
+            if session.joined == session.size:
+                session.start()
+
+            while True:
+                msg_type, payload = await read_message(reader)
+                stats.bytes_in += FRAME.size + len(payload)
+                if msg_type == MSG_INPUT:
+                    _, ack, bits = INPUT.unpack(payload)
+                    # 合作模式不能单方面暂停
+                    peer.pending = peer.pending.merge(decode_inputs(bits & ~PAUSE))
+                    peer.ack = max(peer.ack, ack)
+                    stats.inputs += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if session is not None and peer is not None:
+                session.leave(peer)
+                if session.joined == 0:
+                    self.end_session(session)
+                elif not session.started:
+                    session.broadcast(frame(MSG_LOBBY, LOBBY.pack(session.joined, session.size)), stats)
+            writer.close()
+
+    def summary(self, seconds):
+        sessions = [s for s in self.sessions.values() if s.started]
+        step_ms = sum(s.step_ms for s in sessions) / max(1, sum(s.ticks for s in sessions))
+        return {
+            'sessions': len(self.sessions),
+            'peak_sessions': self.peak_sessions,
+            'peak_clients': self.peak_clients,
+            'finished_sessions': self.finished_sessions,
+            'tick': self.tick_stats.summary(),
+            'session_step_mean_ms': round(step_ms, 4),
+            **self.stats.summary(seconds, self.peak_clients),
+        }
+
+
+# ---- 客户端 ----
+
+class CoopConnection:
+    """客户端连接（asyncio）：发送输入，接收并解码快照"""
+
+    def __init__(self):
+        self.reader = self.writer = None
+        self.snapshots = OrderedDict()  # 最近收到的快照 {编号: Snapshot}
+        self.latest = None
+        self.slot = None
+        self.size = 0
+        self.seed = None
+        self.send_every = SEND_EVERY
+        self.lobby = (0, 0)
+        self.error = None
+        self.closed = False
+        self.seq = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def connect(self, host, port, session='default', players=2):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._write(frame(MSG_HELLO, HELLO.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION, players) + session.encode()))
+
+    def _write(self, data):
+        if self.writer is not None and not self.writer.is_closing():
+            self.writer.write(data)
+            self.bytes_out += len(data)
+
+    def send_inputs(self, inputs):
+        """发送本逻辑帧的输入，同时确认最新收到的快照"""
+        self.seq += 1
+        ack = self.latest.id if self.latest else 0
+        self._write(frame(MSG_INPUT, INPUT.pack(self.seq, ack, encode_inputs(inputs))))
+
+    async def receive(self, on_snapshot=None):
+        """接收消息直到连接关闭；on_snapshot(snapshot) 在每份快照解码后调用"""
+        try:
+            while True:
+                msg_type, payload = await read_message(self.reader)
+                self.bytes_in += FRAME.size + len(payload)
+                if msg_type == MSG_SNAPSHOT:
+                    snap = unpack_snapshot(payload, self.snapshots)
+                    self.snapshots[snap.id] = snap
+                    while len(self.snapshots) > HISTORY:
+                        self.snapshots.popitem(last=False)
+                    self.latest = snap
+                    if on_snapshot:
+                        on_snapshot(snap)
+                elif msg_type == MSG_WELCOME:
+                    self.slot, self.size, self.seed, self.send_every = WELCOME.unpack(payload)
+                elif msg_type == MSG_LOBBY:
+                    self.lobby = LOBBY.unpack(payload)
+                elif msg_type == MSG_ERROR:
+                    self.error = payload.decode('utf-8', 'replace')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed = True
+            self.close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class View:
+    """插值后的显示内容：坐标均为左上角"""
+
+    __slots__ = ('tick', 'score', 'level', 'running', 'players', 'enemies', 'bullets', 'enemy_bullets')
+
+    def __init__(self, tick, score, level, running, players, enemies, bullets, enemy_bullets):
+        self.tick = tick
+        self.score = score
+        self.level = level
+        self.running = running
+        self.players = players
+        self.enemies = enemies
+        self.bullets = bullets
+        self.enemy_bullets = enemy_bullets
+
+
+def _lerp(a, b, t):
+    return round(a + (b - a) * t)
+
+
+def interpolate(a, b, render_tick):
+    """
+    在快照 a、b 之间按逻辑帧插值
+    敌机按编号插值（新出现的等到 b 再显示，回到顶部的直接跳到 b）；子弹从 a 按速度外推
+    """
+    span = b.tick - a.tick
+    t = min(1.0, max(0.0, (render_tick - a.tick) / span)) if span > 0 else 1.0
+    dt = t * span
+    players = []
+    for pa, pb in zip(a.players, b.players):
+        players.append((_lerp(pa[0], pb[0], t), _lerp(pa[1], pb[1], t)) + tuple(pb[2:]))
+    enemies = []
+    for eid, (x, y, _) in a.enemies.items():
+        target = b.enemies.get(eid)
+        if target is None or target[1] < y:
+            enemies.append((x, y))
+        else:
+            enemies.append((_lerp(x, target[0], t), _lerp(y, target[1], t)))
+    bullets = [(x, round(y)) for x, y in predict_bullets(a.bullets, dt)]
+    enemy_bullets = [(x, round(y)) for x, y in predict_enemy_bullets(a.enemy_bullets, dt)]
+    return View(round(a.tick + dt), b.score, b.level, b.running, players, enemies, bullets, enemy_bullets)
+
+
+class CoopClient:
+    """
+    供 pygame 主循环使用的客户端：连接在后台线程的事件循环中运行，
+    主线程调用 send_inputs() 发送输入、view() 取插值后的显示内容
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, session='default', players=2, delay_ticks=INTERP_TICKS):
+        """:param delay_ticks: 显示落后服务器的逻辑帧数"""
+        self.host = host
+        self.port = port
+        self.session = session
+        self.players = players
+        self.delay_ticks = delay_ticks
+        self.conn = CoopConnection()
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.frames = []  # 按逻辑帧排序的最近几份快照
+        self.clock_offset = None  # 本地时间（逻辑帧）与服务器逻辑帧之差，平滑后用于估算服务器时间
+
+    def start(self):
+        self.thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True)
+        self.thread.start()
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        try:
+            await self.conn.connect(self.host, self.port, self.session, self.players)
+        except OSError as e:
+            self.conn.error = f"无法连接 {self.host}:{self.port}: {e}"
+            self.conn.closed = True
+            return
+        await self.conn.receive(self._on_snapshot)
+
+    def _on_snapshot(self, snap):
+        offset = time.perf_counter() * STEP_HZ - snap.tick
+        with self.lock:
+            if self.clock_offset is None or offset < self.clock_offset:
+                self.clock_offset = offset  # 到得早的快照说明之前的估计偏大
+            else:
+                self.clock_offset += (offset - self.clock_offset) * 0.05
+            self.frames.append(snap)
+            if len(self.frames) > 8:
+                del self.frames[0]
+
+    @property
+    def slot(self):
+        return self.conn.slot
+
+    @property
+    def lobby(self):
+        return self.conn.lobby
+
+    @property
+    def error(self):
+        return self.conn.error
+
+    @property
+    def closed(self):
+        return self.conn.closed
+
+    def send_inputs(self, inputs):
+        if self.loop is not None and not self.conn.closed:
+            self.loop.call_soon_threadsafe(self.conn.send_inputs, inputs)
+
+    def view(self):
+        """当前应显示的内容，尚未收到快照时为 None"""
+        with self.lock:
+            frames = list(self.frames)
+            offset = self.clock_offset
+        if not frames:
+            return None
+        render_tick = time.perf_counter() * STEP_HZ - offset - self.delay_ticks
+        a = b = frames[-1]
+        if not frames[-1].running:
+            return interpolate(a, b, b.tick)  # 结束画面
+        for older, newer in zip(frames, frames[1:]):
+            if newer.tick >= render_tick:
+                a, b = older, newer
+                break
+        return interpolate(a, b, render_tick)
+
+    def stats(self):
+        return {'bytes_in': self.conn.bytes_in, 'bytes_out': self.conn.bytes_out,
+                'snapshots': self.latest_id(), 'inputs': self.conn.seq}
+
+    def latest_id(self):
+        return self.conn.latest.id if self.conn.latest else 0
+
+    def close(self):
+        if self.loop is not None and not self.conn.closed:
+            self.loop.call_soon_threadsafe(self.conn.close)
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+
+# ---- 回环压力测试 ----
+
+async def run_bot(host, port, session, players, stop, seed):
+    """模拟一名玩家：每个逻辑帧发送随机输入，返回连接统计"""
+    rng = random.Random(seed)
+    conn = CoopConnection()
+    await conn.connect(host, port, session, players)
+    receiver = asyncio.create_task(conn.receive())
+    direction = 0.5
+    tick = 0
+    while not stop.is_set() and not conn.closed:
+        if tick % 30 == 0:
+            direction = rng.random()
+        conn.send_inputs(Inputs(left=direction < 0.4, right=direction > 0.6, fire=tick % 6 == 0,
+                                shield=rng.random() < 0.002))
+        tick += 1
+        await asyncio.sleep(TICK_MS / 1000)
+    conn.close()
+    await receiver
+    return conn
+
+
+async def bench(sessions=25, players=4, seconds=10.0, send_every=SEND_EVERY, waves=None, verify=True):
+    """
+    在本进程中启动服务器和 sessions * players 个模拟玩家，全部走回环连接
+    :param verify: 结束时校验每个客户端最新快照与服务器同编号快照一致（差分编解码无误）
+    """
+    server = CoopServer(send_every, waves, seed=0, player_health=10 ** 9)
+    port = await server.start('127.0.0.1', 0)
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(server.run(stop))
+    bots = [asyncio.create_task(run_bot('127.0.0.1', port, f"bench-{s}", players, stop, s * MAX_PLAYERS + p))
+            for s in range(sessions) for p in range(players)]
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - start
+    result = server.summary(elapsed)
+    histories = {name: session.history for name, session in server.sessions.items()}
+    stop.set()
+    conns = await asyncio.gather(*bots)
+    if verify:
+        mismatches = 0
+        for index, conn in enumerate(conns):
+            history = histories.get(f"bench-{index // players}", {})
+            snap = conn.latest
+            if snap is None or snap.id not in history:
+                continue
+            expected = history[snap.id]
+            if (snap.tick, snap.players, snap.enemies, snap.bullets, snap.enemy_bullets) != (
+                    expected.tick, expected.players, expected.enemies, expected.bullets, expected.enemy_bullets):
+                mismatches += 1
+        result['verify_mismatches'] = mismatches
+    await ticker
+    await server.close()
+    result['seconds'] = round(elapsed, 2)
+    result['client_kbps_in_mean'] = round(
+        sum(c.bytes_in for c in conns) * 8 / 1000 / elapsed / max(1, len(conns)), 2)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="合作模式服务器与回环压力测试")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_server = sub.add_parser('server', help="启动服务器")
+    p_server.add_argument('--host', default='0.0.0.0', help="监听地址")
+    p_server.add_argument('--port', type=int, default=DEFAULT_PORT, help="端口")
+    p_bench = sub.add_parser('bench', help="回环压力测试")
+    p_bench.add_argument('--sessions', type=int, default=25, help="会话数")
+    p_bench.add_argument('--players', type=int, default=4, choices=range(2, MAX_PLAYERS + 1),
+                         help="每个会话的玩家数")
+    p_bench.add_argument('--seconds', type=float, default=10.0, help="运行秒数")
+    for p in (p_server, p_bench):
+        p.add_argument('--send-every', type=int, default=SEND_EVERY, help="每隔几个逻辑帧发送一次快照")
+        p.add_argument('--waves', nargs='?', const='', metavar='FILE',
+                       help="按波次文件刷怪（不带文件名时使用 assets/waves.json）")
+    args = parser.parse_args()
+
+    wave_table = None
+    if args.waves is not None:
+        from waves import DEFAULT_WAVES, load_waves
+        wave_table = load_waves(args.waves or DEFAULT_WAVES)
+
+    if args.command == 'bench':
+        result = asyncio.run(bench(args.sessions, args.players, args.seconds, args.send_every, wave_table))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        async def serve():
+            server = CoopServer(args.send_every, wave_table)
+            port = await server.start(args.host, args.port)
+            print(f"合作模式服务器已启动: {args.host}:{port}")
+            try:
+                await server.run()
+            finally:
+                print(json.dumps(server.summary(server.tick_stats.frames * TICK_MS / 1000), ensure_ascii=False))
+                await server.close()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy 粒子系统（爆炸、引擎尾焰、护盾破碎）
+所有粒子的位置、速度、剩余寿命和外观保存在预分配的数组中，存活粒子始终紧凑地排在前部；
+每帧用向量运算移动、衰减并剔除死亡粒子，绘制时按 (外观, 淡出程度) 查预渲染的小图，一次 blits 提交。
+粒子总数有全局预算：接近预算时按比例减少新粒子，尾焰这类低优先级效果先停，满额后丢弃
+"""
+
+import math
+
+import numpy as np
+import pygame
+
+# 每种效果：颜色从新到旧渐变，粒子边长（像素）
+STYLES = {
+    'explosion': {'colors': ((255, 240, 150), (255, 170, 40), (220, 70, 20)), 'size': 3},
+    'spark': {'colors': ((255, 255, 255), (255, 120, 120)), 'size': 2},
+    'shield': {'colors': ((200, 255, 255), (0, 200, 255), (0, 90, 220)), 'size': 3},
+    'trail': {'colors': ((255, 220, 120), (255, 120, 40)), 'size': 2},
+}
+FADE_LEVELS = 4  # 淡出分几档透明度
+
+
+def _make_glyphs():
+    """预渲染所有 (样式, 颜色档, 透明度档) 的小方块，返回 (图片列表, {样式: 起始下标})"""
+    glyphs = []
+    offsets = {}
+    for name, style in STYLES.items():
+        offsets[name] = len(glyphs)
+        size = style['size']
+        for color in style['colors']:
+            for level in range(FADE_LEVELS):
+                glyph = pygame.Surface((size, size), pygame.SRCALPHA)
+                glyph.fill((*color, 255 * (level + 1) // FADE_LEVELS))
+                glyphs.append(glyph)
+    return glyphs, offsets
+
+
+class ParticleSystem:
+    """固定容量的粒子池；时间单位为游戏内毫秒，速度单位为像素/毫秒"""
+
+    def __init__(self, budget=1500, soft_ratio=0.6, seed=None):
+        """
+        :param budget: 同时存在的粒子上限（数组容量），0 表示关闭粒子效果
+        :param soft_ratio: 存活数超过 budget * soft_ratio 后新粒子按剩余空间比例减少，尾焰停止
+        """
+        self.budget = budget
+        self.soft_limit = int(budget * soft_ratio)
+        self.rng = np.random.default_rng(seed)  # 只影响画面，不参与游戏逻辑
+        self.x = np.zeros(budget, np.float32)
+        self.y = np.zeros(budget, np.float32)
+        self.vx = np.zeros(budget, np.float32)
+        self.vy = np.zeros(budget, np.float32)
+        self.gravity = np.zeros(budget, np.float32)
+        self.life = np.zeros(budget, np.float32)  # 剩余寿命（毫秒）
+        self.max_life = np.ones(budget, np.float32)
+        self.glyph_base = np.zeros(budget, np.int16)  # 样式在图片表中的起始下标
+        self.ncolors = np.ones(budget, np.int16)  # 样式的颜色档数
+        self.count = 0  # 存活粒子数，占用 [:count]
+        self.glyphs = None
+        self.offsets = None
+        # 统计
+        self.emitted = 0
+        self.reduced = 0
+        self.dropped = 0
+        self.peak = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _allowance(self, count, optional=False):
+        """按预算决定实际生成的数量：超过软上限后按剩余空间线性减少，optional 的效果直接跳过"""
+        free = self.budget - self.count
+        wanted = count
+        if self.count > self.soft_limit:
+            if optional:
+                count = 0
+            else:
+                count = int(count * free / max(1, self.budget - self.soft_limit))
+        count = min(count, free)
+        self.reduced += wanted - count
+        return count
+
+    def emit(self, style, x, y, count, speed=(0.05, 0.25), life=(300, 700), angle=(0.0, 2 * math.pi),
+             gravity=0.0, spread=0.0, optional=False):
+        """
+        在 (x, y) 附近生成一批粒子
+        :param speed: 初速度范围（像素/毫秒）
+        :param life: 寿命范围（毫秒）
+        :param angle: 发射方向范围（弧度，0 为向右，π/2 为向下）
+        :param gravity: 竖直加速度（像素/毫秒²）
+        :param spread: 出生位置的随机半径（像素）
+        :param optional: 低优先级效果（尾焰），接近预算时不生成
+        """
+        if self.budget == 0:
+            return 0
+        n = self._allowance(count, optional)
+        if n <= 0:
+            if not optional:
+                self.dropped += 1
+            return 0
+        rng = self.rng
+        s = slice(self.count, self.count + n)
+        theta = rng.uniform(angle[0], angle[1], n)
+        v = rng.uniform(speed[0], speed[1], n)
+        self.x[s] = x + rng.uniform(-spread, spread, n) if spread else x
+        self.y[s] = y + rng.uniform(-spread, spread, n) if spread else y
+        self.vx[s] = np.cos(theta) * v
+        self.vy[s] = np.sin(theta) * v
+        self.gravity[s] = gravity
+        self.life[s] = self.max_life[s] = rng.uniform(life[0], life[1], n)
+        self.glyph_base[s] = self._style_offset(style)
+        self.ncolors[s] = len(STYLES[style]['colors'])
+        self.count += n
+        self.emitted += n
+        self.peak = max(self.peak, self.count)
+        return n
+
+    def _style_offset(self, style):
+        if self.offsets is None:
+            self.glyphs, self.offsets = _make_glyphs()
+        return self.offsets[style]
+
+    # ---- 预设效果 ----
+
+    def explosion(self, x, y):
+        self.emit('explosion', x, y, 36, speed=(0.03, 0.22), life=(250, 650), spread=4)
+
+    def shield_break(self, x, y):
+        # 护盾碎片：速度接近的一圈，形成向外扩散的环
+        self.emit('shield', x, y, 60, speed=(0.18, 0.22), life=(350, 500), spread=2)
+
+    def hit_sparks(self, x, y):
+        self.emit('spark', x, y, 14, speed=(0.08, 0.3), life=(120, 260), gravity=0.0004)
+
+    def trail(self, x, y):
+        # 向下喷出，略带左右散开
+        self.emit('trail', x, y, 2, speed=(0.05, 0.12), life=(120, 220),
+                  angle=(math.pi / 2 - 0.35, math.pi / 2 + 0.35), spread=2, optional=True)
+
+    def update(self, dt_ms):
+        """推进 dt_ms 毫秒：积分位置、衰减寿命，死亡粒子被后面的存活粒子压紧覆盖"""
+        n = self.count
+        if n == 0 or dt_ms <= 0:
+            return
+        life = self.life[:n]
+        life -= dt_ms
+        vy = self.vy[:n]
+        vy += self.gravity[:n] * dt_ms
+        self.x[:n] += self.vx[:n] * dt_ms
+        self.y[:n] += vy * dt_ms
+        alive = life > 0
+        keep = int(np.count_nonzero(alive))
+        if keep < n:
+            for arr in (self.x, self.y, self.vx, self.vy, self.gravity, self.life, self.max_life,
+                        self.glyph_base, self.ncolors):
+                arr[:keep] = arr[:n][alive]
+            self.count = keep
+
+    def draw(self, surf, doreturn=False):
+        """按剩余寿命选择颜色档和透明度档，一次 blits 绘制所有粒子"""
+        n = self.count
+        if n == 0:
+            return [] if doreturn else None
+        ratio = self.life[:n] / self.max_life[:n]  # 1 -> 0
+        ncolors = self.ncolors[:n]
+        color_level = np.minimum(((1.0 - ratio) * ncolors).astype(np.int16), ncolors - 1)
+        fade = np.minimum((ratio * FADE_LEVELS).astype(np.int16), FADE_LEVELS - 1)
+        index = self.glyph_base[:n] + color_level * FADE_LEVELS + fade
+        glyphs = self.glyphs
+        xs = self.x[:n].astype(np.int32).tolist()
+        ys = self.y[:n].astype(np.int32).tolist()
+        return surf.blits([(glyphs[i], (x, y)) for i, x, y in zip(index.tolist(), xs, ys)], doreturn=doreturn)
+
+    def stats(self):
+        return {'alive': self.count, 'peak': self.peak, 'emitted': self.emitted,
+                'reduced': self.reduced, 'dropped_bursts': self.dropped}
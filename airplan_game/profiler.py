@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段帧耗时分析
+每帧用 lap(阶段名) 打点，把上一个打点到现在的耗时记到该阶段；最近若干帧的各阶段耗时、
+时间线和实体数量保存在定长环形缓冲中，可叠加显示在画面上，也可导出为
+Chrome trace（chrome://tracing、Perfetto 可打开）或 CSV 供离线分析
+"""
+
+import csv
+import json
+import time
+from collections import deque
+import pygame
+
+# 阶段按一帧内的先后顺序排列
+PHASES = ('wait', 'events', 'update', 'enemy_fire', 'collision', 'logic',
+          'background', 'sprites', 'hud', 'flip')
+COUNTERS = ('steps', 'all_sprites', 'enemies', 'bullets', 'enemy_bullets', 'particles')
+
+
+class FrameProfiler:
+    """分阶段帧计时器"""
+
+    def __init__(self, capacity=600, phases=PHASES):
+        """
+        :param capacity: 环形缓冲保留的帧数
+        :param phases: 阶段名（决定叠层和导出时的列顺序）
+        """
+        self.phases = phases
+        self.phase_index = {name: i for i, name in enumerate(phases)}
+        self.frames = deque(maxlen=capacity)  # (帧开始时间, [各阶段毫秒], {计数})
+        self.timelines = deque(maxlen=capacity)  # 每帧的 [(阶段, 开始时间, 秒)]
+        self.frame_count = 0
+        self._current = [0.0] * len(phases)
+        self._timeline = []
+        self._frame_start = None
+        self._last = None
+
+    def begin_frame(self):
+        self._frame_start = self._last = time.perf_counter()
+        self._current = [0.0] * len(self.phases)
+        self._timeline = []
+
+    def lap(self, phase):
+        """把上一个打点到现在的耗时计入 phase"""
+        if self._last is None:
+            return
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._current[self.phase_index[phase]] += elapsed * 1000
+        self._timeline.append((phase, self._last, elapsed))
+        self._last = now
+
+    def end_frame(self, **counters):
+        """结束本帧，counters 为实体数量等（见 COUNTERS）"""
+        if self._frame_start is None:
+            return
+        self.frames.append((self._frame_start, self._current, counters))
+        self.timelines.append(self._timeline)
+        self.frame_count += 1
+        self._frame_start = self._last = None
+
+    def averages(self, frames=60):
+        """最近 frames 帧各阶段的平均毫秒数与最新一帧的计数"""
+        recent = list(self.frames)[-frames:]
+        if not recent:
+            return {}, {}
+        means = {name: sum(f[1][i] for f in recent) / len(recent) for i, name in enumerate(self.phases)}
+        return means, recent[-1][2]
+
+    def summary(self):
+        """缓冲内所有帧的各阶段平均与最大毫秒数"""
+        if not self.frames:
+            return {}
+        result = {}
+        for i, name in enumerate(self.phases):
+            values = [f[1][i] for f in self.frames]
+            result[name] = {'mean_ms': round(sum(values) / len(values), 3), 'max_ms': round(max(values), 3)}
+        return result
+
+    def __str__(self):
+        means, _ = self.averages(len(self.frames))
+        return ', '.join(f"{name} {ms:.2f}ms" for name, ms in means.items())
+
+    def export_csv(self, path):
+        """每帧一行：各阶段毫秒数与计数"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'start_ms', *self.phases, 'total_ms', *COUNTERS])
+            first = self.frame_count - len(self.frames)
+            origin = self.frames[0][0] if self.frames else 0.0
+            for n, (start, phase_ms, counters) in enumerate(self.frames, first):
+                writer.writerow([n, round((start - origin) * 1000, 3), *(round(ms, 4) for ms in phase_ms),
+                                 round(sum(phase_ms), 4), *(counters.get(c, '') for c in COUNTERS)])
+
+    def export_trace(self, path):
+        """Chrome trace-event JSON：每帧一个外层事件，内部为各阶段事件，另有实体数量曲线"""
+        events = []
+        origin = self.frames[0][0] if self.frames else 0.0
+        first = self.frame_count - len(self.frames)
+        for n, ((start, phase_ms, counters), timeline) in enumerate(zip(self.frames, self.timelines), first):
+            ts = (start - origin) * 1e6
+            events.append({'name': f'frame {n}', 'cat': 'frame', 'ph': 'X', 'pid': 0, 'tid': 0,
+                           'ts': round(ts, 1), 'dur': round(sum(phase_ms) * 1000, 1)})
+            for phase, phase_start, elapsed in timeline:
+                events.append({'name': phase, 'cat': 'phase', 'ph': 'X', 'pid': 0, 'tid': 0,
+                               'ts': round((phase_start - origin) * 1e6, 1), 'dur': round(elapsed * 1e6, 1)})
+            if counters:
+                events.append({'name': 'entities', 'ph': 'C', 'pid': 0, 'tid': 0,
+                               'ts': round(ts, 1), 'args': counters})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def export(self, path):
+        """按扩展名导出：.csv 为 CSV，其余为 Chrome trace JSON"""
+        if path.lower().endswith('.csv'):
+            self.export_csv(path)
+        else:
+            self.export_trace(path)
+        print(f"帧分析数据已导出: {path}（{len(self.frames)} 帧）")
+
+
+class ProfilerOverlay:
+    """
+    画面左下角的分阶段耗时叠层
+    文字每 refresh_ms 重新渲染一次到缓存的 Surface，其余帧只做一次 blit
+    """
+
+    def __init__(self, font, refresh_ms=250, frames=60):
+        self.font = font
+        self.refresh_ms = refresh_ms
+        self.frames = frames
+        self.surface = None
+        self._rendered_at = None
+
+    def _render(self, profiler):
+        means, counters = profiler.averages(self.frames)
+        lines = [f"{name:<14}{ms:6.2f} ms" for name, ms in means.items()]
+        lines.append(f"{'total':<14}{sum(means.values()):6.2f} ms")
+        lines.extend(f"{name:<14}{counters.get(name, 0):6d}" for name in COUNTERS)
+        line_h = self.font.get_linesize()
+        width = max(self.font.size(line)[0] for line in lines) + 12
+        surface = pygame.Surface((width, line_h * len(lines) + 8), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 170))
+        for i, line in enumerate(lines):
+            surface.blit(self.font.render(line, True, (0, 255, 120)), (6, 4 + i * line_h))
+        return surface
+
+    def draw(self, surf, profiler):
+        """绘制叠层，返回绘制区域"""
+        now = pygame.time.get_ticks()
+        if self.surface is None or now - self._rendered_at >= self.refresh_ms:
+            self.surface = self._render(profiler)
+            self._rendered_at = now
+        return surf.blit(self.surface, self.surface.get_rect(bottomleft=(6, surf.get_height() - 6)))
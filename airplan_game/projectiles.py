@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy 结构数组子弹池
+子弹的位置、速度和存活标记保存在连续数组中，每帧用少量向量运算完成移动、
+出界剔除和碰撞检测，绘制时一次 blits 批量提交，代替逐个 Sprite.update()
+"""
+
+import numpy as np
+
+from engine import HEIGHT
+
+
+class ProjectilePool:
+    """
+    一类子弹的数组池（玩家子弹或敌机子弹各一个）
+    坐标为左上角整数像素，与 Sprite.rect 的行为完全一致
+    """
+
+    def __init__(self, size, capacity=256):
+        """
+        :param size: 子弹矩形尺寸 (w, h)
+        :param capacity: 初始容量，不够时自动翻倍
+        """
+        self.w, self.h = size
+        self.x = np.zeros(capacity, np.int32)
+        self.y = np.zeros(capacity, np.int32)
+        self.vx = np.zeros(capacity, np.int32)
+        self.vy = np.zeros(capacity, np.int32)
+        self.alive = np.zeros(capacity, bool)
+        self.count = 0  # 存活数量
+        self.used = 0  # 曾经使用过的最高槽位，只对 [:used] 做运算
+        self._free = []  # [:used] 范围内被释放的槽位
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        new_cap = self.capacity * 2
+        for name in ('x', 'y', 'vx', 'vy', 'alive'):
+            old = getattr(self, name)
+            arr = np.zeros(new_cap, old.dtype)
+            arr[:len(old)] = old
+            setattr(self, name, arr)
+
+    def spawn(self, left, top, vx, vy):
+        """生成一颗子弹（左上角坐标与速度），返回槽位"""
+        if self._free:
+            i = self._free.pop()
+        else:
+            if self.used == self.capacity:
+                self._grow()
+            i = self.used
+            self.used += 1
+        self.x[i] = left
+        self.y[i] = top
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.alive[i] = True
+        self.count += 1
+        return i
+
+    def spawn_centered(self, centerx, bottom, vx, vy):
+        """按 rect.centerx / rect.bottom 的方式定位生成"""
+        return self.spawn(centerx - self.w // 2, bottom - self.h, vx, vy)
+
+    def kill(self, mask):
+        """移除 mask（长度为 used 的布尔数组）中为真的存活子弹"""
+        dead = np.flatnonzero(mask & self.alive[:self.used])
+        if len(dead):
+            self.alive[dead] = False
+            self.count -= len(dead)
+            self._free.extend(dead.tolist())
+        return dead
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+        self.used = 0
+        self._free.clear()
+
+    def update(self):
+        """移动所有子弹并剔除完全离开屏幕的"""
+        n = self.used
+        if not self.count:
+            return
+        alive = self.alive[:n]
+        self.x[:n] += self.vx[:n] * alive
+        self.y[:n] += self.vy[:n] * alive
+        y = self.y[:n]
+        vy = self.vy[:n]
+        # 与 Bullet/EnemyBullet.update 相同：向上飞的 bottom < 0 时移除，向下飞的 top > HEIGHT 时移除
+        self.kill(((vy < 0) & (y + self.h < 0)) | ((vy > 0) & (y > HEIGHT)))
+        if self.count == 0:
+            self.clear()
+
+    def _overlap(self, left, top, right, bottom):
+        """与一组矩形（各为 (M, 1) 数组）的相交矩阵，语义同 Rect.colliderect"""
+        n = self.used
+        x = self.x[:n]
+        y = self.y[:n]
+        return ((x < right) & (x + self.w > left) & (y < bottom) & (y + self.h > top)
+                & self.alive[:n])
+
+    def _mask_filter(self, sprite, idx, mask):
+        """矩形相交的候选中，保留与精灵掩码有像素重叠的子弹槽位"""
+        overlap = sprite.mask.overlap
+        sx, sy = sprite.rect.topleft
+        xs = self.x[idx].tolist()
+        ys = self.y[idx].tolist()
+        keep = [i for i, x, y in zip(idx.tolist(), xs, ys) if overlap(mask, (x - sx, y - sy)) is not None]
+        return np.array(keep, np.intp)
+
+    def spritecollide(self, sprite, dokill, mask=None):
+        """
+        返回与精灵相交的子弹槽位，语义同 pygame.sprite.spritecollide
+        :param mask: 子弹图片的掩码；给出时矩形相交后再与 sprite.mask 做像素级检测
+        """
+        if not self.count:
+            return np.empty(0, np.intp)
+        r = sprite.rect
+        hit = self._overlap(r.left, r.top, r.right, r.bottom)
+        idx = np.flatnonzero(hit)
+        if mask is not None and len(idx):
+            idx = self._mask_filter(sprite, idx, mask)
+            hit = np.zeros(self.used, bool)
+            hit[idx] = True
+        if dokill and len(idx):
+            self.kill(hit)
+        return idx
+
+    def groupcollide(self, group, dokilla, dokillb, mask=None):
+        """
+        精灵组与子弹池的碰撞，语义同 pygame.sprite.groupcollide(group, bullets, ...)：
+        按精灵组顺序结算，dokillb 时一颗子弹只会命中一个精灵
+        :param mask: 子弹图片的掩码；给出时矩形相交后再与精灵的 mask 做像素级检测
+        :return: {精灵: 子弹槽位数组}
+        """
+        crashed = {}
+        if not self.count or not group:
+            return crashed
+        sprites = group.sprites()
+        rects = np.array([tuple(s.rect) for s in sprites], np.int32)
+        left = rects[:, 0:1]
+        top = rects[:, 1:2]
+        hit = self._overlap(left, top, left + rects[:, 2:3], top + rects[:, 3:4])
+        rows = np.flatnonzero(hit.any(axis=1))
+        if not len(rows):
+            return crashed
+        taken = np.zeros(self.used, bool)
+        for row in rows.tolist():
+            idx = np.flatnonzero(hit[row] & ~taken) if dokillb else np.flatnonzero(hit[row])
+            if mask is not None and len(idx):
+                idx = self._mask_filter(sprites[row], idx, mask)
+            if not len(idx):
+                continue
+            crashed[sprites[row]] = idx
+            if dokillb:
+                taken[idx] = True
+            if dokilla:
+                sprites[row].kill()
+        if dokillb:
+            self.kill(taken)
+        return crashed
+
+    def positions(self, alpha=1.0):
+        """存活子弹的绘制坐标列表，alpha < 1 时按速度回退做渲染插值"""
+        idx = np.flatnonzero(self.alive[:self.used])
+        x = self.x[idx]
+        y = self.y[idx]
+        if alpha < 1.0:
+            back = 1.0 - alpha
+            x = np.rint(x - self.vx[idx] * back).astype(np.int32)
+            y = np.rint(y - self.vy[idx] * back).astype(np.int32)
+        return list(zip(x.tolist(), y.tolist()))
+
+    def draw(self, surf, image, alpha=1.0, doreturn=False):
+        """一次 blits 批量绘制所有存活子弹，doreturn 为 True 时返回绘制区域列表"""
+        if not self.count:
+            return [] if doreturn else None
+        return surf.blits([(image, pos) for pos in self.positions(alpha)], doreturn=doreturn)
+
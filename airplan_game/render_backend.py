@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+渲染后端
+surface：软件 blit 到 display.set_mode 的窗口 Surface（原有方式）；
+texture/software：pygame._sdl2.video 的 Renderer/Texture，图片和 GIF 背景帧第一次绘制时上传为纹理，
+之后每帧只提交纹理绘制命令，透明混合由渲染器完成；software 强制使用 SDL 软件渲染器，没有 GPU 也能运行。
+游戏画面画在后端的画布上（blit/blits 与 Surface 接口一致，矩形用 draw_rect），两种后端共用同一套绘制代码
+"""
+
+import atexit
+import weakref
+from collections import OrderedDict
+import pygame
+
+try:
+    from pygame._sdl2 import video
+except ImportError:  # 旧版 pygame 没有 _sdl2，只能使用 surface 后端
+    video = None
+
+RENDERERS = ('surface', 'texture', 'software')
+
+
+def draw_rect(surf, color, rect, width=0, border_radius=0):
+    """画矩形：Surface 上直接用 pygame.draw，纹理画布上使用缓存的形状纹理"""
+    if isinstance(surf, pygame.Surface):
+        return pygame.draw.rect(surf, color, rect, width=width, border_radius=border_radius)
+    return surf.draw_rect(color, rect, width, border_radius)
+
+
+class SurfaceBackend:
+    """软件渲染：直接在窗口 Surface 上绘制，flip 提交"""
+
+    name = 'surface'
+
+    def __init__(self, size, title):
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(title)
+        self.canvas = self.screen
+
+    def preload(self, surfaces):
+        pass
+
+    def draw_background(self, background):
+        background.draw(self.screen)
+
+    def clear(self, color):
+        self.screen.fill(color)
+
+    def present(self):
+        pygame.display.flip()
+
+    def present_screen(self):
+        """提交在 screen 上画好的整屏画面（加载界面、菜单）"""
+        pygame.display.flip()
+
+    def frame_buffer(self):
+        """最近一帧画面的 Surface（录屏用），直接返回窗口 Surface，不复制"""
+        return self.screen
+
+    def stats(self):
+        return {'backend': self.name}
+
+
+class TextureCanvas:
+    """
+    纹理画布：源 Surface 第一次绘制时上传为纹理，以 Surface 为弱引用键缓存，
+    Surface 被释放（例如文字缓存淘汰）时纹理随之释放
+    """
+
+    def __init__(self, renderer, size, max_shapes=256):
+        """
+        :param max_shapes: 缓存的矩形形状（血条等）数量上限
+        """
+        self.renderer = renderer
+        self.rect = pygame.Rect((0, 0), size)
+        self.max_shapes = max_shapes
+        self._textures = weakref.WeakKeyDictionary()
+        self._shapes = OrderedDict()
+        self.uploads = 0
+
+    def texture(self, surface):
+        texture = self._textures.get(surface)
+        if texture is None:
+            texture = self._textures[surface] = video.Texture.from_surface(self.renderer, surface)
+            self.uploads += 1
+        return texture
+
+    def blit(self, source, dest, area=None):
+        if area is None:
+            rect = pygame.Rect(dest[0], dest[1], *source.get_size())
+        else:
+            area = pygame.Rect(area)
+            rect = pygame.Rect(dest[0], dest[1], area.width, area.height)
+        self.texture(source).draw(srcrect=area, dstrect=rect)
+        return rect.clip(self.rect)
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = [self.blit(*item) for item in blit_sequence]
+        return rects if doreturn else None
+
+    def draw_rect(self, color, rect, width=0, border_radius=0):
+        """圆角矩形先画到小 Surface 上并缓存（按颜色、尺寸、线宽、圆角和画面内可见部分），再作为纹理绘制"""
+        rect = pygame.Rect(rect)
+        visible = rect.clip(self.rect)
+        if visible.width <= 0 or visible.height <= 0:
+            return pygame.Rect(rect.topleft, (0, 0))
+        local = rect.move(-visible.x, -visible.y)
+        key = (tuple(color), tuple(local), visible.size, width, border_radius)
+        shape = self._shapes.get(key)
+        if shape is None:
+            shape = pygame.Surface(visible.size, pygame.SRCALPHA)
+            pygame.draw.rect(shape, color, local, width=width, border_radius=border_radius)
+            self._shapes[key] = shape
+            if len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        else:
+            self._shapes.move_to_end(key)
+        return self.blit(shape, visible)
+
+    def get_rect(self, **kwargs):
+        rect = self.rect.copy()
+        for name, value in kwargs.items():
+            setattr(rect, name, value)
+        return rect
+
+    def get_size(self):
+        return self.rect.size
+
+    def get_width(self):
+        return self.rect.width
+
+    def get_height(self):
+        return self.rect.height
+
+
+class TextureBackend:
+    """SDL2 Renderer 渲染：画面由纹理绘制命令组成，present 提交"""
+
+    def __init__(self, size, title, software=False):
+        # 隐藏的 1x1 display 窗口只用于 convert_alpha 等像素格式转换，画面画在单独的渲染窗口上
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        self.window = video.Window(title, size)
+        try:
+            self.renderer = video.Renderer(self.window, accelerated=0 if software else -1)
+        except pygame.error:
+            self.window.destroy()
+            raise
+        self.name = 'software' if software else 'texture'
+        self.canvas = TextureCanvas(self.renderer, size)
+        # 加载界面、菜单等仍在 Surface 上绘制，整屏上传到一张流式纹理
+        self.screen = pygame.Surface(size).convert()
+        self._screen_texture = video.Texture(self.renderer, size, streaming=True)
+        atexit.register(self.close)
+
+    def preload(self, surfaces):
+        """预先上传静态图片，避免第一次出现时卡顿"""
+        for surface in surfaces:
+            self.canvas.texture(surface)
+
+    def draw_background(self, background):
+        frame = background.frame_surface()
+        if frame is None:
+            self.clear((0, 0, 0))
+        else:
+            self.canvas.blit(frame, (0, 0))
+
+    def clear(self, color):
+        self.renderer.draw_color = color
+        self.renderer.clear()
+
+    def present(self):
+        self.renderer.present()
+
+    def present_screen(self):
+        self._screen_texture.update(self.screen)
+        self._screen_texture.draw()
+        self.renderer.present()
+
+    def frame_buffer(self):
+        """最近一帧画面的 Surface（录屏用）；需要从渲染器读回像素，比 surface 后端慢得多"""
+        return self.renderer.to_surface()
+
+    def close(self):
+        """先释放纹理再释放渲染器；解释器退出时的回收顺序不确定，渲染器先释放会导致崩溃"""
+        self.canvas._textures.clear()
+        self._screen_texture = None
+        self.canvas.renderer = self.renderer = None
+
+    def stats(self):
+        return {'backend': self.name, 'textures': len(self.canvas._textures),
+                'uploads': self.canvas.uploads, 'shapes': len(self.canvas._shapes)}
+
+
+def create_backend(name, size, title):
+    """
+    创建渲染后端；纹理后端不可用时退回 surface
+    :param name: RENDERERS 之一
+    """
+    if name != 'surface':
+        if video is None:
+            print("当前 pygame 不支持 SDL2 Renderer，使用 surface 渲染")
+        else:
+            try:
+                return TextureBackend(size, title, software=name == 'software')
+            except pygame.error as e:
+                print(f"创建 {name} 渲染器失败，使用 surface 渲染: {e}")
+    return SurfaceBackend(size, title)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入录制与回放
+录制随机种子和每个逻辑帧的输入（方向键、空格、S、P 压缩为一个字节），
+每 N 帧记录一次游戏状态哈希，波次模式的对局同时保存波次文件内容；回放时无头或窗口模式逐帧喂入相同输入并校验哈希，
+用于同一局重负载对局在不同版本之间对比性能
+用法: python replay.py 文件.rpl [--mode sprite|array]
+"""
+
+import struct
+import sys
+import time
+import zlib
+
+import atlas
+import engine
+from engine import GameState, Inputs, step
+
+REPLAY_MAGIC = b'RPLY'
+REPLAY_VERSION = 2  # 2: 末尾追加波次文件内容（版本 1 的录像仍可读取）
+# 魔数、版本、种子、标志位、哈希间隔、总帧数
+REPLAY_HEADER = struct.Struct('<4sHQBII')
+FLAG_ARRAY_PROJECTILES = 1
+FLAG_PIXEL_COLLISIONS = 2
+
+# 输入位
+LEFT, RIGHT, FIRE, SHIELD, PAUSE = 1, 2, 4, 8, 16
+
+
+def encode_inputs(inputs):
+    return ((LEFT if inputs.left else 0) | (RIGHT if inputs.right else 0)
+            | (FIRE if inputs.fire else 0) | (SHIELD if inputs.shield else 0)
+            | (PAUSE if inputs.pause else 0))
+
+
+def decode_inputs(bits):
+    return Inputs(left=bool(bits & LEFT), right=bool(bits & RIGHT), fire=bool(bits & FIRE),
+                  shield=bool(bits & SHIELD), pause=bool(bits & PAUSE))
+
+
+def state_hash(state):
+    """
+    游戏状态哈希（32 位）
+    子弹按坐标排序后参与计算，因此精灵模式和数组池模式的同一局哈希相同
+    """
+    player = state.player
+    parts = [
+        state.tick, state.score, state.player_level, state.kill_count, state.last_shield_score,
+        state.paused, state.running,
+        tuple(player.rect), player.health, player.shield_active, player.shield_duration, player.shield_count,
+        state.rng.getstate(),
+        tuple((tuple(e.rect), e.speed, e.last_shot, e.has_shot_on_spawn) for e in state.enemies),
+        sorted(bullet_positions(state.bullets)),
+        sorted(bullet_positions(state.enemy_bullets)),
+    ]
+    return zlib.crc32(repr(parts).encode())
+
+
+def bullet_positions(bullets):
+    """精灵组或数组池中子弹的左上角坐标"""
+    if hasattr(bullets, 'positions'):
+        return bullets.positions()
+    return [s.rect.topleft for s in bullets]
+
+
+class ReplayRecorder:
+    """录制一局：每个逻辑帧调用 record(inputs, state)（在 step 之后）"""
+
+    def __init__(self, seed, array_projectiles=False, hash_interval=60, pixel_collisions=False, waves=None):
+        """:param waves: 对局使用的刷怪表（waves.WaveTable），经典刷怪为 None"""
+        self.seed = seed
+        self.waves_source = waves.source if waves is not None else b''
+        self.flags = ((FLAG_ARRAY_PROJECTILES if array_projectiles else 0)
+                      | (FLAG_PIXEL_COLLISIONS if pixel_collisions else 0))
+        self.hash_interval = hash_interval
+        self.inputs = bytearray()
+        self.hashes = []
+
+    def record(self, inputs, state):
+        self.inputs.append(encode_inputs(inputs))
+        if len(self.inputs) % self.hash_interval == 0:
+            self.hashes.append(state_hash(state))
+
+    def save(self, path):
+        body = zlib.compress(bytes(self.inputs), 9)
+        with open(path, 'wb') as f:
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.flags,
+                                       self.hash_interval, len(self.inputs)))
+            f.write(struct.pack('<I', len(body)))
+            f.write(body)
+            f.write(struct.pack('<I', len(self.hashes)))
+            f.write(struct.pack(f'<{len(self.hashes)}I', *self.hashes))
+            waves = zlib.compress(self.waves_source, 9) if self.waves_source else b''
+            f.write(struct.pack('<I', len(waves)))
+            f.write(waves)
+            size = f.tell()
+        print(f"录像已保存: {path}（{len(self.inputs)} 帧, {size} 字节）")
+
+
+class Replay:
+    """读取录像，逐帧提供输入并校验状态哈希"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.seed, self.flags, self.hash_interval, ticks = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or not 1 <= version <= REPLAY_VERSION:
+            raise ValueError(f"不是有效的录像文件: {path}")
+        offset = REPLAY_HEADER.size
+        (body_len,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        self.inputs = zlib.decompress(data[offset:offset + body_len])
+        offset += body_len
+        (hash_count,) = struct.unpack_from('<I', data, offset)
+        self.hashes = list(struct.unpack_from(f'<{hash_count}I', data, offset + 4))
+        offset += 4 + 4 * hash_count
+        self.waves_source = b''
+        if version >= 2:
+            (waves_len,) = struct.unpack_from('<I', data, offset)
+            if waves_len:
+                self.waves_source = zlib.decompress(data[offset + 4:offset + 4 + waves_len])
+        if len(self.inputs) != ticks:
+            raise ValueError(f"录像帧数不一致: {len(self.inputs)} != {ticks}")
+        self.position = 0
+        self.mismatch = None  # 第一次哈希不一致的帧序号
+
+    @property
+    def array_projectiles(self):
+        return bool(self.flags & FLAG_ARRAY_PROJECTILES)
+
+    @property
+    def pixel_collisions(self):
+        return bool(self.flags & FLAG_PIXEL_COLLISIONS)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.inputs)
+
+    def new_state(self, array_projectiles=None):
+        """用录像的种子创建对局；array_projectiles 为 None 时沿用录制时的模式"""
+        if array_projectiles is None:
+            array_projectiles = self.array_projectiles
+        waves = None
+        if self.waves_source:
+            from waves import parse_waves
+            waves = parse_waves(self.waves_source)
+        return GameState(seed=self.seed, array_projectiles=array_projectiles,
+                         pixel_collisions=self.pixel_collisions, waves=waves)
+
+    def next_inputs(self):
+        inputs = decode_inputs(self.inputs[self.position])
+        self.position += 1
+        return inputs
+
+    def verify(self, state):
+        """在 step 之后调用，到达哈希间隔时校验，返回是否一致"""
+        if self.position % self.hash_interval:
+            return True
+        index = self.position // self.hash_interval - 1
+        if index >= len(self.hashes):
+            return True
+        ok = state_hash(state) == self.hashes[index]
+        if not ok and self.mismatch is None:
+            self.mismatch = self.position
+        return ok
+
+
+def play_headless(path, array_projectiles=None):
+    """无头回放整局，返回统计信息"""
+    replay = Replay(path)
+    if replay.pixel_collisions:
+        # 像素级碰撞依赖真实图片的掩码
+        engine.set_images(**atlas.decode_sprites())
+    state = replay.new_state(array_projectiles)
+    step_times = []
+    start = time.perf_counter()
+    while not replay.finished:
+        inputs = replay.next_inputs()
+        t = time.perf_counter()
+        step(state, inputs)
+        step_times.append(time.perf_counter() - t)
+        replay.verify(state)
+    elapsed = time.perf_counter() - start
+    step_times.sort()
+    return {
+        'ticks': len(replay),
+        'seconds': round(elapsed, 3),
+        'ticks_per_sec': round(len(replay) / elapsed) if elapsed else 0,
+        'step_mean_ms': round(sum(step_times) / max(1, len(step_times)) * 1000, 4),
+        'step_p99_ms': round(step_times[int(len(step_times) * 0.99)] * 1000, 4) if step_times else 0,
+        'score': state.score,
+        'verified': replay.mismatch is None,
+        'first_mismatch_tick': replay.mismatch,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="无头回放录像并校验状态哈希")
+    parser.add_argument('path')
+    parser.add_argument('--mode', choices=('sprite', 'array'), default=None,
+                        help="子弹实现（默认沿用录制时的模式）")
+    args = parser.parse_args()
+    mode = None if args.mode is None else args.mode == 'array'
+    result = play_headless(args.path, mode)
+    print(json.dumps(result, ensure_ascii=False))
+    sys.exit(0 if result['verified'] else 1)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定时事件调度器
+实体登记未来的事件（敌机下一次射击、护盾结束、背景下一帧……），每次推进时钟只处理到期的事件，
+不再逐个对象轮询。时间单位由使用者决定（引擎用逻辑帧，背景动画用游戏内毫秒）；
+时钟只在 advance() 时前进，暂停期间不推进即可，恢复后不会“补跑”或漂移
+"""
+
+import heapq
+import itertools
+
+
+class Scheduler:
+    """最小堆定时器，到期事件按 (到期时间, 优先级, 登记顺序) 依次执行"""
+
+    def __init__(self, now=0):
+        self.now = now
+        self._heap = []
+        self._seq = itertools.count()
+        self.fired = 0
+        self.cancelled = 0
+
+    def schedule(self, due, callback, *args, priority=0):
+        """
+        登记在 due 时刻执行 callback(*args)；due 不晚于当前时间时在下一次 advance() 中执行
+        :param priority: 同一时刻的事件中数值小的先执行
+        :return: 句柄，可传给 cancel()
+        """
+        entry = [due, priority, next(self._seq), callback, args]
+        heapq.heappush(self._heap, entry)
+        return entry
+
+    def schedule_in(self, delay, callback, *args, priority=0):
+        return self.schedule(self.now + delay, callback, *args, priority=priority)
+
+    def cancel(self, entry):
+        """取消事件（惰性删除：到期时直接跳过）"""
+        if entry is not None and entry[3] is not None:
+            entry[3] = None
+            self.cancelled += 1
+
+    def advance(self, now):
+        """
+        把时钟推进到 now，执行所有到期事件；回调中登记的、同样已到期的事件也在本次执行
+        :return: 本次执行的事件数
+        """
+        self.now = now
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= now:
+            _, _, _, callback, args = heapq.heappop(heap)
+            if callback is None:
+                continue
+            callback(*args)
+            fired += 1
+        self.fired += fired
+        return fired
+
+    def next_due(self):
+        """最早的未取消事件的到期时间，没有时返回 None"""
+        heap = self._heap
+        while heap and heap[0][3] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def stats(self):
+        return {'pending': len(self._heap), 'fired': self.fired, 'cancelled': self.cancelled}
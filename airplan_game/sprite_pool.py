@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精灵对象池
+敌机、子弹等频繁创建/销毁的精灵从空闲链表中复用，kill() 时自动归还，
+稳定运行后每帧不再分配新的精灵对象
+"""
+
+import pygame
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    """可池化的精灵：子类覆盖 reset(*args) 重新初始化状态"""
+
+    pool = None  # 所属对象池，None 表示不归还（池已满时创建的临时对象）
+    _pooled_free = False
+
+    def reset(self, *args):
+        """acquire 复用或新建对象后调用；默认不做任何事，没有状态需要重置的精灵不必覆盖"""
+
+    def kill(self):
+        """移出所有精灵组，并归还到对象池"""
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
+
+class SpritePool:
+    """
+    单一类型精灵的空闲链表对象池
+    acquire 时优先复用空闲对象并 reset，加入给定精灵组；精灵 kill 时自动 release
+    """
+
+    def __init__(self, factory, prealloc=0, limit=1024):
+        """
+        :param factory: 无参构造函数，返回一个 PooledSprite（之后总会 reset）
+        :param prealloc: 预先创建的对象数量
+        :param limit: 池最多管理的对象数，超出后创建的对象不再归还
+        """
+        self.factory = factory
+        self.limit = limit
+        self.free = []
+        self.owned = 0  # 池管理的对象总数
+        self.in_use = 0
+        # 统计
+        self.hits = 0  # 复用空闲对象
+        self.misses = 0  # 没有空闲对象，新建
+        self.overflow = 0  # 超出上限，新建的临时对象
+        self.high_water = 0  # 同时使用中的最大数量
+        self.grow(prealloc)
+
+    def grow(self, count):
+        """预分配 count 个空闲对象（不超过上限）"""
+        for _ in range(min(count, self.limit - self.owned)):
+            obj = self.factory()
+            obj.pool = self
+            obj._pooled_free = True
+            self.free.append(obj)
+            self.owned += 1
+
+    def acquire(self, args=(), groups=()):
+        """
+        取出一个对象
+        :param args: 传给 reset 的参数
+        :param groups: 要加入的精灵组
+        """
+        if self.free:
+            obj = self.free.pop()
+            self.hits += 1
+        else:
+            obj = self.factory()
+            self.misses += 1
+            if self.owned < self.limit:
+                obj.pool = self
+                self.owned += 1
+            else:
+                obj.pool = None
+                self.overflow += 1
+        if obj.pool is self:
+            obj._pooled_free = False
+            self.in_use += 1
+            if self.in_use > self.high_water:
+                self.high_water = self.in_use
+        obj.reset(*args)
+        if groups:
+            obj.add(*groups)
+        return obj
+
+    def release(self, obj):
+        """归还对象（重复归还会被忽略，例如同一帧里被多次 kill）"""
+        if obj._pooled_free:
+            return
+        obj._pooled_free = True
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'overflow': self.overflow,
+            'high_water': self.high_water,
+            'in_use': self.in_use,
+            'free': len(self.free),
+        }
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HUD 文字渲染缓存
+字体按字号缓存；渲染好的文字（及阴影）按 (文字, 字号, 颜色, 阴影颜色, 阴影偏移) 做有界 LRU 缓存；
+分数这类频繁变化的数字按单个字符缓存字形，每帧只做几次 blit，不再重复光栅化
+"""
+
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    """文字 Surface 的 LRU 缓存"""
+
+    def __init__(self, font_name, max_entries=256):
+        """
+        :param font_name: 字体文件路径（pygame.font.match_font 的结果）
+        :param max_entries: 最多缓存的文字条目数
+        """
+        self.font_name = font_name
+        self.max_entries = max_entries
+        self.fonts = {}
+        self.entries = OrderedDict()
+        self.glyphs = {}  # 数字等单字符字形，数量有限，不参与淘汰
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(self.font_name, size)
+        return font
+
+    def _render(self, text, size, color, shadow_color):
+        font = self.font(size)
+        text_surface = font.render(text, True, color)
+        shadow_surface = font.render(text, True, shadow_color) if shadow_color is not None else None
+        return text_surface, shadow_surface
+
+    def get(self, text, size, color, shadow_color=None, offset=(0, 0)):
+        """
+        取得渲染好的文字
+        :return: (文字 Surface, 阴影 Surface 或 None)
+        """
+        key = (text, size, color, shadow_color, offset)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = self.entries[key] = self._render(text, size, color, shadow_color)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def glyph(self, char, size, color, shadow_color=None):
+        """取得单个字符的字形（用于数字）"""
+        key = (char, size, color, shadow_color)
+        entry = self.glyphs.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self.glyphs[key] = self._render(char, size, color, shadow_color)
+        return entry
+
+    def draw(self, surf, text, size, pos, color, shadow_color=None, offset=(2, 2), anchor='midtop'):
+        """
+        绘制文字（带阴影时先画阴影），返回绘制区域
+        :param anchor: pos 对应的 Rect 属性名，如 'midtop'、'topright'
+        """
+        text_surface, shadow_surface = self.get(text, size, color, shadow_color, offset)
+        rect = text_surface.get_rect(**{anchor: pos})
+        if shadow_surface is None:
+            return surf.blit(text_surface, rect)
+        shadow_rect = surf.blit(shadow_surface, rect.move(offset))
+        return shadow_rect.union(surf.blit(text_surface, rect))
+
+    def draw_number(self, surf, prefix, value, size, pos, color, shadow_color=None, offset=(2, 2),
+                    anchor='topright'):
+        """
+        绘制“前缀 + 数字”，前缀整体缓存，数字逐位使用缓存字形拼接
+        :return: 绘制区域
+        """
+        parts = [self.get(prefix, size, color, shadow_color, offset)] if prefix else []
+        parts.extend(self.glyph(ch, size, color, shadow_color) for ch in str(value))
+        width = sum(text_surface.get_width() for text_surface, _ in parts)
+        height = max(text_surface.get_height() for text_surface, _ in parts)
+        rect = pygame.Rect(0, 0, width, height)
+        setattr(rect, anchor, pos)
+
+        blits = []
+        x = rect.x
+        for text_surface, shadow_surface in parts:
+            if shadow_surface is not None:
+                blits.append((shadow_surface, (x + offset[0], rect.y + offset[1])))
+            x += text_surface.get_width()
+        x = rect.x
+        for text_surface, _ in parts:
+            blits.append((text_surface, (x, rect.y)))
+            x += text_surface.get_width()
+        surf.blits(blits, doreturn=False)
+        if shadow_color is not None:
+            return rect.union(rect.move(offset))
+        return rect
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'glyphs': len(self.glyphs),
+        }
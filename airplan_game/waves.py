@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+波次编排（数据驱动的刷怪）
+波次文件（JSON）描述敌机类型、阵型、出现时间和射击方式，加载时编译为按逻辑帧排序的刷怪表；
+对局中 WaveDirector 用游标顺序消费刷怪表，每个逻辑帧只比较下一项的时间，
+不再按分数重新计算目标数量，也不扫描敌机组，后期的大波次同样只按实际生成的数量计费
+用法: python waves.py [波次文件]  打印编译结果
+"""
+
+import json
+import math
+import os
+
+from engine import DEFAULT_SIZES, TICK_MS, WIDTH
+
+DEFAULT_WAVES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'waves.json')
+WAVES_VERSION = 1
+FORMATIONS = ('random', 'line', 'column', 'v', 'grid')
+DEFAULT_Y = -60  # 阵型第一排的 rect.top，刚好在屏幕上方
+
+
+class FirePattern:
+    """敌机一次射击：按横向偏移同时发射多枚子弹，burst > 1 时每隔 burst_gap 个逻辑帧再连发"""
+
+    def __init__(self, name, offsets=(0,), burst=1, burst_gap_ms=100):
+        self.name = name
+        self.offsets = tuple(int(dx) for dx in offsets)
+        self.burst = max(1, int(burst))
+        self.burst_gap = max(1, ms_to_ticks(burst_gap_ms))
+
+    def __repr__(self):
+        return f"FirePattern({self.name!r}, offsets={self.offsets}, burst={self.burst})"
+
+
+class EnemyType:
+    """敌机类型：速度和射击间隔为 (最小, 最大) 范围，对局中用游戏随机数取值"""
+
+    def __init__(self, name, speed=(1, 3), shoot_delay=(2000, 4000), fire=None, score=10, wrap=False):
+        """
+        :param fire: FirePattern，None 为单发（与经典模式相同）
+        :param score: 击毁得分
+        :param wrap: 飞出屏幕底部后是否回到顶部（经典模式的行为），否则离场回收
+        """
+        self.name = name
+        self.speed = speed
+        self.shoot_delay = shoot_delay
+        self.fire = fire
+        self.score = score
+        self.wrap = wrap
+
+    def __repr__(self):
+        return f"EnemyType({self.name!r}, speed={self.speed}, shoot_delay={self.shoot_delay})"
+
+
+class WaveTable:
+    """
+    编译后的刷怪表：entries 为按逻辑帧排序的 (tick, EnemyType, centerx, top)，
+    centerx/top 为 None 时生成时随机（与经典模式相同的取值范围）；
+    loop_start 不为 None 时，表末尾之后从该下标起每 period 个逻辑帧重复一遍
+    """
+
+    def __init__(self, entries, types, loop_start=None, period=0, source=b''):
+        self.entries = entries
+        self.ticks = [entry[0] for entry in entries]
+        self.types = types
+        self.loop_start = loop_start
+        self.period = period
+        self.source = source  # 原始文件内容，录像中保存一份以便回放
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self):
+        counts = {}
+        for _, enemy_type, _, _ in self.entries:
+            counts[enemy_type.name] = counts.get(enemy_type.name, 0) + 1
+        last = self.ticks[-1] if self.ticks else 0
+        return {'entries': len(self.entries), 'last_tick': last, 'types': counts,
+                'loop_start': self.loop_start, 'period': self.period}
+
+
+class WaveDirector:
+    """按游标消费刷怪表；每个逻辑帧调用 advance(state)，生成到期的敌机"""
+
+    def __init__(self, table):
+        self.table = table
+        self.cursor = 0
+        self.offset = 0  # 循环累计的逻辑帧偏移
+        self.loops = 0
+        self.spawned = 0
+
+    def advance(self, state):
+        table = self.table
+        ticks, entries = table.ticks, table.entries
+        while True:
+            if self.cursor >= len(ticks):
+                if table.loop_start is None:
+                    return
+                self.cursor = table.loop_start
+                self.offset += table.period
+                self.loops += 1
+            if ticks[self.cursor] + self.offset > state.tick:
+                return
+            _, enemy_type, x, y = entries[self.cursor]
+            state.spawn_wave_enemy(enemy_type, x, y)
+            self.cursor += 1
+            self.spawned += 1
+
+    @property
+    def finished(self):
+        return self.table.loop_start is None and self.cursor >= len(self.table.ticks)
+
+    def stats(self):
+        return {'spawned': self.spawned, 'cursor': self.cursor, 'loops': self.loops}
+
+
+def ms_to_ticks(ms):
+    """毫秒换算为逻辑帧（向上取整，0 毫秒为第 0 帧）"""
+    return max(0, math.ceil(ms / TICK_MS - 1e-6))
+
+
+def _range(value, what):
+    """单个数值或 [最小, 最大] 统一为范围元组"""
+    if isinstance(value, (int, float)):
+        return (int(value), int(value))
+    if isinstance(value, (list, tuple)) and len(value) == 2 and value[0] <= value[1]:
+        return (int(value[0]), int(value[1]))
+    raise ValueError(f"{what} 应为数值或 [最小, 最大]: {value!r}")
+
+
+def _clamp_x(x):
+    half = DEFAULT_SIZES['enemy'][0] // 2
+    return min(max(int(round(x)), half), WIDTH - half)
+
+
+def formation_slots(wave, count):
+    """
+    阵型中每架敌机的 (延迟毫秒, centerx, top)
+    :param wave: 波次定义（formation、x、y、gap、cols、interval_ms）
+    """
+    formation = wave.get('formation', 'random')
+    interval = wave.get('interval_ms', 0)
+    y0 = wave.get('y', DEFAULT_Y)
+    gap = wave.get('gap', 50)
+    if formation == 'random':
+        # 位置在生成时随机，y 沿用经典模式的范围
+        return [(i * interval, None, None) for i in range(count)]
+    if formation == 'line':
+        left, right = wave.get('x', [40, WIDTH - 40])
+        step = (right - left) / (count - 1) if count > 1 else 0
+        return [(i * interval, _clamp_x(left + i * step if count > 1 else (left + right) / 2), y0)
+                for i in range(count)]
+    if formation == 'column':
+        x = _clamp_x(wave.get('x', WIDTH // 2))
+        return [(i * interval, x, y0 - i * gap) for i in range(count)]
+    if formation == 'v':
+        # 领头的在最前面，其余左右交替向后排开
+        x = wave.get('x', WIDTH // 2)
+        slots = []
+        for i in range(count):
+            rank = (i + 1) // 2
+            side = -1 if i % 2 else 1
+            slots.append((i * interval, _clamp_x(x + side * rank * gap), y0 - rank * gap))
+        return slots
+    if formation == 'grid':
+        cols = max(1, wave.get('cols', 6))
+        left, right = wave.get('x', [40, WIDTH - 40])
+        step = (right - left) / (cols - 1) if cols > 1 else 0
+        return [(i * interval, _clamp_x(left + (i % cols) * step), y0 - (i // cols) * gap)
+                for i in range(count)]
+    raise ValueError(f"未知阵型 {formation!r}，可选: {', '.join(FORMATIONS)}")
+
+
+def compile_waves(data, source=b''):
+    """
+    把波次定义编译为 WaveTable
+    :param data: 解析后的波次文件
+    :param source: 原始文件内容
+    """
+    if data.get('version', WAVES_VERSION) != WAVES_VERSION:
+        raise ValueError(f"不支持的波次文件版本: {data.get('version')}")
+    patterns = {'single': None}
+    for name, spec in data.get('fire_patterns', {}).items():
+        patterns[name] = FirePattern(name, spec.get('offsets', (0,)), spec.get('burst', 1),
+                                     spec.get('burst_gap_ms', 100))
+    types = {}
+    for name, spec in data.get('enemy_types', {}).items():
+        fire = spec.get('fire', 'single')
+        if fire not in patterns:
+            raise ValueError(f"敌机类型 {name} 使用了未定义的射击方式 {fire!r}")
+        types[name] = EnemyType(name, _range(spec.get('speed', (1, 3)), f"{name}.speed"),
+                                _range(spec.get('shoot_delay', (2000, 4000)), f"{name}.shoot_delay"),
+                                patterns[fire], int(spec.get('score', 10)), bool(spec.get('wrap', False)))
+
+    entries = []
+    for index, wave in enumerate(data.get('waves', ())):
+        enemy_type = types.get(wave.get('type'))
+        if enemy_type is None:
+            raise ValueError(f"第 {index} 个波次使用了未定义的敌机类型 {wave.get('type')!r}")
+        # repeat 次重复，每次间隔 every_ms，数量每次增加 count_step
+        for r in range(wave.get('repeat', 1)):
+            at = wave['at_ms'] + r * wave.get('every_ms', 0)
+            count = wave.get('count', 1) + r * wave.get('count_step', 0)
+            for delay, x, y in formation_slots(wave, count):
+                entries.append((ms_to_ticks(at + delay), enemy_type, x, y))
+    # 同一逻辑帧内保持文件中的顺序
+    entries.sort(key=lambda entry: entry[0])
+
+    loop_start, period = None, 0
+    loop = data.get('loop')
+    if loop and entries:
+        first = ms_to_ticks(loop.get('from_ms', 0))
+        loop_start = next((i for i, entry in enumerate(entries) if entry[0] >= first), None)
+        if loop_start is not None:
+            period = entries[-1][0] - first + max(1, ms_to_ticks(loop.get('gap_ms', 0)))
+    return WaveTable(entries, types, loop_start, period, source)
+
+
+def parse_waves(source):
+    """从文件内容（bytes）编译刷怪表"""
+    return compile_waves(json.loads(source), source)
+
+
+def load_waves(path=DEFAULT_WAVES):
+    with open(path, 'rb') as f:
+        return parse_waves(f.read())
+
+
+if __name__ == "__main__":
+    import sys
+
+    table = load_waves(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_WAVES)
+    print(json.dumps(table.summary(), ensure_ascii=False))
+    for name, enemy_type in table.types.items():
+        print(f"  {name}: {enemy_type}, 射击 {enemy_type.fire or '单发'}")